@@ -0,0 +1,81 @@
+"""Compare dataset parsing strategies on a synthetic dataset.
+
+Usage::
+
+    python benchmarks/dataset_parse.py
+    python benchmarks/dataset_parse.py --count 100000 --type OBJECT_DETECTION
+
+``dicts`` is the old eager path (``json.loads`` followed by
+``Annotation(**item)`` per item), ``stream`` is the incremental parser used
+by ``stream_dataset=True``, and ``validate_json`` validates the raw bytes
+in a single pass with a cached ``TypeAdapter``. Times are the best of
+``--repeat`` runs in seconds.
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from singtown_ai.client import iter_json_array
+from singtown_ai.testing import synthetic_annotation
+from singtown_ai.type import Annotation, parse_annotations
+
+
+def make_dataset(count: int, project_type: str) -> bytes:
+    labels = ["cat", "dog", "bird"]
+    base_url = "https://ai.singtown.com/media/datasets"
+    return json.dumps(
+        [synthetic_annotation(i, base_url, labels, project_type) for i in range(count)]
+    ).encode("utf-8")
+
+
+def parse_dicts(data: bytes):
+    return [Annotation(**item) for item in json.loads(data)]
+
+
+def parse_stream(data: bytes):
+    chunks = (data[i : i + 64 * 1024] for i in range(0, len(data), 64 * 1024))
+    return [Annotation(**item) for item in iter_json_array(chunks)]
+
+
+STRATEGIES = {
+    "dicts": parse_dicts,
+    "stream": parse_stream,
+    "validate_json": parse_annotations,
+}
+
+
+def measure(parse, data: bytes, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parse(data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument(
+        "--type",
+        choices=["CLASSIFICATION", "OBJECT_DETECTION"],
+        default="CLASSIFICATION",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    data = make_dataset(args.count, args.type)
+    print(f"{args.count} annotations, {len(data) / 1e6:.1f} MB")
+    baseline = None
+    for name, parse in STRATEGIES.items():
+        elapsed = measure(parse, data, args.repeat)
+        baseline = baseline or elapsed
+        print(f"{name:<14} {elapsed:>8.3f} s  {baseline / elapsed:>5.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""Track the import cost of singtown_ai with ``python -X importtime``.
+
+Usage::
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --repeat 10 --budget watcher=20000
+
+Each scenario runs in a fresh interpreter. The reported time is the best
+cumulative import time in microseconds of the top-level modules that the
+statement imports, after the interpreter's own startup imports. A scenario
+that goes over its ``--budget`` makes the script exit with status 1.
+"""
+
+import argparse
+import subprocess
+import sys
+
+SCENARIOS = {
+    "package": "import singtown_ai",
+    "watcher": "from singtown_ai import stdout_watcher",
+    "client": "from singtown_ai import SingTownAIClient",
+    "exporter": "from singtown_ai import export_yolo",
+    "async_client": "from singtown_ai import AsyncSingTownAIClient",
+}
+
+
+def parse_importtime(stderr: str, baseline: set) -> dict:
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if name.startswith("  ") or name.strip() in baseline:
+            continue
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def run(statement: str) -> str:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stderr
+
+
+def measure(statement: str, repeat: int) -> tuple:
+    baseline = set(parse_importtime(run("pass"), set()))
+    best = None
+    for _ in range(repeat):
+        modules = parse_importtime(run(statement), baseline)
+        total = sum(modules.values())
+        if best is None or total < best[0]:
+            best = (total, modules)
+    return best
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument(
+        "--budget",
+        action="append",
+        default=[],
+        metavar="SCENARIO=US",
+        help="fail if a scenario takes longer than US microseconds",
+    )
+    args = parser.parse_args(argv)
+    budgets = {
+        name: int(value)
+        for name, value in (budget.split("=", 1) for budget in args.budget)
+    }
+
+    failed = False
+    for name, statement in SCENARIOS.items():
+        total, modules = measure(statement, args.repeat)
+        budget = budgets.get(name)
+        status = ""
+        if budget is not None:
+            status = "ok" if total <= budget else f"over budget ({budget} us)"
+            failed = failed or total > budget
+        print(f"{name:<14} {total:>10} us  {status}")
+        heaviest = sorted(modules.items(), key=lambda item: -item[1])[: args.top]
+        for module, cumulative in heaviest:
+            print(f"    {module:<40} {cumulative:>10} us")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
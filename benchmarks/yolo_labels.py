@@ -0,0 +1,87 @@
+"""Compare YOLO label conversion strategies on a synthetic dataset.
+
+Usage::
+
+    python benchmarks/yolo_labels.py
+    python benchmarks/yolo_labels.py --count 100000
+
+``per_box`` is the old converter (range checks and formatting one box at a
+time), ``vectorized`` is the NumPy pass used by ``export_yolo``. Both build
+the label file contents in memory, so the times exclude disk writes. Times
+are the best of ``--repeat`` runs in seconds.
+"""
+
+import argparse
+import sys
+import time
+
+from singtown_ai.exporter import _yolo_labels
+from singtown_ai.testing import synthetic_annotation
+from singtown_ai.type import Annotation
+
+LABELS = ["cat", "dog", "bird"]
+
+
+def make_dataset(count: int):
+    base_url = "https://ai.singtown.com/media/datasets"
+    return [
+        Annotation(**synthetic_annotation(i, base_url, LABELS, "OBJECT_DETECTION"))
+        for i in range(count)
+    ]
+
+
+def convert_per_box(annotations, label_ids):
+    contents = []
+    for annotation in annotations:
+        lines = []
+        for box in annotation.object_detection:
+            cx = (box.xmin + box.xmax) / 2
+            cy = (box.ymin + box.ymax) / 2
+            w = box.xmax - box.xmin
+            h = box.ymax - box.ymin
+            if not (
+                (0 <= cx <= 1) and (0 <= cy <= 1) and (0 <= w <= 1) and (0 <= h <= 1)
+            ):
+                raise ValueError(f"cx: {cx}, cy: {cy}, w: {w}, h: {h}")
+            class_id = label_ids[box.label]
+            lines.append(f"{class_id} {cx:.6f} {cy:.6f} {w:.6f} {h:.6f}\n")
+        contents.append("".join(lines))
+    return contents
+
+
+STRATEGIES = {
+    "per_box": convert_per_box,
+    "vectorized": _yolo_labels,
+}
+
+
+def measure(convert, annotations, label_ids, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        convert(annotations, label_ids)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    annotations = make_dataset(args.count)
+    label_ids = {label: i for i, label in enumerate(LABELS)}
+    boxes = sum(len(annotation.object_detection) for annotation in annotations)
+    print(f"{args.count} annotations, {boxes} boxes")
+    baseline = None
+    for name, convert in STRATEGIES.items():
+        elapsed = measure(convert, annotations, label_ids, args.repeat)
+        baseline = baseline or elapsed
+        print(f"{name:<14} {elapsed:>8.3f} s  {baseline / elapsed:>5.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,79 @@
-from .client import SingTownAIClient
-from .watcher import file_watcher, stdout_watcher
-from .exporter import export_class_folder, export_yolo
+import importlib
+from typing import TYPE_CHECKING
+
+_LAZY_ATTRIBUTES = {
+    "SingTownAIClient": ".client",
+    "AsyncSingTownAIClient": ".async_client",
+    "SingTownAIClientPool": ".pool",
+    "file_watcher": ".watcher",
+    "stdout_watcher": ".watcher",
+    "export_class_folder": ".exporter",
+    "export_yolo": ".exporter",
+    "export_coco": ".exporter",
+    "export_webdataset": ".exporter",
+    "export_tfrecord": ".exporter",
+    "export_packed": ".exporter",
+    "PackedDataset": ".packed",
+    "async_export_class_folder": ".exporter",
+    "async_export_yolo": ".exporter",
+    "start_export_class_folder": ".exporter",
+    "start_export_yolo": ".exporter",
+    "ExportError": ".exporter",
+    "LabelError": ".exporter",
+}
 
 __all__ = [
     "SingTownAIClient",
+    "AsyncSingTownAIClient",
+    "SingTownAIClientPool",
     "file_watcher",
     "stdout_watcher",
     "export_class_folder",
     "export_yolo",
+    "export_coco",
+    "export_webdataset",
+    "export_tfrecord",
+    "export_packed",
+    "PackedDataset",
+    "async_export_class_folder",
+    "async_export_yolo",
+    "start_export_class_folder",
+    "start_export_yolo",
+    "ExportError",
+    "LabelError",
 ]
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:
+    from .async_client import AsyncSingTownAIClient
+    from .client import SingTownAIClient
+    from .exporter import (
+        ExportError,
+        LabelError,
+        async_export_class_folder,
+        async_export_yolo,
+        export_class_folder,
+        export_coco,
+        export_packed,
+        export_tfrecord,
+        export_webdataset,
+        export_yolo,
+        start_export_class_folder,
+        start_export_yolo,
+    )
+    from .packed import PackedDataset
+    from .pool import SingTownAIClientPool
+    from .watcher import file_watcher, stdout_watcher
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import os
+import time
+from os import PathLike
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import aiohttp
+
+from .client import load_mock_data
+from .download import DownloadVerifier, download_file, image_filename, temp_path
+from .type import (
+    Annotation,
+    LogEntry,
+    TaskResponse,
+    parse_annotations,
+    parse_task,
+)
+
+
+class AsyncSingTownAIClient:
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        token: Optional[str] = None,
+        task_id: Optional[str] = None,
+        mock_task_path: Union[str, PathLike, None] = None,
+        mock_dataset_path: Union[str, PathLike, None] = None,
+        max_concurrency: int = 1000,
+        chunk_size: int = 64 * 1024,
+    ):
+        self.host = host or os.getenv("SINGTOWN_AI_HOST", "https://ai.singtown.com")
+        self.token = token or os.getenv("SINGTOWN_AI_TOKEN", "0123456")
+        self.task_id = task_id or os.getenv("SINGTOWN_AI_TASK_ID", "0")
+        self.headers = {"Authorization": f"Bearer {self.token}"}
+        self.max_concurrency = max_concurrency
+        self.chunk_size = chunk_size
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.task: Optional[TaskResponse] = None
+        self.dataset: List[Annotation] = []
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        mock_task_path = mock_task_path or os.getenv("SINGTOWN_AI_MOCK_TASK_PATH")
+        mock_dataset_path = mock_dataset_path or os.getenv(
+            "SINGTOWN_AI_MOCK_DATASET_PATH"
+        )
+
+        self.mock_routes: Optional[Dict[Tuple[str, str], bytes]] = None
+        if mock_task_path:
+            self.__setup_mock(mock_task_path, mock_dataset_path)
+
+    @classmethod
+    async def create(cls, **kwargs) -> "AsyncSingTownAIClient":
+        client = cls(**kwargs)
+        await client.open()
+        return client
+
+    async def open(self):
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+            self.session = aiohttp.ClientSession(connector=connector)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.task = await self.__get_task()
+        self.dataset = await self.__get_dataset()
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self) -> "AsyncSingTownAIClient":
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def __setup_mock(self, mock_task_path, mock_dataset_path):
+        mock_task_data, mock_dataset_data = load_mock_data(
+            mock_task_path, mock_dataset_path
+        )
+        task_url = f"{self.host}/api/v1/task/tasks/{self.task_id}"
+        self.mock_routes = {
+            ("GET", task_url): json.dumps(mock_task_data.model_dump()).encode(),
+            ("GET", f"{task_url}/dataset"): json.dumps(
+                [annotation.model_dump() for annotation in mock_dataset_data]
+            ).encode(),
+            ("POST", task_url): b"",
+            ("POST", f"{task_url}/result"): b"",
+            ("POST", f"{task_url}/logs"): b"",
+        }
+
+    async def request(self, method, url, headers=None, **kwargs) -> bytes:
+        if self.mock_routes is not None and (method, url) in self.mock_routes:
+            return self.mock_routes[(method, url)]
+        headers = {**self.headers, **headers} if headers else self.headers
+        async with self.session.request(
+            method, url, headers=headers, **kwargs
+        ) as response:
+            response.raise_for_status()
+            return await response.read()
+
+    async def get(self, url, params=None, **kwargs) -> bytes:
+        return await self.request("GET", url, params=params, **kwargs)
+
+    async def post(self, url, data=None, json=None, **kwargs) -> bytes:
+        return await self.request("POST", url, data=data, json=json, **kwargs)
+
+    async def __get_task(self) -> TaskResponse:
+        content = await self.get(f"{self.host}/api/v1/task/tasks/{self.task_id}")
+        return parse_task(content)
+
+    async def __post_task(self, json: dict):
+        new_task = self.task.model_dump()
+        new_task.update(json)
+        self.task = TaskResponse(**new_task)
+        await self.post(f"{self.host}/api/v1/task/tasks/{self.task_id}", json=json)
+
+    async def __get_dataset(self) -> List[Annotation]:
+        content = await self.get(
+            f"{self.host}/api/v1/task/tasks/{self.task_id}/dataset"
+        )
+        return parse_annotations(content)
+
+    async def download_image(
+        self,
+        url: str,
+        folder: Union[str, PathLike],
+        filename: Optional[str] = None,
+        size: Optional[int] = None,
+        sha256: Optional[str] = None,
+    ) -> Path:
+        async with self._semaphore:
+            if not url.startswith(("http://", "https://")):
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(
+                    None,
+                    download_file,
+                    url,
+                    folder,
+                    filename,
+                    self.chunk_size,
+                    size,
+                    sha256,
+                )
+
+            filepath = Path(folder) / (filename or image_filename(url))
+            if filepath.exists():
+                return filepath
+            filepath.parent.mkdir(parents=True, exist_ok=True)
+            tmp = temp_path(filepath)
+            verifier = DownloadVerifier(url, size, sha256)
+            try:
+                async with self.session.get(url) as response:
+                    response.raise_for_status()
+                    with open(tmp, "wb") as f:
+                        async for chunk in response.content.iter_chunked(
+                            self.chunk_size
+                        ):
+                            verifier.update(chunk)
+                            f.write(chunk)
+                verifier.verify()
+                os.replace(tmp, filepath)
+            finally:
+                if tmp.exists():
+                    tmp.unlink()
+            return filepath
+
+    async def log(self, content: str, end: str = "\n"):
+        log = LogEntry(timestamp=time.time(), content=content + end)
+        await self.post(
+            f"{self.host}/api/v1/task/tasks/{self.task_id}/logs", json=log.model_dump()
+        )
+        self.task.logs.append(log)
+
+    async def update_metrics(self, metrics: List[dict]):
+        await self.__post_task({"metrics": metrics})
+
+    async def upload_results_zip(self, file_path: Union[str, PathLike]):
+        with open(file_path, "rb") as f:
+            data = aiohttp.FormData()
+            data.add_field("file", f, filename=os.path.basename(file_path))
+            await self.post(
+                f"{self.host}/api/v1/task/tasks/{self.task_id}/result", data=data
+            )
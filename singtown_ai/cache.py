@@ -0,0 +1,161 @@
+import contextlib
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+from os import PathLike
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+from .download import DEFAULT_CHUNK_SIZE, stream_download, temp_path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+    import msvcrt
+
+FICLONE = 0x40049409
+
+
+@contextlib.contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:  # pragma: no cover
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:  # pragma: no cover
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def link_or_copy(src: Union[str, PathLike], dst: Union[str, PathLike]):
+    tmp = temp_path(Path(dst))
+    try:
+        os.link(src, tmp)
+    except OSError:
+        with open(src, "rb") as fsrc, open(tmp, "wb") as fdst:
+            try:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            except (AttributeError, OSError):
+                shutil.copyfileobj(fsrc, fdst)
+    os.replace(tmp, dst)
+
+
+class ImageCache:
+    def __init__(
+        self,
+        root: Union[str, PathLike],
+        max_bytes: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.lock = threading.Lock()
+        self.added = 0
+        for name in ("objects", "urls", "locks", "tmp"):
+            (self.root / name).mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def url_key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def object_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / digest
+
+    def __ref_path(self, url: str) -> Path:
+        key = self.url_key(url)
+        return self.root / "urls" / key[:2] / key
+
+    def __lookup(
+        self, url: str, size: Optional[int] = None, sha256: Optional[str] = None
+    ) -> Optional[Path]:
+        try:
+            digest = self.__ref_path(url).read_text().strip()
+        except FileNotFoundError:
+            return None
+        # objects are named by their sha256, so a stale url shows in the ref
+        if sha256 is not None and digest != sha256.lower():
+            return None
+        path = self.object_path(digest)
+        try:
+            os.utime(path)
+            if size is not None and path.stat().st_size != size:
+                return None
+        except FileNotFoundError:
+            return None
+        return path
+
+    def __store(
+        self, url: str, size: Optional[int] = None, sha256: Optional[str] = None
+    ) -> Path:
+        tmp = self.root / "tmp" / uuid.uuid4().hex
+        digest = stream_download(url, tmp, self.chunk_size, size, sha256)
+        path = self.object_path(digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp, path)
+
+        ref = self.__ref_path(url)
+        ref.parent.mkdir(parents=True, exist_ok=True)
+        ref_tmp = ref.with_name(f"{ref.name}.{uuid.uuid4().hex}.tmp")
+        ref_tmp.write_text(digest)
+        os.replace(ref_tmp, ref)
+        with self.lock:
+            self.added += path.stat().st_size
+        return path
+
+    def fetch(
+        self, url: str, size: Optional[int] = None, sha256: Optional[str] = None
+    ) -> Path:
+        path = self.__lookup(url, size, sha256)
+        if path is not None:
+            return path
+        with file_lock(self.root / "locks" / self.url_key(url)[:2]):
+            path = self.__lookup(url, size, sha256) or self.__store(url, size, sha256)
+        if self.max_bytes is not None and self.added > self.max_bytes // 16:
+            self.evict()
+        return path
+
+    def materialize(
+        self,
+        url: str,
+        target: Union[str, PathLike],
+        size: Optional[int] = None,
+        sha256: Optional[str] = None,
+    ) -> Path:
+        target = Path(target)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            link_or_copy(self.fetch(url, size, sha256), target)
+        except FileNotFoundError:
+            link_or_copy(self.fetch(url, size, sha256), target)
+        return target
+
+    def evict(self):
+        if self.max_bytes is None:
+            return
+        with file_lock(self.root / "locks" / "evict"):
+            with self.lock:
+                self.added = 0
+            objects = []
+            for path in (self.root / "objects").glob("*/*"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                objects.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in objects)
+            for _, size, path in sorted(objects):
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
@@ -1,13 +1,139 @@
+import codecs
+import contextlib
+import itertools
 import os
+import re
 import threading
 import time
-import requests_mock
+from concurrent.futures import Executor
+from requests.exceptions import HTTPError
 from pathlib import Path
-from typing import List, Optional, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Union,
+)
+from urllib.parse import urljoin
 from os import PathLike
-from .type import Annotation, LogEntry, TaskResponse
+from .cache import ImageCache
+from .compress import (
+    COMPRESS_UNSUPPORTED_STATUS,
+    accept_encoding,
+    check_encoding,
+    compress_body,
+)
+from .download import DEFAULT_CHUNK_SIZE, download_file, image_filename
+from .snapshot import SnapshotStore
+from .logbatch import BATCH_UNSUPPORTED_STATUS, LogBatcher
+from .retry import (
+    IDEMPOTENT_METHODS,
+    RETRY_STATUS,
+    RateLimiter,
+    RequestStats,
+    backoff_delay,
+    request_not_sent,
+    retry_after,
+)
+from .upload import ChunkedUpload, ChunkedUploadUnsupported, ProgressCallback
+from .type import (
+    Annotation,
+    LogEntry,
+    TaskResponse,
+    parse_annotations,
+    parse_task,
+)
 import json
 
+if TYPE_CHECKING:
+    import requests
+
+    from .columnar import ColumnarDataset
+    from .index import DatasetIndex
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    state = "start"
+    for chunk in itertools.chain(chunks, [None]):
+        final = chunk is None
+        buffer += utf8.decode(b"" if final else chunk, final=final)
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n":
+                pos += 1
+            if pos == len(buffer):
+                break
+            char = buffer[pos]
+            if state == "start":
+                if char != "[":
+                    raise ValueError("dataset response is not a JSON array")
+                state = "first"
+                pos += 1
+            elif state == "first" and char == "]":
+                return
+            elif state == "after":
+                if char == ",":
+                    state = "next"
+                    pos += 1
+                elif char == "]":
+                    return
+                else:
+                    raise ValueError(f"unexpected {char!r} in dataset response")
+            else:
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    break
+                if end == len(buffer) and not final:
+                    break
+                yield item
+                state = "after"
+                pos = end
+        buffer = buffer[pos:]
+    raise ValueError("dataset response ended before the JSON array was closed")
+
+
+def new_session(pool_maxsize: int):
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class DatasetStream:
+    def __init__(self, client: "SingTownAIClient"):
+        self.client = client
+
+    def __iter__(self) -> Iterator[Annotation]:
+        return self.client.iter_dataset()
+
+
+def load_mock_data(
+    mock_task_path: Union[str, PathLike], mock_dataset_path: Union[str, PathLike, None]
+) -> Tuple[TaskResponse, List[Annotation]]:
+    with open(str(mock_task_path), "rb") as f:
+        mock_task_data = parse_task(f.read())
+    try:
+        with open(str(mock_dataset_path), "rb") as f:
+            mock_dataset_data = parse_annotations(f.read())
+    except FileNotFoundError:
+        mock_dataset_data = []
+    return mock_task_data, mock_dataset_data
+
 
 class SingTownAIClient:
     def __init__(
@@ -17,53 +143,266 @@ class SingTownAIClient:
         task_id: Optional[str] = None,
         mock_task_path: Union[str, PathLike, None] = None,
         mock_dataset_path: Union[str, PathLike, None] = None,
+        pool_maxsize: int = 16,
+        keep_alive: bool = True,
+        stream_dataset: bool = False,
+        log_batch_size: int = 0,
+        log_batch_bytes: int = 64 * 1024,
+        log_flush_interval: float = 1.0,
+        cache_dir: Union[str, PathLike, None] = None,
+        cache_max_bytes: Optional[int] = None,
+        download_chunk_size: int = DEFAULT_CHUNK_SIZE,
+        snapshot_dir: Union[str, PathLike, None] = None,
+        prefetch: Literal["eager", "background", "lazy"] = "eager",
+        mock_server: Optional[bool] = None,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        backoff_max: float = 30.0,
+        rate_limit: Optional[float] = None,
+        rate_burst: int = 10,
+        compress: Optional[Literal["gzip", "zstd"]] = None,
+        compress_min_bytes: int = 1024,
+        session: Optional["requests.Session"] = None,
+        executor: Optional[Executor] = None,
+        image_cache: Optional[ImageCache] = None,
     ):
         self.host = host or os.getenv("SINGTOWN_AI_HOST", "https://ai.singtown.com")
         self.token = token or os.getenv("SINGTOWN_AI_TOKEN", "0123456")
         self.task_id = task_id or os.getenv("SINGTOWN_AI_TASK_ID", "0")
-        self.headers = {"Authorization": f"Bearer {self.token}"}
-        self._request_lock = threading.RLock()
+        self.headers = {
+            "Authorization": f"Bearer {self.token}",
+            "Accept-Encoding": accept_encoding(),
+        }
+        if not keep_alive:
+            self.headers["Connection"] = "close"
+        self._task_lock = threading.RLock()
+        self._dataset_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._task: Optional[TaskResponse] = None
+        self._dataset: Union[List[Annotation], DatasetStream, None] = None
+        self._columnar: Optional["ColumnarDataset"] = None
+        self._index: Optional["DatasetIndex"] = None
+        self._uploaded_metrics: Optional[List[dict]] = None
+        self.stream_dataset = stream_dataset
+        self.metrics_append_supported = True
+        self.session = session or new_session(pool_maxsize)
+        self.executor = executor
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.rate_limiter = RateLimiter(rate_limit, rate_burst) if rate_limit else None
+        self.stats = RequestStats()
+        self.compress = check_encoding(compress or os.getenv("SINGTOWN_AI_COMPRESS"))
+        self.compress_min_bytes = compress_min_bytes
+        self.download_chunk_size = download_chunk_size
+        snapshot_dir = snapshot_dir or os.getenv("SINGTOWN_AI_SNAPSHOT_DIR")
+        self.snapshots = SnapshotStore(snapshot_dir) if snapshot_dir else None
+        cache_dir = cache_dir or os.getenv("SINGTOWN_AI_CACHE_DIR")
+        self.image_cache = image_cache
+        if image_cache is None and cache_dir:
+            self.image_cache = ImageCache(
+                cache_dir, cache_max_bytes, download_chunk_size
+            )
 
         mock_task_path = mock_task_path or os.getenv("SINGTOWN_AI_MOCK_TASK_PATH")
         mock_dataset_path = mock_dataset_path or os.getenv(
             "SINGTOWN_AI_MOCK_DATASET_PATH"
         )
 
-        self.mocker = requests_mock.Mocker(real_http=not mock_task_path)
-        if mock_task_path:
+        if mock_server is None:
+            mock_server = os.getenv("SINGTOWN_AI_MOCK_SERVER", "") not in ("", "0")
+        self.mock_server = None
+        self.mocker = None
+        if mock_server:
+            from .testing import MockServer
+
+            self.mock_server = MockServer.from_env(
+                mock_task_path, mock_dataset_path, self.task_id
+            ).start()
+            self.host = self.mock_server.url
+        elif mock_task_path:
+            import requests_mock
+
+            self.mocker = requests_mock.Adapter()
+            self.session.mount(
+                f"{self.host}/api/v1/task/tasks/{self.task_id}", self.mocker
+            )
             self.__setup_mock(mock_task_path, mock_dataset_path)
-        self.task = self.__get_task()
-        self.dataset = self.__get_dataset()
+        self.log_batcher = None
+        if log_batch_size > 0:
+            self.log_batcher = LogBatcher(
+                self.__post_logs,
+                self.__post_log,
+                max_entries=log_batch_size,
+                max_bytes=log_batch_bytes,
+                interval=log_flush_interval,
+            )
+        self.prefetch_thread = None
+        if prefetch == "eager":
+            self.__prefetch()
+        elif prefetch == "background":
+            self.prefetch_thread = threading.Thread(
+                target=self.__prefetch_background, daemon=True
+            )
+            self.prefetch_thread.start()
+        elif prefetch != "lazy":
+            raise ValueError(f"unknown prefetch mode: {prefetch}")
 
-    def __setup_mock(self, mock_task_path, mock_dataset_path):
-        with open(str(mock_task_path), "r") as f:
-            mock_task_data = TaskResponse(**json.load(f))
+    def __prefetch(self):
+        return self.task, self.dataset
+
+    def __prefetch_background(self):
         try:
-            with open(str(mock_dataset_path), "r") as f:
-                mock_dataset_data = [Annotation(**item) for item in json.load(f)]
-        except FileNotFoundError:
-            mock_dataset_data = []
+            self.__prefetch()
+        except Exception:
+            pass
+
+    @property
+    def task(self) -> TaskResponse:
+        if self._task is None:
+            task = None
+            with self._task_lock:
+                if self._task is None:
+                    task = self._task = self.__get_task()
+            # seed outside _task_lock: __sync_metrics takes _metrics_lock first
+            if task is not None:
+                with self._metrics_lock:
+                    if self._uploaded_metrics is None:
+                        self._uploaded_metrics = [dict(r) for r in task.metrics]
+        return self._task
+
+    @task.setter
+    def task(self, task: TaskResponse):
+        with self._task_lock:
+            self._task = task
+
+    @property
+    def dataset(self) -> Union[List[Annotation], DatasetStream]:
+        if self._dataset is None:
+            with self._dataset_lock:
+                if self._dataset is None:
+                    if self.stream_dataset:
+                        self._dataset = DatasetStream(self)
+                    else:
+                        self._dataset = self.__get_dataset()
+        return self._dataset
+
+    @dataset.setter
+    def dataset(self, dataset: Union[List[Annotation], DatasetStream]):
+        with self._dataset_lock:
+            self._dataset = dataset
+            self._columnar = None
+            self._index = None
+
+    @property
+    def index(self) -> "DatasetIndex":
+        if self._index is None:
+            dataset = self.dataset
+            with self._dataset_lock:
+                if self._index is None:
+                    from .index import DatasetIndex
+
+                    self._index = DatasetIndex(dataset, self.task.project.labels)
+        return self._index
+
+    @property
+    def columnar(self) -> "ColumnarDataset":
+        if self._columnar is None:
+            with self._dataset_lock:
+                if self._columnar is None:
+                    from .columnar import ColumnarDataset
+
+                    dataset = self._dataset
+                    if not isinstance(dataset, list):
+                        dataset = self.iter_dataset()
+                    self._columnar = ColumnarDataset.from_annotations(
+                        dataset, self.task.project.labels
+                    )
+        return self._columnar
+
+    def __setup_mock(self, mock_task_path, mock_dataset_path):
+        import requests_mock
 
-        self.mocker.get(
+        mock_task_data, mock_dataset_data = load_mock_data(
+            mock_task_path, mock_dataset_path
+        )
+
+        self.mocker.register_uri(
+            "GET",
             f"{self.host}/api/v1/task/tasks/{self.task_id}",
             json=mock_task_data.model_dump(),
         )
-        self.mocker.get(
+        self.mocker.register_uri(
+            "GET",
             f"{self.host}/api/v1/task/tasks/{self.task_id}/dataset",
             json=[annotation.model_dump() for annotation in mock_dataset_data],
         )
-        self.mocker.post(f"{self.host}/api/v1/task/tasks/{self.task_id}")
-        self.mocker.post(f"{self.host}/api/v1/task/tasks/{self.task_id}/result")
-        self.mocker.post(f"{self.host}/api/v1/task/tasks/{self.task_id}/logs")
+        self.mocker.register_uri(
+            "POST", f"{self.host}/api/v1/task/tasks/{self.task_id}"
+        )
+        self.mocker.register_uri(
+            "POST", f"{self.host}/api/v1/task/tasks/{self.task_id}/metrics"
+        )
+        self.mocker.register_uri(
+            "POST", f"{self.host}/api/v1/task/tasks/{self.task_id}/result"
+        )
+        self.mocker.register_uri(
+            "POST",
+            f"{self.host}/api/v1/task/tasks/{self.task_id}/result/uploads",
+            json={"uploadId": "mock"},
+        )
+        self.mocker.register_uri(
+            requests_mock.ANY,
+            re.compile(
+                re.escape(f"{self.host}/api/v1/task/tasks/{self.task_id}/result/")
+                + "uploads/mock/.*"
+            ),
+        )
+        self.mocker.register_uri(
+            "POST", f"{self.host}/api/v1/task/tasks/{self.task_id}/logs"
+        )
+        self.mocker.register_uri(
+            "POST", f"{self.host}/api/v1/task/tasks/{self.task_id}/logs/batch"
+        )
 
-    def request(self, method, url, **kwargs):
-        import requests
+    def request(
+        self, method, url, headers=None, idempotent=None, retries=None, **kwargs
+    ):
+        from requests.exceptions import ConnectionError
 
-        with self._request_lock:
-            with self.mocker:
-                response = requests.request(method, url, **kwargs, headers=self.headers)
-                response.raise_for_status()
-                return response
+        headers = {**self.headers, **headers} if headers else self.headers
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        retries = self.retries if retries is None else retries
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                waited = self.rate_limiter.acquire(method, url)
+                if waited:
+                    self.stats.add("throttled")
+                    self.stats.add("throttle_seconds", waited)
+            self.stats.add("requests")
+            try:
+                response = self.session.request(method, url, **kwargs, headers=headers)
+            except ConnectionError as e:
+                if attempt >= retries or not (idempotent or request_not_sent(e)):
+                    raise
+                delay = None
+            else:
+                status = response.status_code
+                delay = None
+                if status in (429, 503):
+                    delay = retry_after(response.headers.get("Retry-After"))
+                retryable = idempotent or status == 429 or delay is not None
+                if status not in RETRY_STATUS or attempt >= retries or not retryable:
+                    response.raise_for_status()
+                    return response
+                response.close()
+            if delay is None:
+                delay = backoff_delay(attempt, self.backoff_factor, self.backoff_max)
+            attempt += 1
+            self.stats.add("retries")
+            time.sleep(min(delay, self.backoff_max))
 
     def get(self, url, params=None, **kwargs):
         return self.request("GET", url, params=params, **kwargs)
@@ -71,49 +410,181 @@ class SingTownAIClient:
     def post(self, url, data=None, json=None, **kwargs):
         return self.request("POST", url, data=data, json=json, **kwargs)
 
+    def post_json(self, url, payload, **kwargs):
+        data = json.dumps(payload, allow_nan=False).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        encoding = self.compress
+        if encoding and len(data) >= self.compress_min_bytes:
+            try:
+                return self.post(
+                    url,
+                    data=compress_body(data, encoding),
+                    headers={**headers, "Content-Encoding": encoding},
+                    **kwargs,
+                )
+            except HTTPError as e:
+                if e.response.status_code not in COMPRESS_UNSUPPORTED_STATUS:
+                    raise
+                self.compress = None
+        return self.post(url, data=data, headers=headers, **kwargs)
+
+    @contextlib.contextmanager
+    def __open_json(
+        self, url: str, chunk_size: int
+    ) -> Iterator[Tuple[Iterator[bytes], Optional[str]]]:
+        snapshots = self.snapshots
+        headers = snapshots.headers(url) if snapshots else None
+        with self.get(url, stream=True, headers=headers) as response:
+            if response.status_code == 304:
+                with snapshots.open(url) as f:
+                    chunks = iter(lambda: f.read(chunk_size), b"")
+                    yield chunks, snapshots.meta(url)["next"]
+                return
+
+            next_url = response.links.get("next", {}).get("url")
+            next_url = urljoin(response.url, next_url) if next_url else None
+            chunks = response.iter_content(chunk_size)
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if snapshots is None or not (etag or last_modified):
+                yield chunks, next_url
+                return
+            with snapshots.writer(url, etag, last_modified, next_url) as writer:
+                yield writer.tee(chunks), next_url
+
     def __get_task(self) -> TaskResponse:
-        response = self.get(f"{self.host}/api/v1/task/tasks/{self.task_id}")
-        return TaskResponse(**response.json())
+        url = f"{self.host}/api/v1/task/tasks/{self.task_id}"
+        with self.__open_json(url, 64 * 1024) as (chunks, _):
+            return parse_task(b"".join(chunks))
 
     def __post_task(self, json: dict):
-        new_task = self.task.model_dump()
-        new_task.update(json)
-        self.task = TaskResponse(**new_task)
-        self.post(f"{self.host}/api/v1/task/tasks/{self.task_id}", json=json)
+        with self._task_lock:
+            if self._task is not None:
+                new_task = self._task.model_dump()
+                new_task.update(json)
+                self._task = TaskResponse(**new_task)
+        self.post_json(
+            f"{self.host}/api/v1/task/tasks/{self.task_id}", json, idempotent=True
+        )
 
     def __get_dataset(self) -> List[Annotation]:
-        response = self.get(f"{self.host}/api/v1/task/tasks/{self.task_id}/dataset")
-        return [Annotation(**item) for item in response.json()]
+        dataset = []
+        url = f"{self.host}/api/v1/task/tasks/{self.task_id}/dataset"
+        while url:
+            with self.__open_json(url, 1024 * 1024) as (chunks, url):
+                dataset.extend(parse_annotations(b"".join(chunks)))
+        return dataset
 
-    def download_image(self, url: str, folder: Union[str, PathLike]) -> bytes:
-        import fsspec
+    def iter_dataset(self, chunk_size: int = 64 * 1024) -> Iterator[Annotation]:
+        url = f"{self.host}/api/v1/task/tasks/{self.task_id}/dataset"
+        while url:
+            with self.__open_json(url, chunk_size) as (chunks, url):
+                for item in iter_json_array(chunks):
+                    yield Annotation(**item)
+                for _ in chunks:
+                    pass
 
-        fs, path = fsspec.core.url_to_fs(url)
-        filename = os.path.basename(path)
-        filepath = Path(folder) / filename
+    def download_image(
+        self,
+        url: str,
+        folder: Union[str, PathLike],
+        filename: Optional[str] = None,
+        size: Optional[int] = None,
+        sha256: Optional[str] = None,
+    ) -> Path:
+        if self.image_cache is None:
+            return download_file(
+                url, folder, filename, self.download_chunk_size, size, sha256
+            )
+        filepath = Path(folder) / (filename or image_filename(url))
         if filepath.exists():
             return filepath
-        filepath.parent.mkdir(parents=True, exist_ok=True)
-        with fsspec.open(url, "rb") as f:
-            content = f.read()
-        with open(filepath, "wb") as f:
-            f.write(content)
-        return filepath
+        return self.image_cache.materialize(url, filepath, size, sha256)
+
+    def __post_log(self, log: LogEntry):
+        self.post_json(
+            f"{self.host}/api/v1/task/tasks/{self.task_id}/logs", log.model_dump()
+        )
+
+    def __post_logs(self, logs: List[LogEntry]):
+        self.post_json(
+            f"{self.host}/api/v1/task/tasks/{self.task_id}/logs/batch",
+            [log.model_dump() for log in logs],
+        )
 
     def log(self, content: str, end: str = "\n"):
         log = LogEntry(timestamp=time.time(), content=content + end)
-        response = self.post(
-            f"{self.host}/api/v1/task/tasks/{self.task_id}/logs", json=log.model_dump()
-        )
-        response.raise_for_status()
-        self.task.logs.append(log)
+        if self.log_batcher is None:
+            self.__post_log(log)
+        else:
+            self.log_batcher.add(log)
+        with self._task_lock:
+            if self._task is not None:
+                self._task.logs.append(log)
+
+    def flush_logs(self):
+        if self.log_batcher is not None:
+            self.log_batcher.flush()
+
+    def close(self):
+        if self.log_batcher is not None:
+            self.log_batcher.close()
+
+    def __sync_metrics(self, metrics: List[dict]):
+        with self._metrics_lock:
+            uploaded = self._uploaded_metrics
+            if metrics == uploaded:
+                return
+            count = len(uploaded or [])
+            if (
+                uploaded is not None
+                and self.metrics_append_supported
+                and len(metrics) > count
+                and metrics[:count] == uploaded
+            ):
+                rows = [dict(row) for row in metrics[count:]]
+                with self._task_lock:
+                    if self._task is not None:
+                        self._task.metrics = list(metrics)
+                try:
+                    self.post_json(
+                        f"{self.host}/api/v1/task/tasks/{self.task_id}/metrics", rows
+                    )
+                    uploaded.extend(rows)
+                    return
+                except HTTPError as e:
+                    if e.response.status_code not in BATCH_UNSUPPORTED_STATUS:
+                        raise
+                    self.metrics_append_supported = False
+            self.__post_task({"metrics": metrics})
+            self._uploaded_metrics = [dict(row) for row in metrics]
 
     def update_metrics(self, metrics: List[dict]):
-        self.__post_task({"metrics": metrics})
+        self.__sync_metrics(list(metrics))
 
-    def upload_results_zip(self, file_path: Union[str, PathLike]):
-        with open(file_path, "rb") as f:
-            self.post(
-                f"{self.host}/api/v1/task/tasks/{self.task_id}/result",
-                files={"file": f},
+    def append_metrics(self, rows: List[dict]):
+        self.task  # fetch before taking _task_lock, see task
+        with self._task_lock:
+            self._task.metrics.extend(rows)
+            metrics = list(self._task.metrics)
+        self.__sync_metrics(metrics)
+
+    def upload_results_zip(
+        self,
+        file_path: Union[str, PathLike],
+        chunk_size: Optional[int] = None,
+        max_workers: int = 4,
+        retries: int = 3,
+        progress: Optional[ProgressCallback] = None,
+    ):
+        url = f"{self.host}/api/v1/task/tasks/{self.task_id}/result"
+        if chunk_size:
+            upload = ChunkedUpload(
+                self, file_path, url, chunk_size, max_workers, retries, progress
             )
+            try:
+                return upload.run()
+            except ChunkedUploadUnsupported:
+                pass
+        with open(file_path, "rb") as f:
+            self.post(url, files={"file": f}, retries=0)
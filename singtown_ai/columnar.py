@@ -0,0 +1,195 @@
+from array import array
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Union,
+)
+
+from .type import Annotation, BoundingBox
+
+if TYPE_CHECKING:
+    import numpy as np
+
+SUBSETS = ("TRAIN", "VALID", "TEST")
+
+
+class ColumnarDataset:
+    def __init__(
+        self,
+        labels: Sequence[str],
+        url_data: bytes,
+        url_offsets: "np.ndarray",
+        subsets: "np.ndarray",
+        classes: "np.ndarray",
+        box_offsets: "np.ndarray",
+        boxes: "np.ndarray",
+        box_labels: "np.ndarray",
+    ):
+        self.labels = list(labels)
+        self.url_data = url_data
+        self.url_offsets = url_offsets
+        self.subsets = subsets
+        self.classes = classes
+        self.box_offsets = box_offsets
+        self.boxes = boxes
+        self.box_labels = box_labels
+
+    @classmethod
+    def from_annotations(
+        cls, annotations: Iterable[Annotation], labels: Sequence[str]
+    ) -> "ColumnarDataset":
+        import numpy as np
+
+        label_ids: Dict[str, int] = {label: i for i, label in enumerate(labels)}
+        subset_ids = {subset: i for i, subset in enumerate(SUBSETS)}
+
+        def label_id(label: str) -> int:
+            try:
+                return label_ids[label]
+            except KeyError:
+                raise ValueError(f"unknown label: {label!r}") from None
+
+        url_data = bytearray()
+        url_offsets = array("q", [0])
+        subsets = array("B")
+        classes = array("i")
+        box_offsets = array("q", [0])
+        boxes = array("f")
+        box_labels = array("i")
+        for annotation in annotations:
+            url_data += annotation.url.encode("utf-8")
+            url_offsets.append(len(url_data))
+            subsets.append(subset_ids[annotation.subset])
+            classes.append(
+                label_id(annotation.classification) if annotation.classification else -1
+            )
+            for box in annotation.object_detection:
+                boxes.extend((box.xmin, box.ymin, box.xmax, box.ymax))
+                box_labels.append(label_id(box.label))
+            box_offsets.append(len(box_labels))
+        return cls(
+            labels,
+            bytes(url_data),
+            np.frombuffer(url_offsets, dtype=np.int64),
+            np.frombuffer(subsets, dtype=np.uint8),
+            np.frombuffer(classes, dtype=np.int32),
+            np.frombuffer(box_offsets, dtype=np.int64),
+            np.frombuffer(boxes, dtype=np.float32).reshape(-1, 4),
+            np.frombuffer(box_labels, dtype=np.int32),
+        )
+
+    def __len__(self) -> int:
+        return len(self.subsets)
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[Annotation, "ColumnarDataset"]:
+        if isinstance(index, slice):
+            return self.__slice(index)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("dataset index out of range")
+        start, stop = self.box_offsets[index], self.box_offsets[index + 1]
+        class_id = int(self.classes[index])
+        return Annotation(
+            url=self.url(index),
+            subset=SUBSETS[self.subsets[index]],
+            classification=self.labels[class_id] if class_id >= 0 else "",
+            object_detection=[
+                BoundingBox(
+                    label=self.labels[label],
+                    xmin=xmin,
+                    ymin=ymin,
+                    xmax=xmax,
+                    ymax=ymax,
+                )
+                for (xmin, ymin, xmax, ymax), label in zip(
+                    self.boxes[start:stop].tolist(),
+                    self.box_labels[start:stop].tolist(),
+                )
+            ],
+        )
+
+    def __slice(self, index: slice) -> "ColumnarDataset":
+        start, stop, step = index.indices(len(self))
+        if step != 1:
+            raise ValueError("columnar slices must be contiguous")
+        stop = max(start, stop)
+        url_start, url_stop = self.url_offsets[start], self.url_offsets[stop]
+        box_start, box_stop = self.box_offsets[start], self.box_offsets[stop]
+        return ColumnarDataset(
+            self.labels,
+            self.url_data[url_start:url_stop],
+            self.url_offsets[start : stop + 1] - url_start,
+            self.subsets[start:stop],
+            self.classes[start:stop],
+            self.box_offsets[start : stop + 1] - box_start,
+            self.boxes[box_start:box_stop],
+            self.box_labels[box_start:box_stop],
+        )
+
+    def __iter__(self) -> Iterator[Annotation]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def url(self, index: int) -> str:
+        start, stop = self.url_offsets[index], self.url_offsets[index + 1]
+        return self.url_data[start:stop].decode("utf-8")
+
+    @property
+    def urls(self) -> List[str]:
+        return [self.url(index) for index in range(len(self))]
+
+    def subset_mask(self, subset: str) -> "np.ndarray":
+        return self.subsets == SUBSETS.index(subset)
+
+    @property
+    def box_counts(self) -> "np.ndarray":
+        import numpy as np
+
+        return np.diff(self.box_offsets)
+
+    @property
+    def box_images(self) -> "np.ndarray":
+        import numpy as np
+
+        return np.repeat(np.arange(len(self), dtype=np.int64), self.box_counts)
+
+    def image_boxes(self, index: int) -> "np.ndarray":
+        return self.boxes[self.box_offsets[index] : self.box_offsets[index + 1]]
+
+    def class_counts(self, subset: Optional[str] = None) -> "np.ndarray":
+        import numpy as np
+
+        classes = self.classes
+        if subset is not None:
+            classes = classes[self.subset_mask(subset)]
+        return np.bincount(classes[classes >= 0], minlength=len(self.labels))
+
+    def box_label_counts(self, subset: Optional[str] = None) -> "np.ndarray":
+        import numpy as np
+
+        box_labels = self.box_labels
+        if subset is not None:
+            box_labels = box_labels[self.subset_mask(subset)[self.box_images]]
+        return np.bincount(box_labels, minlength=len(self.labels))
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.url_data) + sum(
+            column.nbytes
+            for column in (
+                self.url_offsets,
+                self.subsets,
+                self.classes,
+                self.box_offsets,
+                self.boxes,
+                self.box_labels,
+            )
+        )
@@ -0,0 +1,46 @@
+import gzip
+from typing import Optional
+
+COMPRESS_ENCODINGS = ("gzip", "zstd")
+COMPRESS_UNSUPPORTED_STATUS = (415,)
+
+
+def accept_encoding() -> str:
+    from urllib3.util.request import ACCEPT_ENCODING
+
+    return ", ".join(ACCEPT_ENCODING.split(","))
+
+
+def check_encoding(encoding: Optional[str]) -> Optional[str]:
+    if not encoding:
+        return None
+    if encoding not in COMPRESS_ENCODINGS:
+        raise ValueError(f"unknown compression: {encoding}")
+    if encoding == "zstd":
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            raise ValueError("zstd compression requires the zstandard package")
+    return encoding
+
+
+def compress_body(data: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    if encoding == "zstd":
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    raise ValueError(f"unknown compression: {encoding}")
+
+
+def decompress_body(data: bytes, encoding: Optional[str]) -> bytes:
+    if not encoding or encoding == "identity":
+        return data
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    if encoding == "zstd":
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    raise ValueError(f"unknown compression: {encoding}")
@@ -0,0 +1,84 @@
+import hashlib
+import os
+import uuid
+from os import PathLike
+from pathlib import Path
+from typing import Optional, Union
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+def image_filename(url: str) -> str:
+    import fsspec
+
+    fs, path = fsspec.core.url_to_fs(url)
+    return os.path.basename(path)
+
+
+def temp_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.{uuid.uuid4().hex}.part")
+
+
+class DownloadVerifier:
+    def __init__(self, url: str, size: Optional[int], sha256: Optional[str]):
+        self.url = url
+        self.size = size
+        self.sha256 = sha256
+        self.received = 0
+        self.digest = hashlib.sha256()
+
+    def update(self, chunk: bytes):
+        self.received += len(chunk)
+        self.digest.update(chunk)
+
+    def verify(self):
+        if self.size is not None and self.received != self.size:
+            raise ValueError(
+                f"{self.url}: expected {self.size} bytes, got {self.received}"
+            )
+        if self.sha256 is not None and self.digest.hexdigest() != self.sha256.lower():
+            raise ValueError(
+                f"{self.url}: sha256 mismatch, expected {self.sha256}, "
+                f"got {self.digest.hexdigest()}"
+            )
+
+
+def stream_download(
+    url: str,
+    filepath: Union[str, PathLike],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    size: Optional[int] = None,
+    sha256: Optional[str] = None,
+) -> str:
+    import fsspec
+
+    filepath = Path(filepath)
+    tmp = temp_path(filepath)
+    verifier = DownloadVerifier(url, size, sha256)
+    try:
+        with fsspec.open(url, "rb") as src, open(tmp, "wb") as dst:
+            for chunk in iter(lambda: src.read(chunk_size), b""):
+                verifier.update(chunk)
+                dst.write(chunk)
+        verifier.verify()
+        os.replace(tmp, filepath)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return verifier.digest.hexdigest()
+
+
+def download_file(
+    url: str,
+    folder: Union[str, PathLike],
+    filename: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    size: Optional[int] = None,
+    sha256: Optional[str] = None,
+) -> Path:
+    filepath = Path(folder) / (filename or image_filename(url))
+    if filepath.exists():
+        return filepath
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    stream_download(url, filepath, chunk_size, size, sha256)
+    return filepath
@@ -1,59 +1,1052 @@
+import contextlib
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+from itertools import chain, islice, repeat
+from operator import attrgetter
 from pathlib import Path
 from os import PathLike
-import yaml
-from typing import Union
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+from .columnar import ColumnarDataset
+from .download import image_filename, temp_path
+from .image import image_size
+from .index import SUBSETS, annotation_labels
+from .manifest import ExportManifest, annotation_hash
+from .shards import (
+    ShardWriter,
+    TarShardWriter,
+    TFRecordShardWriter,
+    bytes_feature,
+    float_feature,
+    int64_feature,
+)
+from .type import Annotation
 
+Job = Tuple[str, Path, str, Annotation, Tuple[Path, ...]]
 
-def export_class_folder(client, folder: Union[str, PathLike]):
+DEFAULT_SHARD_MAX_BYTES = 256 * 1024 * 1024
+YOLO_BATCH_SIZE = 4096
+
+
+class ExportError(RuntimeError):
+    def __init__(self, errors: List[Tuple[str, BaseException]]):
+        self.errors = errors
+        details = "; ".join(f"{url}: {error!r}" for url, error in errors[:10])
+        super().__init__(f"{len(errors)} image(s) failed to download: {details}")
+
+
+class LabelError(ValueError):
+    def __init__(self, errors: List[Tuple[str, str]]):
+        self.errors = errors
+        details = "; ".join(f"{url}: {error}" for url, error in errors[:10])
+        super().__init__(f"{len(errors)} invalid box(es): {details}")
+
+
+class _ImageNames:
+    def __init__(self):
+        self.urls: Dict[Tuple[Path, str], str] = {}
+        self.names: Dict[Tuple[str, Path], str] = {}
+
+    def __call__(self, url: str, folder: Path) -> Tuple[str, bool]:
+        if (url, folder) in self.names:
+            return self.names[(url, folder)], False
+        name = image_filename(url)
+        if (folder, name) in self.urls:
+            stem, suffix = os.path.splitext(name)
+            digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:8]
+            name = f"{stem}_{digest}{suffix}"
+        self.urls[(folder, name)] = url
+        self.names[(url, folder)] = name
+        return name, True
+
+
+def _download_images(
+    client,
+    jobs: Iterable[tuple],
+    max_workers: int,
+    on_done: Optional[Callable[[tuple, Optional[BaseException]], None]] = None,
+) -> None:
+    errors = []
+    pending = {}
+
+    def collect(done):
+        for future in done:
+            job = pending.pop(future)
+            if future.exception() is not None:
+                errors.append((job[0], future.exception()))
+            if on_done is not None:
+                on_done(job, future.exception())
+
+    with contextlib.ExitStack() as stack:
+        executor = getattr(client, "executor", None)
+        if executor is None:
+            executor = stack.enter_context(ThreadPoolExecutor(max_workers=max_workers))
+        for job in jobs:
+            url, folder, filename = job[:3]
+            future = executor.submit(client.download_image, url, folder, filename)
+            pending[future] = job
+            if len(pending) >= max_workers * 4:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+        collect(wait(pending).done)
+
+    if errors:
+        errors.sort(key=lambda error: error[0])
+        raise ExportError(errors)
+
+
+def _export_images(
+    client,
+    jobs: Iterable[Job],
+    max_workers: int,
+    manifest: Optional[ExportManifest],
+    on_done: Optional[Callable[[Job, Optional[BaseException]], None]] = None,
+) -> None:
+    if manifest is None:
+        return _download_images(client, jobs, max_workers, on_done)
+
+    def record(job: Job, error: Optional[BaseException]):
+        if error is None:
+            url, folder, filename, _, files = job
+            image = folder / filename
+            manifest.record(manifest.key(image), url, [image, *files])
+        if on_done is not None:
+            on_done(job, error)
+
+    try:
+        _download_images(client, jobs, max_workers, record)
+    finally:
+        manifest.remove_stale()
+        manifest.commit()
+
+
+def _write_data_yaml(dataset_path: Path, labels: List[str]):
+    import yaml
+
+    dataset_path.mkdir(parents=True, exist_ok=True)
+
+    datayaml = {
+        "path": str(dataset_path.absolute()),
+        "train": "images/TRAIN",
+        "val": "images/VALID",
+        "test": "images/TEST",
+        "nc": len(labels),
+        "names": labels,
+    }
+    content = yaml.dump(datayaml, allow_unicode=True, sort_keys=False)
+    filepath = dataset_path / "data.yaml"
+    try:
+        if filepath.read_text(encoding="utf-8") == content:
+            return
+    except FileNotFoundError:
+        pass
+    filepath.write_text(content, encoding="utf-8")
+
+
+def _micro_units(values):
+    import numpy as np
+
+    # rint(values * 1e6) is off by at most ~1e-10, so it can only disagree
+    # with "%.6f" next to a half-way point; those values are formatted exactly.
+    scaled = values * 1_000_000
+    micro = np.rint(scaled).astype(np.int64)
+    near = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    micro.reshape(-1)[near] = [
+        int(("%.6f" % value).replace(".", ""))
+        for value in values.reshape(-1)[near].tolist()
+    ]
+    return micro
+
+
+def _format_yolo_rows(class_ids, values) -> Tuple[str, List[int]]:
+    import numpy as np
+
+    n = len(class_ids)
+    width = len(str(int(class_ids.max()))) if n else 1
+    chars = np.empty((n, width + 4 * 9 + 1), dtype=np.uint8)
+    ids = class_ids.copy()
+    for col in range(width - 1, -1, -1):
+        chars[:, col] = ord("0") + ids % 10
+        ids //= 10
+    micro = _micro_units(values)
+    for k in range(4):
+        base = width + k * 9
+        chars[:, base] = ord(" ")
+        chars[:, base + 1] = ord("0") + micro[:, k] // 1_000_000
+        chars[:, base + 2] = ord(".")
+        frac = micro[:, k] % 1_000_000
+        for col in range(base + 8, base + 2, -1):
+            chars[:, col] = ord("0") + frac % 10
+            frac //= 10
+    chars[:, -1] = ord("\n")
+
+    digits = np.ones(n, dtype=np.int64)
+    for power in range(1, width):
+        digits += class_ids >= 10**power
+    keep = np.ones(chars.shape, dtype=bool)
+    keep[:, :width] = np.arange(width) >= (width - digits)[:, None]
+    row_offsets = np.concatenate([[0], np.cumsum(chars.shape[1] - width + digits)])
+    return chars[keep].tobytes().decode("ascii"), row_offsets.tolist()
+
+
+def _box_arrays(
+    annotations: Union[Sequence[Annotation], ColumnarDataset], label_ids: Dict[str, int]
+):
+    import numpy as np
+
+    if isinstance(annotations, ColumnarDataset):
+        remap = np.array(
+            [label_ids.get(label, -1) for label in annotations.labels], dtype=np.int64
+        )
+        return (
+            annotations.box_offsets,
+            remap[annotations.box_labels],
+            annotations.boxes.astype(np.float64),
+        )
+    boxes = [box for annotation in annotations for box in annotation.object_detection]
+    coords = np.fromiter(
+        chain.from_iterable(map(attrgetter("xmin", "ymin", "xmax", "ymax"), boxes)),
+        dtype=np.float64,
+        count=len(boxes) * 4,
+    ).reshape(-1, 4)
+    class_ids = np.fromiter(
+        map(label_ids.get, map(attrgetter("label"), boxes), repeat(-1)),
+        dtype=np.int64,
+        count=len(boxes),
+    )
+    offsets = np.cumsum(
+        [0] + [len(annotation.object_detection) for annotation in annotations]
+    )
+    return offsets, class_ids, coords
+
+
+def _validated_boxes(
+    annotations: Union[Sequence[Annotation], ColumnarDataset], label_ids: Dict[str, int]
+):
+    import numpy as np
+
+    offsets, class_ids, coords = _box_arrays(annotations, label_ids)
+    values = np.empty_like(coords)
+    values[:, 0] = (coords[:, 0] + coords[:, 2]) / 2
+    values[:, 1] = (coords[:, 1] + coords[:, 3]) / 2
+    values[:, 2] = coords[:, 2] - coords[:, 0]
+    values[:, 3] = coords[:, 3] - coords[:, 1]
+
+    invalid = (class_ids < 0) | ~((values >= 0) & (values <= 1)).all(axis=1)
+    if invalid.any():
+        errors = []
+        for i in np.flatnonzero(invalid).tolist():
+            image = int(np.searchsorted(offsets, i, side="right")) - 1
+            annotation = annotations[image]
+            cx, cy, w, h = values[i].tolist()
+            if class_ids[i] < 0:
+                box = annotation.object_detection[i - int(offsets[image])]
+                errors.append((annotation.url, f"{box.label!r} is not in labels"))
+            else:
+                errors.append(
+                    (
+                        annotation.url,
+                        "(cx, cy, w, h) must be between 0 and 1! "
+                        f"cx: {cx}, cy: {cy}, w: {w}, h: {h}",
+                    )
+                )
+        raise LabelError(errors)
+    return offsets.tolist(), class_ids, coords, values
+
+
+def _yolo_labels(
+    annotations: Union[Sequence[Annotation], ColumnarDataset], label_ids: Dict[str, int]
+) -> List[str]:
+    offsets, class_ids, _, values = _validated_boxes(annotations, label_ids)
+    text, row_offsets = _format_yolo_rows(class_ids, values)
+    return [
+        text[row_offsets[start] : row_offsets[stop]]
+        for start, stop in zip(offsets[:-1], offsets[1:])
+    ]
+
+
+def _write_text_files(files: Dict[Path, str]):
+    for folder in {path.parent for path in files}:
+        folder.mkdir(parents=True, exist_ok=True)
+    for path, content in files.items():
+        with open(path, "w") as f:
+            f.write(content)
+
+
+def _dataset(client, dataset: Optional[Iterable[Annotation]]) -> Iterable[Annotation]:
+    return client.dataset if dataset is None else dataset
+
+
+def _annotations(
+    client, dataset: Optional[Iterable[Annotation]]
+) -> Union[List[Annotation], ColumnarDataset]:
+    dataset = _dataset(client, dataset)
+    return dataset if isinstance(dataset, ColumnarDataset) else list(dataset)
+
+
+def _batched(
+    dataset: Union[Iterable[Annotation], ColumnarDataset], size: int
+) -> Iterator[Union[List[Annotation], ColumnarDataset]]:
+    if isinstance(dataset, ColumnarDataset):
+        for start in range(0, len(dataset), size):
+            yield dataset[start : start + size]
+        return
+    iterator = iter(dataset)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
+
+
+def _manifest(folder: Union[str, PathLike], manifest: bool) -> Optional[ExportManifest]:
+    return ExportManifest(folder) if manifest else None
+
+
+def _current(
+    manifest: Optional[ExportManifest], image: Path, annotation: Annotation, *extra
+) -> bool:
+    if manifest is None:
+        return False
+    key = manifest.key(image)
+    if manifest.check(key, annotation_hash(annotation, *extra)):
+        return True
+    # download_image keeps an existing file, so drop one fetched from another url
+    url = manifest.url(key)
+    if url is not None and url != annotation.url:
+        image.unlink(missing_ok=True)
+    return False
+
+
+def _class_folder_jobs(
+    client,
+    folder: Union[str, PathLike],
+    dataset: Optional[Iterable[Annotation]],
+    manifest: Optional[ExportManifest] = None,
+):
+    names = _ImageNames()
+    for annotation in _dataset(client, dataset):
+        image_folder = Path(folder) / annotation.subset / annotation.classification
+        filename, new = names(annotation.url, image_folder)
+        if _current(manifest, image_folder / filename, annotation):
+            continue
+        if new:
+            yield annotation.url, image_folder, filename, annotation, ()
+    if manifest is not None:
+        manifest.scanned = True
+
+
+def _yolo_jobs(
+    client,
+    dataset_path: Path,
+    dataset: Optional[Iterable[Annotation]],
+    manifest: Optional[ExportManifest] = None,
+):
+    names = _ImageNames()
+    labels = client.task.project.labels
+    label_ids = {label: i for i, label in enumerate(labels)}
+    errors: List[Tuple[str, str]] = []
+    dataset = _dataset(client, dataset)
+    if isinstance(dataset, (Sequence, ColumnarDataset)):
+        # Already in memory: validate every box before any file is written.
+        batches = [dataset]
+    else:
+        # A DatasetStream is validated, formatted and written one batch at a
+        # time so it is never held in memory. After an invalid batch no more
+        # files are written, but the rest is still checked so that the
+        # LabelError lists every invalid box.
+        batches = _batched(dataset, YOLO_BATCH_SIZE)
+    for batch in batches:
+        try:
+            if errors:
+                _validated_boxes(batch, label_ids)
+                continue
+            contents = _yolo_labels(batch, label_ids)
+        except LabelError as e:
+            errors.extend(e.errors)
+            continue
+
+        label_files: Dict[Path, str] = {}
+        jobs: List[Job] = []
+        for annotation, content in zip(batch, contents):
+            images_subset_path = dataset_path / "images" / annotation.subset
+            filename, new = names(annotation.url, images_subset_path)
+            if _current(manifest, images_subset_path / filename, annotation, labels):
+                continue
+            label = (
+                dataset_path
+                / "labels"
+                / annotation.subset
+                / (Path(filename).stem + ".txt")
+            )
+            label_files[label] = content
+            if new:
+                jobs.append(
+                    (annotation.url, images_subset_path, filename, annotation, (label,))
+                )
+
+        _write_text_files(label_files)
+        for folder in {job[1] for job in jobs}:
+            folder.mkdir(parents=True, exist_ok=True)
+        yield from jobs
+    if errors:
+        raise LabelError(errors)
+    if manifest is not None:
+        manifest.scanned = True
+
+
+def export_class_folder(
+    client,
+    folder: Union[str, PathLike],
+    max_workers: int = 8,
+    dataset: Optional[Iterable[Annotation]] = None,
+    manifest: bool = True,
+):
     if client.task.project.type != "CLASSIFICATION":
         raise RuntimeError("export_class_folder only support CLASSIFICATION task")
 
-    for annotation in client.dataset:
-        image_folder = Path(folder) / annotation.subset / annotation.classification
-        client.download_image(annotation.url, image_folder)
+    export_manifest = _manifest(folder, manifest)
+    jobs = _class_folder_jobs(client, folder, dataset, export_manifest)
+    _export_images(client, jobs, max_workers, export_manifest)
 
 
-def export_yolo(client, folder: Union[str, PathLike]):
+def export_yolo(
+    client,
+    folder: Union[str, PathLike],
+    max_workers: int = 8,
+    dataset: Optional[Iterable[Annotation]] = None,
+    manifest: bool = True,
+):
     if client.task.project.type != "OBJECT_DETECTION":
         raise RuntimeError("export_yolo only support OBJECT_DETECTION task")
 
     dataset_path = Path(folder)
-    dataset_path.mkdir(parents=True, exist_ok=True)
+    _write_data_yaml(dataset_path, client.task.project.labels)
+
+    export_manifest = _manifest(dataset_path, manifest)
+    jobs = _yolo_jobs(client, dataset_path, dataset, export_manifest)
+    _export_images(client, jobs, max_workers, export_manifest)
+
+
+class _InOrder:
+    def __init__(self, emit: Callable[..., None]):
+        self.emit = emit
+        self.position = 0
+        self.pending: Dict[int, Optional[tuple]] = {}
+
+    def add(self, position: int, entry: Optional[tuple]):
+        # Downloads finish out of order; entries are buffered until all the
+        # earlier ones are in, so the output follows the dataset. None marks
+        # a failed position that is skipped.
+        self.pending[position] = entry
+        while self.position in self.pending:
+            position = self.position
+            self.position += 1
+            entry = self.pending.pop(position)
+            if entry is not None:
+                self.emit(position, *entry)
+
+
+class _CocoWriter:
+    def __init__(self, path: Path, categories: List[dict]):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.tmp = temp_path(path)
+        self.categories = categories
+        self.file = open(self.tmp, "w", encoding="utf-8")
+        self.annotations = tempfile.TemporaryFile("w+", encoding="utf-8")
+        self.images = 0
+        self.boxes = 0
+        self.order = _InOrder(self.__write)
+        self.file.write('{"images": [')
+
+    def add(self, position: int, image: Optional[dict], boxes: Sequence[dict] = ()):
+        self.order.add(position, None if image is None else (image, boxes))
+
+    def __write(self, position: int, image: dict, boxes: Sequence[dict]):
+        image_id = position + 1
+        image["id"] = image_id
+        self.file.write(("," if self.images else "") + json.dumps(image))
+        self.images += 1
+        for box in boxes:
+            self.boxes += 1
+            box["id"] = self.boxes
+            box["image_id"] = image_id
+            self.annotations.write(("," if self.boxes > 1 else "") + json.dumps(box))
+
+    def close(self):
+        try:
+            self.file.write('], "annotations": [')
+            self.annotations.seek(0)
+            shutil.copyfileobj(self.annotations, self.file)
+            self.file.write('], "categories": ' + json.dumps(self.categories) + "}")
+        finally:
+            self.annotations.close()
+            self.file.close()
+        os.replace(self.tmp, self.path)
+
+    def abort(self):
+        self.annotations.close()
+        self.file.close()
+        self.tmp.unlink(missing_ok=True)
+
+
+def export_coco(
+    client,
+    folder: Union[str, PathLike],
+    max_workers: int = 8,
+    dataset: Optional[Iterable[Annotation]] = None,
+):
+    import numpy as np
+
+    if client.task.project.type != "OBJECT_DETECTION":
+        raise RuntimeError("export_coco only support OBJECT_DETECTION task")
 
-    with open(dataset_path / "data.yaml", "w", encoding="utf-8") as f:
-        datayaml = {
-            "path": str(dataset_path.absolute()),
-            "train": "images/TRAIN",
-            "val": "images/VALID",
-            "test": "images/TEST",
-            "nc": len(client.task.project.labels),
-            "names": client.task.project.labels,
-        }
-        yaml.dump(datayaml, f, allow_unicode=True, sort_keys=False)
-
-    for annotation in client.dataset:
+    dataset_path = Path(folder)
+    labels = client.task.project.labels
+    annotations = _annotations(client, dataset)
+    label_ids = {label: i for i, label in enumerate(labels)}
+    offsets, class_ids, coords, values = _validated_boxes(annotations, label_ids)
+    xywh = np.column_stack([coords[:, :2], values[:, 2:]]).tolist()
+    class_ids = class_ids.tolist()
+
+    names = _ImageNames()
+    images: Dict[Tuple[Path, str], List[int]] = {}
+    positions: Dict[Tuple[Path, str], int] = {}
+    counts = {subset: 0 for subset in SUBSETS}
+    jobs: List[Job] = []
+    for i, annotation in enumerate(annotations):
         images_subset_path = dataset_path / "images" / annotation.subset
+        filename, new = names(annotation.url, images_subset_path)
+        images.setdefault((images_subset_path, filename), []).append(i)
+        if new:
+            positions[(images_subset_path, filename)] = counts[annotation.subset]
+            counts[annotation.subset] += 1
+            jobs.append((annotation.url, images_subset_path, filename, annotation, ()))
+    for images_subset_path in {job[1] for job in jobs}:
         images_subset_path.mkdir(parents=True, exist_ok=True)
-        image_path = client.download_image(annotation.url, images_subset_path)
-
-        labels_subset_path = dataset_path / "labels" / annotation.subset
-        labels_subset_path.mkdir(parents=True, exist_ok=True)
-
-        label_filename = labels_subset_path / (image_path.stem + ".txt")
-        with open(label_filename, "w") as f:
-            for box in annotation.object_detection:
-                cx = (box.xmin + box.xmax) / 2
-                cy = (box.ymin + box.ymax) / 2
-                w = box.xmax - box.xmin
-                h = box.ymax - box.ymin
-                if not (
-                    (0 <= cx <= 1)
-                    and (0 <= cy <= 1)
-                    and (0 <= w <= 1)
-                    and (0 <= h <= 1)
-                ):
-                    raise ValueError(
-                        f"(cx, cy, w, h) must be between 0 and 1! cx: {cx}, cy: {cy}, w: {w}, h: {h}"
-                    )
-                class_id = client.task.project.labels.index(box.label)
-                f.write(f"{class_id} {cx:.6f} {cy:.6f} {w:.6f} {h:.6f}\n")
+
+    categories = [
+        {"id": i + 1, "name": label, "supercategory": "none"}
+        for i, label in enumerate(labels)
+    ]
+    writers: Dict[str, _CocoWriter] = {}
+    errors: List[Tuple[str, BaseException]] = []
+
+    def on_done(job: Job, error: Optional[BaseException]):
+        url, images_subset_path, filename, annotation, _ = job
+        key = (images_subset_path, filename)
+        writer = writers[annotation.subset]
+        if error is not None:
+            return writer.add(positions[key], None)
+        try:
+            width, height = image_size(images_subset_path / filename)
+        except ValueError as e:
+            errors.append((url, e))
+            return writer.add(positions[key], None)
+        boxes = []
+        for i in images[key]:
+            for j in range(offsets[i], offsets[i + 1]):
+                x, y, w, h = xywh[j]
+                x, y, w, h = x * width, y * height, w * width, h * height
+                boxes.append(
+                    {
+                        "category_id": class_ids[j] + 1,
+                        "bbox": [round(x, 2), round(y, 2), round(w, 2), round(h, 2)],
+                        "area": round(w * h, 2),
+                        "iscrowd": 0,
+                    }
+                )
+        image = {"file_name": filename, "width": width, "height": height}
+        writer.add(positions[key], image, boxes)
+
+    try:
+        for subset in SUBSETS:
+            if counts[subset]:
+                path = dataset_path / "annotations" / f"{subset}.json"
+                writers[subset] = _CocoWriter(path, categories)
+        try:
+            _download_images(client, jobs, max_workers, on_done)
+        except ExportError as e:
+            errors.extend(e.errors)
+        if errors:
+            errors.sort(key=lambda error: error[0])
+            raise ExportError(errors)
+    except BaseException:
+        for writer in writers.values():
+            writer.abort()
+        raise
+    for writer in writers.values():
+        writer.close()
+
+
+def _classification_ids(
+    annotations: Union[Sequence[Annotation], ColumnarDataset], label_ids: Dict[str, int]
+) -> List[int]:
+    if isinstance(annotations, ColumnarDataset):
+        import numpy as np
+
+        remap = np.array(
+            [label_ids.get(label, -1) for label in annotations.labels] + [-1],
+            dtype=np.int64,
+        )
+        class_ids = remap[annotations.classes]
+        errors = [
+            (annotation.url, f"{annotation.classification!r} is not in labels")
+            for annotation in map(
+                annotations.__getitem__, np.flatnonzero(class_ids < 0)
+            )
+        ]
+        if errors:
+            raise LabelError(errors)
+        return class_ids.tolist()
+    errors = [
+        (annotation.url, f"{annotation.classification!r} is not in labels")
+        for annotation in annotations
+        if annotation.classification not in label_ids
+    ]
+    if errors:
+        raise LabelError(errors)
+    return [label_ids[annotation.classification] for annotation in annotations]
+
+
+def _image_format(filename: str) -> str:
+    return os.path.splitext(filename)[1][1:].lower() or "jpg"
+
+
+def _webdataset_sample(
+    annotation: Annotation, image: bytes, image_format: str, class_id: int, boxes
+) -> dict:
+    sample = {
+        image_format: image,
+        "json": annotation.model_dump_json(by_alias=True).encode("utf-8"),
+    }
+    if class_id >= 0:
+        sample["cls"] = str(class_id).encode("ascii")
+    return sample
+
+
+def _tfrecord_sample(
+    annotation: Annotation, image: bytes, image_format: str, class_id: int, boxes
+) -> dict:
+    sample = {
+        "image/encoded": bytes_feature([image]),
+        "image/format": bytes_feature([image_format]),
+        "image/filename": bytes_feature([image_filename(annotation.url)]),
+        "image/source_id": bytes_feature([annotation.url]),
+    }
+    try:
+        width, height = image_size(io.BytesIO(image))
+    except ValueError:
+        pass
+    else:
+        sample["image/width"] = int64_feature([width])
+        sample["image/height"] = int64_feature([height])
+    if class_id >= 0:
+        sample["image/class/label"] = int64_feature([class_id])
+        sample["image/class/text"] = bytes_feature([annotation.classification])
+    else:
+        class_ids, coords = boxes
+        sample["image/object/bbox/xmin"] = float_feature(coords[:, 0].tolist())
+        sample["image/object/bbox/ymin"] = float_feature(coords[:, 1].tolist())
+        sample["image/object/bbox/xmax"] = float_feature(coords[:, 2].tolist())
+        sample["image/object/bbox/ymax"] = float_feature(coords[:, 3].tolist())
+        sample["image/object/class/label"] = int64_feature((class_ids + 1).tolist())
+        sample["image/object/class/text"] = bytes_feature(
+            [box.label for box in annotation.object_detection]
+        )
+    return sample
+
+
+def _stream_images(
+    client,
+    annotations: Sequence[Annotation],
+    folder: Path,
+    max_workers: int,
+    on_image: Callable[[List[int], str, bytes], None],
+):
+    images: Dict[str, List[int]] = {}
+    positions: Dict[str, int] = {}
+    jobs: List[Job] = []
+    folder.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=folder, prefix=".download-") as tmp:
+        for i, annotation in enumerate(annotations):
+            if annotation.url not in images:
+                images[annotation.url] = []
+                positions[annotation.url] = len(jobs)
+                image_format = _image_format(image_filename(annotation.url))
+                filename = f"{len(jobs)}.{image_format}"
+                jobs.append((annotation.url, Path(tmp), filename, annotation, ()))
+            images[annotation.url].append(i)
+
+        # Downloaded files wait on disk until every earlier image is in, so
+        # on_image sees the images in dataset order.
+        def emit(position: int, url: str, image_path: Path):
+            image = image_path.read_bytes()
+            image_path.unlink()
+            on_image(images[url], _image_format(image_path.name), image)
+
+        order = _InOrder(emit)
+
+        def on_done(job: Job, error: Optional[BaseException]):
+            url, image_folder, filename, _, _ = job
+            entry = None if error is not None else (url, image_folder / filename)
+            order.add(positions[url], entry)
+
+        _download_images(client, jobs, max_workers, on_done)
+
+
+def _export_shards(
+    client,
+    folder: Union[str, PathLike],
+    max_workers: int,
+    dataset: Optional[Iterable[Annotation]],
+    writer_class: Type[ShardWriter],
+    make_sample: Callable[..., dict],
+    shard_max_bytes: int,
+    shard_max_count: Optional[int],
+) -> Dict[str, List[Path]]:
+    project = client.task.project
+    label_ids = {label: i for i, label in enumerate(project.labels)}
+    annotations = _annotations(client, dataset)
+    if project.type == "CLASSIFICATION":
+        class_ids = _classification_ids(annotations, label_ids)
+    else:
+        class_ids = [-1] * len(annotations)
+        offsets, box_ids, coords, _ = _validated_boxes(annotations, label_ids)
+
+    shards_path = Path(folder)
+    writers = {
+        subset: writer_class(shards_path, subset, shard_max_bytes, shard_max_count)
+        for subset in SUBSETS
+    }
+    counts = {subset: 0 for subset in SUBSETS}
+    keys = []
+    for annotation in annotations:
+        keys.append(f"{counts[annotation.subset]:09d}")
+        counts[annotation.subset] += 1
+
+    def on_image(indices: List[int], image_format: str, image: bytes):
+        for i in indices:
+            annotation = annotations[i]
+            boxes = None
+            if class_ids[i] < 0:
+                boxes = (
+                    box_ids[offsets[i] : offsets[i + 1]],
+                    coords[offsets[i] : offsets[i + 1]],
+                )
+            sample = make_sample(annotation, image, image_format, class_ids[i], boxes)
+            size = sum(len(value) for value in sample.values())
+            writers[annotation.subset].write(keys[i], sample, size)
+
+    try:
+        _stream_images(client, annotations, shards_path, max_workers, on_image)
+    except BaseException:
+        for writer in writers.values():
+            writer.abort()
+        raise
+    for writer in writers.values():
+        writer.close()
+    return {subset: writer.paths for subset, writer in writers.items()}
+
+
+def export_webdataset(
+    client,
+    folder: Union[str, PathLike],
+    max_workers: int = 8,
+    dataset: Optional[Iterable[Annotation]] = None,
+    shard_max_bytes: int = DEFAULT_SHARD_MAX_BYTES,
+    shard_max_count: Optional[int] = None,
+) -> Dict[str, List[Path]]:
+    return _export_shards(
+        client,
+        folder,
+        max_workers,
+        dataset,
+        TarShardWriter,
+        _webdataset_sample,
+        shard_max_bytes,
+        shard_max_count,
+    )
+
+
+def export_tfrecord(
+    client,
+    folder: Union[str, PathLike],
+    max_workers: int = 8,
+    dataset: Optional[Iterable[Annotation]] = None,
+    shard_max_bytes: int = DEFAULT_SHARD_MAX_BYTES,
+    shard_max_count: Optional[int] = None,
+) -> Dict[str, List[Path]]:
+    return _export_shards(
+        client,
+        folder,
+        max_workers,
+        dataset,
+        TFRecordShardWriter,
+        _tfrecord_sample,
+        shard_max_bytes,
+        shard_max_count,
+    )
+
+
+def export_packed(
+    client,
+    folder: Union[str, PathLike],
+    max_workers: int = 8,
+    dataset: Optional[Iterable[Annotation]] = None,
+):
+    from .packed import PackedWriter
+
+    project = client.task.project
+    label_ids = {label: i for i, label in enumerate(project.labels)}
+    annotations = _annotations(client, dataset)
+    if project.type == "CLASSIFICATION":
+        class_ids = _classification_ids(annotations, label_ids)
+    else:
+        class_ids = [-1] * len(annotations)
+        offsets, box_ids, coords, _ = _validated_boxes(annotations, label_ids)
+
+    writer = PackedWriter(folder, project.labels, project.type)
+    spans: Dict[int, Tuple[int, int]] = {}
+
+    def on_image(indices: List[int], image_format: str, image: bytes):
+        span = writer.append(image)
+        for i in indices:
+            spans[i] = span
+
+    try:
+        _stream_images(client, annotations, Path(folder), max_workers, on_image)
+        # An image shared by several annotations arrives once, so rows are
+        # added afterwards to keep index.npy in dataset order.
+        for i in sorted(spans):
+            offset, length = spans[i]
+            if class_ids[i] < 0:
+                writer.add(
+                    offset,
+                    length,
+                    annotations[i].subset,
+                    boxes=coords[offsets[i] : offsets[i + 1]],
+                    box_labels=box_ids[offsets[i] : offsets[i + 1]],
+                )
+            else:
+                writer.add(offset, length, annotations[i].subset, class_ids[i])
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+
+
+class ExportHandle:
+    def __init__(self, path: Path, labels: Sequence[str]):
+        self.path = path
+        self.subsets: Dict[str, Future] = {subset: Future() for subset in SUBSETS}
+        self.classes: Dict[str, Future] = {label: Future() for label in labels}
+        self.future: Future = Future()
+        self.total = 0
+        self.completed = 0
+        self.failed = 0
+        self.subset_total = {subset: 0 for subset in SUBSETS}
+        self.subset_completed = {subset: 0 for subset in SUBSETS}
+        self.lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+        self.__remaining: Dict[Future, int] = {}
+        self.__errors: Dict[Future, List[Tuple[str, BaseException]]] = {}
+
+    def __job_futures(self, annotation: Annotation) -> List[Future]:
+        futures = [self.subsets[annotation.subset]]
+        for label in annotation_labels(annotation):
+            if label in self.classes:
+                futures.append(self.classes[label])
+        return futures
+
+    def __resolve(self, future: Future):
+        errors = self.__errors.get(future)
+        if errors:
+            errors.sort(key=lambda error: error[0])
+            future.set_exception(ExportError(errors))
+        else:
+            future.set_result(self.path)
+
+    def __on_done(self, job: Job, error: Optional[BaseException]):
+        url, _, _, annotation, _ = job
+        resolved = []
+        with self.lock:
+            self.completed += 1
+            self.subset_completed[annotation.subset] += 1
+            if error is not None:
+                self.failed += 1
+            for future in self.__job_futures(annotation):
+                if error is not None:
+                    self.__errors.setdefault(future, []).append((url, error))
+                self.__remaining[future] -= 1
+                if self.__remaining[future] == 0:
+                    resolved.append(future)
+        for future in resolved:
+            self.__resolve(future)
+
+    def start(
+        self,
+        client,
+        jobs: Iterable[Job],
+        max_workers: int,
+        manifest: Optional[ExportManifest] = None,
+    ) -> "ExportHandle":
+        self.thread = threading.Thread(
+            target=self.__run, args=(client, jobs, max_workers, manifest), daemon=True
+        )
+        self.thread.start()
+        return self
+
+    def __run(
+        self,
+        client,
+        jobs: Iterable[Job],
+        max_workers: int,
+        manifest: Optional[ExportManifest],
+    ):
+        futures = [*self.subsets.values(), *self.classes.values()]
+        try:
+            jobs = sorted(jobs, key=lambda job: SUBSETS.index(job[3].subset))
+            with self.lock:
+                self.__remaining = {future: 0 for future in futures}
+                for _, _, _, annotation, _ in jobs:
+                    self.total += 1
+                    self.subset_total[annotation.subset] += 1
+                    for future in self.__job_futures(annotation):
+                        self.__remaining[future] += 1
+            for future in futures:
+                if self.__remaining[future] == 0:
+                    self.__resolve(future)
+            _export_images(client, jobs, max_workers, manifest, self.__on_done)
+        except BaseException as e:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            self.future.set_exception(e)
+        else:
+            self.future.set_result(self.path)
+
+    def progress(self) -> dict:
+        with self.lock:
+            return {
+                "total": self.total,
+                "completed": self.completed,
+                "failed": self.failed,
+                "subsets": {
+                    subset: (self.subset_completed[subset], self.subset_total[subset])
+                    for subset in SUBSETS
+                },
+            }
+
+    def wait(
+        self,
+        subsets: Iterable[str] = ("TRAIN", "VALID"),
+        timeout: Optional[float] = None,
+    ) -> Path:
+        futures = [self.subsets[subset] for subset in subsets]
+        wait(futures, timeout)
+        for future in futures:
+            future.result(0)
+        return self.path
+
+    def result(self, timeout: Optional[float] = None) -> Path:
+        return self.future.result(timeout)
+
+    def done(self) -> bool:
+        return self.future.done()
+
+
+def start_export_class_folder(
+    client,
+    folder: Union[str, PathLike],
+    max_workers: int = 8,
+    dataset: Optional[Iterable[Annotation]] = None,
+    manifest: bool = True,
+) -> ExportHandle:
+    if client.task.project.type != "CLASSIFICATION":
+        raise RuntimeError("export_class_folder only support CLASSIFICATION task")
+
+    handle = ExportHandle(Path(folder), client.task.project.labels)
+    export_manifest = _manifest(folder, manifest)
+    jobs = _class_folder_jobs(client, folder, dataset, export_manifest)
+    return handle.start(client, jobs, max_workers, export_manifest)
+
+
+def start_export_yolo(
+    client,
+    folder: Union[str, PathLike],
+    max_workers: int = 8,
+    dataset: Optional[Iterable[Annotation]] = None,
+    manifest: bool = True,
+) -> ExportHandle:
+    if client.task.project.type != "OBJECT_DETECTION":
+        raise RuntimeError("export_yolo only support OBJECT_DETECTION task")
+
+    dataset_path = Path(folder)
+    _write_data_yaml(dataset_path, client.task.project.labels)
+
+    handle = ExportHandle(dataset_path, client.task.project.labels)
+    export_manifest = _manifest(dataset_path, manifest)
+    jobs = _yolo_jobs(client, dataset_path, dataset, export_manifest)
+    return handle.start(client, jobs, max_workers, export_manifest)
+
+
+async def _async_download_images(client, jobs: Iterable[tuple]) -> None:
+    import asyncio
+
+    urls = []
+    downloads = []
+    for url, folder, filename, *_ in jobs:
+        urls.append(url)
+        downloads.append(client.download_image(url, folder, filename))
+
+    results = await asyncio.gather(*downloads, return_exceptions=True)
+    errors = [
+        (url, result)
+        for url, result in zip(urls, results)
+        if isinstance(result, BaseException)
+    ]
+    if errors:
+        errors.sort(key=lambda error: error[0])
+        raise ExportError(errors)
+
+
+async def async_export_class_folder(
+    client,
+    folder: Union[str, PathLike],
+    dataset: Optional[Iterable[Annotation]] = None,
+):
+    if client.task.project.type != "CLASSIFICATION":
+        raise RuntimeError("export_class_folder only support CLASSIFICATION task")
+
+    await _async_download_images(client, _class_folder_jobs(client, folder, dataset))
+
+
+async def async_export_yolo(
+    client,
+    folder: Union[str, PathLike],
+    dataset: Optional[Iterable[Annotation]] = None,
+):
+    if client.task.project.type != "OBJECT_DETECTION":
+        raise RuntimeError("export_yolo only support OBJECT_DETECTION task")
+
+    dataset_path = Path(folder)
+    _write_data_yaml(dataset_path, client.task.project.labels)
+
+    await _async_download_images(client, _yolo_jobs(client, dataset_path, dataset))
@@ -0,0 +1,89 @@
+import struct
+from os import PathLike
+from typing import BinaryIO, Tuple, Union
+
+_JPEG_SOF_MARKERS = {
+    0xC0,
+    0xC1,
+    0xC2,
+    0xC3,
+    0xC5,
+    0xC6,
+    0xC7,
+    0xC9,
+    0xCA,
+    0xCB,
+    0xCD,
+    0xCE,
+    0xCF,
+}
+
+
+def _jpeg_size(f: BinaryIO) -> Tuple[int, int]:
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        while byte and byte != b"\xff":
+            byte = f.read(1)
+        while byte == b"\xff":
+            byte = f.read(1)
+        if not byte:
+            raise ValueError("JPEG has no SOF marker")
+        marker = byte[0]
+        if marker == 0xD8 or 0xD0 <= marker <= 0xD7 or marker == 0x01:
+            continue
+        (length,) = struct.unpack(">H", f.read(2))
+        if length < 2:
+            raise ValueError("JPEG has an invalid segment length")
+        if marker in _JPEG_SOF_MARKERS:
+            height, width = struct.unpack(">xHH", f.read(5))
+            return width, height
+        f.seek(length - 2, 1)
+
+
+def _webp_size(header: bytes) -> Tuple[int, int]:
+    chunk = header[12:16]
+    if chunk == b"VP8 ":
+        width, height = struct.unpack("<HH", header[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L":
+        bits = int.from_bytes(header[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        width = int.from_bytes(header[24:27], "little") + 1
+        height = int.from_bytes(header[27:30], "little") + 1
+        return width, height
+    raise ValueError(f"unsupported WebP chunk: {chunk!r}")
+
+
+def _image_size(f: BinaryIO) -> Tuple[int, int]:
+    try:
+        return _header_size(f)
+    except struct.error:
+        raise ValueError("truncated image header") from None
+
+
+def _header_size(f: BinaryIO) -> Tuple[int, int]:
+    header = f.read(32)
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return struct.unpack(">II", header[16:24])
+    if header.startswith(b"\xff\xd8"):
+        return _jpeg_size(f)
+    if header[:6] in (b"GIF87a", b"GIF89a"):
+        return struct.unpack("<HH", header[6:10])
+    if header.startswith(b"BM"):
+        width, height = struct.unpack("<ii", header[18:26])
+        return width, abs(height)
+    if header.startswith(b"RIFF") and header[8:12] == b"WEBP":
+        return _webp_size(header)
+    raise ValueError("unsupported image format")
+
+
+def image_size(image: Union[str, PathLike, BinaryIO]) -> Tuple[int, int]:
+    if hasattr(image, "read"):
+        return _image_size(image)
+    with open(image, "rb") as f:
+        try:
+            return _image_size(f)
+        except ValueError as e:
+            raise ValueError(f"{image}: {e}") from None
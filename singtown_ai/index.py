@@ -0,0 +1,184 @@
+import random
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from .columnar import ColumnarDataset
+from .type import Annotation
+
+SUBSETS = ("TRAIN", "VALID", "TEST")
+
+
+def annotation_labels(annotation: Annotation) -> List[str]:
+    labels = [annotation.classification] if annotation.classification else []
+    for box in annotation.object_detection:
+        if box.label not in labels:
+            labels.append(box.label)
+    return labels
+
+
+def _increment(counts: dict, *keys):
+    for key in keys:
+        counts[key] = counts.get(key, 0) + 1
+
+
+def _summary(values) -> Dict[str, float]:
+    return {
+        "mean": float(values.mean()),
+        "min": float(values.min()),
+        "max": float(values.max()),
+    }
+
+
+def _box_sizes(boxes, box_labels, labels: Sequence[str]) -> Dict[str, dict]:
+    import numpy as np
+
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    box_labels = np.asarray(box_labels, dtype=np.int64)
+    width = boxes[:, 2] - boxes[:, 0]
+    height = boxes[:, 3] - boxes[:, 1]
+    box_sizes = {}
+    for label_id in np.unique(box_labels).tolist():
+        mask = box_labels == label_id
+        box_sizes[labels[label_id]] = {
+            "count": int(mask.sum()),
+            "width": _summary(width[mask]),
+            "height": _summary(height[mask]),
+            "area": _summary(width[mask] * height[mask]),
+        }
+    return box_sizes
+
+
+class DatasetIndex:
+    def __init__(
+        self,
+        annotations: Union[Iterable[Annotation], ColumnarDataset],
+        labels: Sequence[str],
+    ):
+        self.columnar = (
+            annotations if isinstance(annotations, ColumnarDataset) else None
+        )
+        self.annotations: List[Annotation] = list(annotations)
+        self.labels = list(labels)
+        self.label_ids: Dict[str, int] = {
+            label: i for i, label in enumerate(self.labels)
+        }
+        self.by_subset: Dict[str, List[int]] = {subset: [] for subset in SUBSETS}
+        self.by_label: Dict[str, List[int]] = {label: [] for label in self.labels}
+        self.by_url: Dict[str, List[int]] = {}
+        self.image_counts: Dict[Tuple[Optional[str], Optional[str]], int] = {}
+        self.box_counts: Dict[Tuple[Optional[str], Optional[str]], int] = {}
+        for i, annotation in enumerate(self.annotations):
+            subset = annotation.subset
+            self.by_subset[subset].append(i)
+            self.by_url.setdefault(annotation.url, []).append(i)
+            for label in annotation_labels(annotation):
+                self.by_label.setdefault(label, []).append(i)
+                _increment(self.image_counts, (subset, label), (None, label))
+            for box in annotation.object_detection:
+                _increment(
+                    self.box_counts,
+                    (subset, box.label),
+                    (None, box.label),
+                    (subset, None),
+                    (None, None),
+                )
+
+    def __len__(self) -> int:
+        return len(self.annotations)
+
+    def __iter__(self) -> Iterator[Annotation]:
+        return iter(self.annotations)
+
+    def __getitem__(self, index: int) -> Annotation:
+        return self.annotations[index]
+
+    def get(self, url: str) -> List[Annotation]:
+        return [self.annotations[i] for i in self.by_url.get(url, [])]
+
+    def count(self, subset: Optional[str] = None, label: Optional[str] = None) -> int:
+        if label is None:
+            if subset is None:
+                return len(self.annotations)
+            return len(self.by_subset.get(subset, []))
+        return self.image_counts.get((subset, label), 0)
+
+    def box_count(
+        self, subset: Optional[str] = None, label: Optional[str] = None
+    ) -> int:
+        return self.box_counts.get((subset, label), 0)
+
+    def statistics(self) -> dict:
+        columnar = self.columnar
+        if columnar is not None:
+            box_sizes = _box_sizes(columnar.boxes, columnar.box_labels, columnar.labels)
+        else:
+            label_ids = dict(self.label_ids)
+            boxes = [box for a in self.annotations for box in a.object_detection]
+            box_sizes = _box_sizes(
+                [(box.xmin, box.ymin, box.xmax, box.ymax) for box in boxes],
+                [label_ids.setdefault(box.label, len(label_ids)) for box in boxes],
+                list(label_ids),
+            )
+        return {
+            "images": {
+                subset: len(indices) for subset, indices in self.by_subset.items()
+            },
+            "labels": {
+                label: {subset: self.count(subset, label) for subset in SUBSETS}
+                for label in self.by_label
+            },
+            "boxes": {
+                label: {subset: self.box_count(subset, label) for subset in SUBSETS}
+                for label in self.by_label
+            },
+            "box_sizes": box_sizes,
+        }
+
+    def __select(self, indices: Iterable[int]) -> "DatasetIndex":
+        return DatasetIndex(
+            (self.annotations[i] for i in sorted(set(indices))), self.labels
+        )
+
+    def filter(
+        self,
+        subsets: Optional[Iterable[str]] = None,
+        labels: Optional[Iterable[str]] = None,
+        predicate: Optional[Callable[[Annotation], bool]] = None,
+    ) -> "DatasetIndex":
+        indices = range(len(self.annotations))
+        if subsets is not None:
+            indices = [i for subset in subsets for i in self.by_subset.get(subset, [])]
+        if labels is not None:
+            selected = {i for label in labels for i in self.by_label.get(label, [])}
+            indices = [i for i in indices if i in selected]
+        if predicate is not None:
+            indices = [i for i in indices if predicate(self.annotations[i])]
+        return self.__select(indices)
+
+    def sample(
+        self,
+        n: Optional[int] = None,
+        fraction: Optional[float] = None,
+        seed: Optional[int] = 0,
+    ) -> "DatasetIndex":
+        if (n is None) == (fraction is None):
+            raise ValueError("pass exactly one of n or fraction")
+        rng = random.Random(seed)
+        indices = []
+        for subset in SUBSETS:
+            subset_indices = self.by_subset[subset]
+            if fraction is not None:
+                k = round(len(subset_indices) * fraction)
+            else:
+                k = round(n * len(subset_indices) / len(self)) if len(self) else 0
+            indices.extend(rng.sample(subset_indices, min(k, len(subset_indices))))
+        return self.__select(indices)
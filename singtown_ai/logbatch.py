@@ -0,0 +1,93 @@
+import atexit
+import threading
+from typing import Callable, List
+
+from .type import LogEntry
+
+BATCH_UNSUPPORTED_STATUS = (404, 405, 415)
+
+
+class LogBatcher:
+    def __init__(
+        self,
+        send_batch: Callable[[List[LogEntry]], None],
+        send_entry: Callable[[LogEntry], None],
+        max_entries: int = 100,
+        max_bytes: int = 64 * 1024,
+        interval: float = 1.0,
+    ):
+        self.send_batch = send_batch
+        self.send_entry = send_entry
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.batch_supported = True
+        self.entries: List[LogEntry] = []
+        self.size = 0
+        self.thread = None
+        self.closed = False
+        self.lock = threading.RLock()
+        self.flush_lock = threading.Lock()
+        if interval > 0:
+            self.start()
+        atexit.register(self.flush)
+
+    def add(self, entry: LogEntry):
+        with self.lock:
+            self.entries.append(entry)
+            self.size += len(entry.content.encode("utf-8"))
+            full = len(self.entries) >= self.max_entries or self.size >= self.max_bytes
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self.flush_lock:
+            with self.lock:
+                entries = self.entries
+                self.entries = []
+                self.size = 0
+            if not entries:
+                return
+            sent = 0
+            try:
+                if self.batch_supported:
+                    try:
+                        self.send_batch(entries)
+                        return
+                    except Exception as e:
+                        response = getattr(e, "response", None)
+                        status = getattr(response, "status_code", None)
+                        if status not in BATCH_UNSUPPORTED_STATUS:
+                            raise
+                        self.batch_supported = False
+                for entry in entries:
+                    self.send_entry(entry)
+                    sent += 1
+            except Exception:
+                self.__requeue(entries[sent:])
+                raise
+
+    def __requeue(self, entries: List[LogEntry]):
+        with self.lock:
+            self.entries[:0] = entries
+            self.size += sum(len(entry.content.encode("utf-8")) for entry in entries)
+
+    def start(self):
+        try:
+            self.flush()
+        except Exception:
+            pass
+        with self.lock:
+            if self.closed:
+                return
+            self.thread = threading.Timer(self.interval, self.start)
+            self.thread.daemon = True
+            self.thread.start()
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            if self.thread is not None:
+                self.thread.cancel()
+        atexit.unregister(self.flush)
+        self.flush()
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from os import PathLike
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Union
+
+from .type import Annotation
+
+MANIFEST_NAME = ".singtown_export.json"
+MANIFEST_VERSION = 1
+
+
+def annotation_hash(annotation: Annotation, *extra) -> str:
+    digest = hashlib.sha256(annotation.model_dump_json().encode("utf-8"))
+    for value in extra:
+        digest.update(json.dumps(value, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def file_sha256(path: Union[str, PathLike], chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExportManifest:
+    def __init__(self, root: Union[str, PathLike]):
+        self.root = Path(root)
+        self.path = self.root / MANIFEST_NAME
+        self.journal_path = self.path.with_name(self.path.name + ".journal")
+        self.entries: Dict[str, dict] = {}
+        self.seen: Set[str] = set()
+        self.hashes: Dict[str, str] = {}
+        self.recorded: Set[str] = set()
+        self.scanned = False
+        self.lock = threading.Lock()
+        self.__load()
+
+    def __load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self.entries = data["entries"]
+        except (FileNotFoundError, ValueError, KeyError):
+            self.entries = {}
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    if record.get("entry") is None:
+                        self.entries.pop(record["key"], None)
+                    else:
+                        self.entries[record["key"]] = record["entry"]
+        except FileNotFoundError:
+            pass
+
+    def __append(self, key: str, entry: Optional[dict]):
+        line = json.dumps({"key": key, "entry": entry}) + "\n"
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+    def key(self, path: Union[str, PathLike]) -> str:
+        return Path(path).relative_to(self.root).as_posix()
+
+    def check(self, key: str, hash: str) -> bool:
+        with self.lock:
+            if key in self.seen:
+                hash = hashlib.sha256((self.hashes[key] + hash).encode()).hexdigest()
+                self.hashes[key] = hash
+                return False
+            self.seen.add(key)
+            self.hashes[key] = hash
+            entry = self.entries.get(key)
+        if entry is None or entry["hash"] != hash:
+            return False
+        for name in entry["files"]:
+            try:
+                size = (self.root / name).stat().st_size
+            except FileNotFoundError:
+                return False
+            if name == entry["files"][0] and size != entry["size"]:
+                return False
+        return True
+
+    def url(self, key: str) -> Optional[str]:
+        with self.lock:
+            entry = self.entries.get(key)
+        return None if entry is None else entry["url"]
+
+    def record(self, key: str, url: str, files: Iterable[Union[str, PathLike]]):
+        files = [self.key(file) for file in files]
+        image = self.root / files[0]
+        entry = {
+            "url": url,
+            "files": files,
+            "size": image.stat().st_size,
+            "sha256": file_sha256(image),
+        }
+        with self.lock:
+            entry["hash"] = self.hashes[key]
+            self.entries[key] = entry
+            self.recorded.add(key)
+            self.root.mkdir(parents=True, exist_ok=True)
+            self.__append(key, entry)
+
+    def remove_stale(self) -> List[str]:
+        if not self.scanned:
+            return []
+        with self.lock:
+            stale = [key for key in self.entries if key not in self.seen]
+            keep = {
+                name
+                for key, entry in self.entries.items()
+                if key in self.seen
+                for name in entry["files"]
+            }
+            for key in stale:
+                for name in self.entries[key]["files"]:
+                    if name not in keep:
+                        (self.root / name).unlink(missing_ok=True)
+                del self.entries[key]
+                self.__append(key, None)
+        return stale
+
+    def commit(self):
+        with self.lock:
+            for key in self.recorded:
+                if key in self.entries:
+                    self.entries[key]["hash"] = self.hashes[key]
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f"{self.path.name}.{uuid.uuid4().hex}.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": MANIFEST_VERSION, "entries": self.entries}, f)
+            os.replace(tmp, self.path)
+            self.journal_path.unlink(missing_ok=True)
@@ -0,0 +1,207 @@
+import json
+import mmap
+import os
+from os import PathLike
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .download import temp_path
+
+if TYPE_CHECKING:
+    import numpy as np
+
+SUBSETS = ("TRAIN", "VALID", "TEST")
+PACKED_VERSION = 1
+DATA_NAME = "data.bin"
+INDEX_NAME = "index.npy"
+META_NAME = "meta.json"
+BOX_NAMES = ("box_offsets.npy", "boxes.npy", "box_labels.npy")
+
+INDEX_DTYPE = [
+    ("offset", "<u8"),
+    ("length", "<u4"),
+    ("label", "<i4"),
+    ("subset", "u1"),
+]
+
+
+class PackedWriter:
+    def __init__(
+        self,
+        folder: Union[str, PathLike],
+        labels: Sequence[str],
+        project_type: str,
+    ):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.labels = list(labels)
+        self.project_type = project_type
+        self.data_path = self.folder / DATA_NAME
+        self.tmp = temp_path(self.data_path)
+        self.file = open(self.tmp, "wb")
+        self.size = 0
+        self.rows: List[Tuple[int, int, int, int]] = []
+        self.boxes: List["np.ndarray"] = []
+        self.box_labels: List["np.ndarray"] = []
+
+    def append(self, image: bytes) -> Tuple[int, int]:
+        offset = self.size
+        self.file.write(image)
+        self.size += len(image)
+        return offset, len(image)
+
+    def add(
+        self,
+        offset: int,
+        length: int,
+        subset: str,
+        label: int = -1,
+        boxes: Optional["np.ndarray"] = None,
+        box_labels: Optional["np.ndarray"] = None,
+    ):
+        import numpy as np
+
+        self.rows.append((offset, length, label, SUBSETS.index(subset)))
+        if boxes is not None:
+            self.boxes.append(np.asarray(boxes, dtype=np.float32).reshape(-1, 4))
+            self.box_labels.append(np.asarray(box_labels, dtype=np.int32))
+
+    def __save(self, name: str, array: "np.ndarray"):
+        import numpy as np
+
+        path = self.folder / name
+        tmp = temp_path(path)
+        with open(tmp, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp, path)
+
+    def close(self):
+        import numpy as np
+
+        self.file.close()
+        os.replace(self.tmp, self.data_path)
+        self.__save(INDEX_NAME, np.array(self.rows, dtype=INDEX_DTYPE))
+        if self.project_type == "OBJECT_DETECTION":
+            counts = [len(labels) for labels in self.box_labels]
+            box_offsets = np.concatenate([[0], np.cumsum(counts, dtype=np.int64)])
+            boxes = np.concatenate(
+                [np.empty((0, 4), dtype=np.float32), *self.boxes]
+            ).astype(np.float32)
+            box_labels = np.concatenate(
+                [np.empty(0, dtype=np.int32), *self.box_labels]
+            ).astype(np.int32)
+            for name, array in zip(BOX_NAMES, (box_offsets, boxes, box_labels)):
+                self.__save(name, array)
+        meta = {
+            "version": PACKED_VERSION,
+            "type": self.project_type,
+            "labels": self.labels,
+            "count": len(self.rows),
+            "bytes": self.size,
+        }
+        with open(self.folder / META_NAME, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    def abort(self):
+        self.file.close()
+        self.tmp.unlink(missing_ok=True)
+
+
+class PackedDataset:
+    def __init__(self, folder: Union[str, PathLike], subset: Optional[str] = None):
+        self.folder = Path(folder)
+        self.subset = subset
+        self.__load()
+
+    def __load(self):
+        import numpy as np
+
+        with open(self.folder / META_NAME, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != PACKED_VERSION:
+            raise ValueError(
+                f"unsupported packed dataset version: {meta.get('version')}"
+            )
+        self.type: str = meta["type"]
+        self.labels: List[str] = meta["labels"]
+        self.index = np.load(self.folder / INDEX_NAME, mmap_mode="r")
+        self.rows: Optional["np.ndarray"] = None
+        if self.subset is not None:
+            subset_id = SUBSETS.index(self.subset)
+            self.rows = np.flatnonzero(self.index["subset"] == subset_id)
+        self.box_offsets = self.boxes = self.box_labels = None
+        if self.type == "OBJECT_DETECTION":
+            self.box_offsets, self.boxes, self.box_labels = (
+                np.load(self.folder / name, mmap_mode="r") for name in BOX_NAMES
+            )
+        self.__mmap: Optional[mmap.mmap] = None
+        self.__view: Optional[memoryview] = None
+
+    @property
+    def buffer(self) -> memoryview:
+        # The read-only mapping is backed by the page cache, so forked workers
+        # share it. Unpickled copies (spawn workers) map the file again here.
+        if self.__view is None:
+            with open(self.folder / DATA_NAME, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    self.__mmap = None
+                    self.__view = memoryview(b"")
+                else:
+                    self.__mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    self.__view = memoryview(self.__mmap)
+        return self.__view
+
+    def __row(self, index: int) -> int:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("dataset index out of range")
+        return index if self.rows is None else int(self.rows[index])
+
+    def __len__(self) -> int:
+        return len(self.index) if self.rows is None else len(self.rows)
+
+    def __getitem__(self, index: int) -> memoryview:
+        offset, length, _, _ = self.index[self.__row(index)].tolist()
+        return self.buffer[offset : offset + length]
+
+    def __iter__(self) -> Iterator[memoryview]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def label(self, index: int) -> int:
+        return int(self.index["label"][self.__row(index)])
+
+    @property
+    def class_ids(self) -> "np.ndarray":
+        labels = self.index["label"]
+        return labels if self.rows is None else labels[self.rows]
+
+    def image_boxes(self, index: int) -> Tuple["np.ndarray", "np.ndarray"]:
+        if self.box_offsets is None:
+            raise RuntimeError("image_boxes only support OBJECT_DETECTION datasets")
+        row = self.__row(index)
+        start, stop = self.box_offsets[row], self.box_offsets[row + 1]
+        return self.boxes[start:stop], self.box_labels[start:stop]
+
+    def close(self):
+        if self.__view is not None:
+            self.__view.release()
+        if self.__mmap is not None:
+            self.__mmap.close()
+        self.__mmap = None
+        self.__view = None
+
+    def __getstate__(self) -> dict:
+        return {"folder": self.folder, "subset": self.subset}
+
+    def __setstate__(self, state: dict):
+        self.folder = state["folder"]
+        self.subset = state["subset"]
+        self.__load()
+
+    def __enter__(self) -> "PackedDataset":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
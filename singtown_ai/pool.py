@@ -0,0 +1,206 @@
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future
+from os import PathLike
+from typing import Any, Deque, Dict, Hashable, List, Optional, Tuple, Union
+
+from .cache import ImageCache
+from .client import SingTownAIClient, new_session
+
+
+class FairExecutor(Executor):
+    def __init__(self, max_workers: int = 16):
+        if max_workers <= 0:
+            raise ValueError("max_workers must be greater than 0")
+        self.max_workers = max_workers
+        self.queues: Dict[Hashable, Deque[Tuple[Future, Any, tuple, dict]]] = {}
+        self.ready: Deque[Hashable] = deque()
+        self.condition = threading.Condition()
+        self.threads: List[threading.Thread] = []
+        self.pending = 0
+        self.idle = 0
+        self.closed = False
+
+    def submit_to(self, key: Hashable, fn, /, *args, **kwargs) -> Future:
+        future = Future()
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            queue = self.queues.get(key)
+            if queue is None:
+                queue = self.queues[key] = deque()
+                self.ready.append(key)
+            queue.append((future, fn, args, kwargs))
+            self.pending += 1
+            if self.pending > self.idle and len(self.threads) < self.max_workers:
+                thread = threading.Thread(target=self.__worker, daemon=True)
+                self.threads.append(thread)
+                thread.start()
+            self.condition.notify()
+        return future
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        return self.submit_to(None, fn, *args, **kwargs)
+
+    def for_task(self, key: Hashable) -> "TaskExecutor":
+        return TaskExecutor(self, key)
+
+    def __next_work(self) -> Tuple[Future, Any, tuple, dict]:
+        key = self.ready.popleft()
+        queue = self.queues[key]
+        work = queue.popleft()
+        if queue:
+            self.ready.append(key)
+        else:
+            del self.queues[key]
+        self.pending -= 1
+        return work
+
+    def __worker(self):
+        while True:
+            with self.condition:
+                self.idle += 1
+                while not self.ready and not self.closed:
+                    self.condition.wait()
+                self.idle -= 1
+                if not self.ready:
+                    return
+                future, fn, args, kwargs = self.__next_work()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        with self.condition:
+            self.closed = True
+            if cancel_futures:
+                while self.ready:
+                    future, _, _, _ = self.__next_work()
+                    future.cancel()
+            self.condition.notify_all()
+        if wait:
+            for thread in list(self.threads):
+                thread.join()
+
+
+class TaskExecutor(Executor):
+    def __init__(self, executor: FairExecutor, key: Hashable):
+        self.executor = executor
+        self.key = key
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        return self.executor.submit_to(self.key, fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        pass
+
+
+class SingTownAIClientPool:
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        token: Optional[str] = None,
+        pool_maxsize: int = 32,
+        max_workers: int = 16,
+        cache_dir: Union[str, PathLike, None] = None,
+        cache_max_bytes: Optional[int] = None,
+        log_flush_interval: float = 1.0,
+        **client_kwargs,
+    ):
+        self.host = host
+        self.token = token
+        self.session = new_session(pool_maxsize)
+        self.executor = FairExecutor(max_workers)
+        self.image_cache = ImageCache(cache_dir, cache_max_bytes) if cache_dir else None
+        self.log_flush_interval = log_flush_interval
+        self.client_kwargs = client_kwargs
+        self.clients: Dict[str, SingTownAIClient] = {}
+        self.lock = threading.Lock()
+        self.thread = None
+        self.closed = False
+        if log_flush_interval > 0:
+            self.start()
+
+    def client(self, task_id: str, **kwargs) -> SingTownAIClient:
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("client pool is closed")
+            client = self.clients.get(task_id)
+        if client is not None:
+            return client
+
+        # Building a client may prefetch the task and dataset, so it runs
+        # outside the lock; if another thread won the race its client is kept.
+        options = {
+            "host": self.host,
+            "token": self.token,
+            **self.client_kwargs,
+            **kwargs,
+            "task_id": task_id,
+            "session": self.session,
+            "executor": self.executor.for_task(task_id),
+            "image_cache": self.image_cache,
+            "log_flush_interval": 0,
+        }
+        client = SingTownAIClient(**options)
+        with self.lock:
+            closed = self.closed
+            existing = self.clients.get(task_id)
+            if not closed and existing is None:
+                self.clients[task_id] = client
+                return client
+        client.close()
+        if closed:
+            raise RuntimeError("client pool is closed")
+        return existing
+
+    def __getitem__(self, task_id: str) -> SingTownAIClient:
+        return self.client(task_id)
+
+    def __each_client(self, method: str):
+        with self.lock:
+            clients = list(self.clients.values())
+        errors = []
+        for client in clients:
+            try:
+                getattr(client, method)()
+            except Exception as e:
+                errors.append(e)
+        if errors:
+            raise errors[0]
+
+    def flush_logs(self):
+        self.__each_client("flush_logs")
+
+    def start(self):
+        try:
+            self.flush_logs()
+        except Exception:
+            pass
+        if self.closed:
+            return
+        self.thread = threading.Timer(self.log_flush_interval, self.start)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+        if self.thread is not None:
+            self.thread.cancel()
+        try:
+            self.__each_client("close")
+        finally:
+            self.executor.shutdown()
+            self.session.close()
+
+    def __enter__(self) -> "SingTownAIClientPool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,218 @@
+import io
+import os
+import struct
+import tarfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+from .download import temp_path
+
+CRC32C_POLY = 0x82F63B78
+CRC32C_BLOCK = 64
+TFRECORD_MASK_DELTA = 0xA282EAD8
+
+
+@lru_cache(maxsize=None)
+def _crc32c_table():
+    import numpy as np
+
+    table = np.arange(256, dtype=np.uint32)
+    for _ in range(8):
+        table = np.where(table & 1, (table >> 1) ^ np.uint32(CRC32C_POLY), table >> 1)
+    return table.astype(np.uint32)
+
+
+def _apply_shift(tables, crc):
+    return (
+        tables[0][crc & 0xFF]
+        ^ tables[1][(crc >> 8) & 0xFF]
+        ^ tables[2][(crc >> 16) & 0xFF]
+        ^ tables[3][crc >> 24]
+    )
+
+
+@lru_cache(maxsize=None)
+def _crc32c_shift(nbytes: int):
+    import numpy as np
+
+    basis = np.arange(256, dtype=np.uint32)
+    basis = np.concatenate([basis << (8 * i) for i in range(4)]).astype(np.uint32)
+    if nbytes == CRC32C_BLOCK:
+        table = _crc32c_table()
+        for _ in range(nbytes):
+            basis = (basis >> 8) ^ table[basis & 0xFF]
+    else:
+        half = _crc32c_shift(nbytes // 2)
+        basis = _apply_shift(half, _apply_shift(half, basis))
+    return basis.reshape(4, 256)
+
+
+def crc32c(data: bytes) -> int:
+    import numpy as np
+
+    table = _crc32c_table()
+    if len(data) < 4:
+        crc = 0xFFFFFFFF
+        for byte in data:
+            crc = (crc >> 8) ^ int(table[(crc ^ byte) & 0xFF])
+        return crc ^ 0xFFFFFFFF
+
+    # Each 64-byte block is a lane: all lanes advance one byte per step, and
+    # the partial CRCs are then merged pairwise with precomputed shift tables.
+    # Leading zero bytes do not change a zero-initialised CRC, so the data is
+    # left-padded to whole blocks and the 0xFFFFFFFF init is folded into the
+    # first four bytes.
+    pad = -len(data) % CRC32C_BLOCK
+    blocks = np.zeros(len(data) + pad, dtype=np.uint8)
+    blocks[pad:] = np.frombuffer(data, dtype=np.uint8)
+    blocks[pad : pad + 4] ^= 0xFF
+    blocks = blocks.reshape(-1, CRC32C_BLOCK)
+    crc = np.zeros(len(blocks), dtype=np.uint32)
+    for i in range(CRC32C_BLOCK):
+        crc = (crc >> 8) ^ table[(crc ^ blocks[:, i]) & 0xFF]
+    nbytes = CRC32C_BLOCK
+    while len(crc) > 1:
+        if len(crc) % 2:
+            crc = np.concatenate([np.zeros(1, dtype=np.uint32), crc])
+        crc = _apply_shift(_crc32c_shift(nbytes), crc[0::2]) ^ crc[1::2]
+        nbytes *= 2
+    return int(crc[0]) ^ 0xFFFFFFFF
+
+
+def masked_crc32c(data: bytes) -> int:
+    crc = crc32c(data)
+    return (((crc >> 15) | (crc << 17)) + TFRECORD_MASK_DELTA) & 0xFFFFFFFF
+
+
+def tfrecord(data: bytes) -> bytes:
+    length = struct.pack("<Q", len(data))
+    return b"".join(
+        (
+            length,
+            struct.pack("<I", masked_crc32c(length)),
+            data,
+            struct.pack("<I", masked_crc32c(data)),
+        )
+    )
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _field(number: int, payload: bytes) -> bytes:
+    return _varint(number << 3 | 2) + _varint(len(payload)) + payload
+
+
+def bytes_feature(values: Sequence[Union[bytes, str]]) -> bytes:
+    values = [v.encode("utf-8") if isinstance(v, str) else v for v in values]
+    return _field(1, b"".join(_field(1, v) for v in values))
+
+
+def float_feature(values: Sequence[float]) -> bytes:
+    return _field(2, _field(1, struct.pack(f"<{len(values)}f", *values)))
+
+
+def int64_feature(values: Sequence[int]) -> bytes:
+    return _field(3, _field(1, b"".join(_varint(v) for v in values)))
+
+
+def tf_example(features: Dict[str, bytes]) -> bytes:
+    entries = b"".join(
+        _field(1, _field(1, key.encode("utf-8")) + _field(2, feature))
+        for key, feature in features.items()
+    )
+    return _field(1, entries)
+
+
+class ShardWriter:
+    suffix = ""
+
+    def __init__(
+        self,
+        folder: Union[str, os.PathLike],
+        prefix: str,
+        max_bytes: int,
+        max_count: Optional[int] = None,
+    ):
+        self.folder = Path(folder)
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_count = max_count
+        self.paths: List[Path] = []
+        self.file = None
+        self.tmp: Optional[Path] = None
+        self.count = 0
+        self.size = 0
+
+    def __open(self):
+        self.folder.mkdir(parents=True, exist_ok=True)
+        path = self.folder / f"{self.prefix}-{len(self.paths):06d}{self.suffix}"
+        self.paths.append(path)
+        self.tmp = temp_path(path)
+        self.file = self._open(self.tmp)
+        self.count = 0
+        self.size = 0
+
+    def write(self, key: str, sample: Dict[str, bytes], size: int):
+        if self.file is not None and (
+            self.size + size > self.max_bytes
+            or (self.max_count is not None and self.count >= self.max_count)
+        ):
+            self.close()
+        if self.file is None:
+            self.__open()
+        self._write(key, sample)
+        self.count += 1
+        self.size += size
+
+    def close(self):
+        if self.file is None:
+            return
+        self.file.close()
+        os.replace(self.tmp, self.paths[-1])
+        self.file = None
+
+    def abort(self):
+        if self.file is None:
+            return
+        self.file.close()
+        self.tmp.unlink(missing_ok=True)
+        self.paths.pop()
+        self.file = None
+
+    def _open(self, path: Path):
+        raise NotImplementedError
+
+    def _write(self, key: str, sample: Dict[str, bytes]):
+        raise NotImplementedError
+
+
+class TarShardWriter(ShardWriter):
+    suffix = ".tar"
+
+    def _open(self, path: Path):
+        return tarfile.open(path, "w", format=tarfile.USTAR_FORMAT)
+
+    def _write(self, key: str, sample: Dict[str, bytes]):
+        for extension, data in sample.items():
+            info = tarfile.TarInfo(f"{key}.{extension}")
+            info.size = len(data)
+            info.mode = 0o644
+            self.file.addfile(info, io.BytesIO(data))
+
+
+class TFRecordShardWriter(ShardWriter):
+    suffix = ".tfrecord"
+
+    def _open(self, path: Path):
+        return open(path, "wb")
+
+    def _write(self, key: str, sample: Dict[str, bytes]):
+        self.file.write(tfrecord(tf_example(sample)))
@@ -0,0 +1,89 @@
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import uuid
+from os import PathLike
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, Optional, Union
+
+
+class SnapshotWriter:
+    def __init__(self, f: BinaryIO):
+        self.f = f
+        self.complete = False
+
+    def tee(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        for chunk in chunks:
+            self.f.write(chunk)
+            yield chunk
+        self.complete = True
+
+
+class SnapshotStore:
+    def __init__(self, root: Union[str, PathLike]):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def __paths(self, url: str):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+        return self.root / f"{key}.json.gz", self.root / f"{key}.meta.json"
+
+    def meta(self, url: str) -> Optional[dict]:
+        data_path, meta_path = self.__paths(url)
+        try:
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if meta.get("url") != url or not data_path.exists():
+            return None
+        return meta
+
+    def headers(self, url: str) -> Dict[str, str]:
+        meta = self.meta(url)
+        if meta is None:
+            return {}
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("lastModified"):
+            headers["If-Modified-Since"] = meta["lastModified"]
+        return headers
+
+    def open(self, url: str) -> BinaryIO:
+        data_path, _ = self.__paths(url)
+        return gzip.open(data_path, "rb")
+
+    @contextlib.contextmanager
+    def writer(
+        self,
+        url: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        next_url: Optional[str],
+    ) -> Iterator[SnapshotWriter]:
+        data_path, meta_path = self.__paths(url)
+        suffix = f".{uuid.uuid4().hex}.tmp"
+        data_tmp = data_path.with_name(data_path.name + suffix)
+        meta_tmp = meta_path.with_name(meta_path.name + suffix)
+        try:
+            with gzip.open(data_tmp, "wb", compresslevel=1) as f:
+                writer = SnapshotWriter(f)
+                yield writer
+            if writer.complete:
+                meta = {
+                    "url": url,
+                    "etag": etag,
+                    "lastModified": last_modified,
+                    "next": next_url,
+                }
+                with open(meta_tmp, "w") as f:
+                    json.dump(meta, f)
+                os.replace(data_tmp, data_path)
+                os.replace(meta_tmp, meta_path)
+        finally:
+            for tmp in (data_tmp, meta_tmp):
+                if tmp.exists():
+                    tmp.unlink()
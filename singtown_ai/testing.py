@@ -0,0 +1,335 @@
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from os import PathLike
+from typing import Dict, Iterator, List, Optional, Union
+from urllib.parse import parse_qs, urlparse
+
+from .compress import decompress_body
+
+SUBSETS = ["TRAIN"] * 7 + ["VALID"] * 2 + ["TEST"]
+
+DEFAULT_TASK = {
+    "project": {"labels": ["cat", "dog"], "type": "CLASSIFICATION"},
+    "device": "openmv-cam-h7-plus",
+    "modelName": "mobilenet_v2_0.35_128",
+    "freezeBackbone": True,
+    "batchSize": 16,
+    "epochs": 1,
+    "learningRate": 0.001,
+    "earlyStopping": 3,
+    "exportWidth": 128,
+    "exportHeight": 128,
+    "metrics": [],
+    "logs": [],
+}
+
+
+def synthetic_annotation(
+    index: int, base_url: str, labels: List[str], project_type: str
+) -> dict:
+    annotation = {
+        "url": f"{base_url}/images/{index}.jpg",
+        "subset": SUBSETS[index % len(SUBSETS)],
+    }
+    if project_type == "CLASSIFICATION":
+        annotation["classification"] = labels[index % len(labels)]
+        return annotation
+    rng = random.Random(index)
+    boxes = []
+    for _ in range(1 + index % 3):
+        xmin, ymin = rng.uniform(0, 0.5), rng.uniform(0, 0.5)
+        boxes.append(
+            {
+                "label": labels[rng.randrange(len(labels))],
+                "xmin": xmin,
+                "ymin": ymin,
+                "xmax": xmin + rng.uniform(0.05, 0.5),
+                "ymax": ymin + rng.uniform(0.05, 0.5),
+            }
+        )
+    annotation["objectDetection"] = boxes
+    return annotation
+
+
+class MockServer:
+    def __init__(
+        self,
+        task: Optional[dict] = None,
+        dataset: Optional[List[dict]] = None,
+        dataset_size: int = 100,
+        image_size: int = 1024,
+        latency: float = 0.0,
+        bandwidth: Optional[float] = None,
+        error_rate: float = 0.0,
+        page_size: Optional[int] = None,
+        task_id: str = "0",
+        seed: int = 0,
+    ):
+        self.task = dict(task or DEFAULT_TASK)
+        self.dataset = dataset
+        self.dataset_size = len(dataset) if dataset is not None else dataset_size
+        self.image_size = image_size
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.page_size = page_size
+        self.task_id = task_id
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.logs: List[dict] = []
+        self.results: List[bytes] = []
+        self.uploads: Dict[str, Dict[int, bytes]] = {}
+        self.requests: Dict[str, int] = {}
+        self.httpd: Optional[ThreadingHTTPServer] = None
+        self.thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(
+        cls,
+        mock_task_path: Union[str, PathLike, None] = None,
+        mock_dataset_path: Union[str, PathLike, None] = None,
+        task_id: Optional[str] = None,
+    ) -> "MockServer":
+        task = dataset = None
+        if mock_task_path:
+            with open(mock_task_path, "r") as f:
+                task = json.load(f)
+        if mock_dataset_path and os.path.exists(mock_dataset_path):
+            with open(mock_dataset_path, "r") as f:
+                dataset = json.load(f)
+        bandwidth = os.getenv("SINGTOWN_AI_MOCK_BANDWIDTH")
+        return cls(
+            task=task,
+            dataset=dataset,
+            dataset_size=int(os.getenv("SINGTOWN_AI_MOCK_DATASET_SIZE", "100")),
+            image_size=int(os.getenv("SINGTOWN_AI_MOCK_IMAGE_SIZE", "1024")),
+            latency=float(os.getenv("SINGTOWN_AI_MOCK_LATENCY", "0")),
+            bandwidth=float(bandwidth) if bandwidth else None,
+            error_rate=float(os.getenv("SINGTOWN_AI_MOCK_ERROR_RATE", "0")),
+            task_id=task_id or os.getenv("SINGTOWN_AI_TASK_ID", "0"),
+        )
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def task_url(self) -> str:
+        return f"/api/v1/task/tasks/{self.task_id}"
+
+    def start(self) -> "MockServer":
+        server = self
+
+        class Handler(MockRequestHandler):
+            mock = server
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+    def __enter__(self) -> "MockServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def annotation(self, index: int) -> dict:
+        if self.dataset is not None:
+            return self.dataset[index]
+        project = self.task["project"]
+        return synthetic_annotation(index, self.url, project["labels"], project["type"])
+
+    def image(self, index: int) -> bytes:
+        seed = hashlib.sha256(str(index).encode()).digest()
+        return (seed * (self.image_size // len(seed) + 1))[: self.image_size]
+
+    def dataset_etag(self) -> str:
+        key = json.dumps([self.dataset, self.dataset_size, self.task["project"]])
+        return '"' + hashlib.sha256(key.encode()).hexdigest()[:16] + '"'
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    mock: MockServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.__handle("GET")
+
+    def do_POST(self):
+        self.__handle("POST")
+
+    def do_PUT(self):
+        self.__handle("PUT")
+
+    def __handle(self, method: str):
+        mock = self.mock
+        parsed = urlparse(self.path)
+        body = self.__read_body()
+        route = f"{method} {parsed.path}"
+        with mock.lock:
+            mock.requests[route] = mock.requests.get(route, 0) + 1
+            failed = mock.error_rate and mock.random.random() < mock.error_rate
+        if mock.latency:
+            time.sleep(mock.latency)
+        if failed:
+            return self.__send(500, b"injected error")
+
+        task_url = mock.task_url
+        path = parsed.path
+        match = re.fullmatch(r"/images/(\d+)\.jpg", path)
+        if method == "GET" and match:
+            return self.__send(200, mock.image(int(match.group(1))), "image/jpeg")
+        if method == "GET" and path == task_url:
+            return self.__send_json(mock.task)
+        if method == "GET" and path == f"{task_url}/dataset":
+            return self.__send_dataset(parse_qs(parsed.query))
+        if method == "POST" and path == task_url:
+            with mock.lock:
+                mock.task.update(json.loads(body))
+            return self.__send(200, b"")
+        if method == "POST" and path == f"{task_url}/logs":
+            with mock.lock:
+                mock.logs.append(json.loads(body))
+            return self.__send(200, b"")
+        if method == "POST" and path == f"{task_url}/logs/batch":
+            with mock.lock:
+                mock.logs.extend(json.loads(body))
+            return self.__send(200, b"")
+        if method == "POST" and path == f"{task_url}/metrics":
+            with mock.lock:
+                mock.task["metrics"] = mock.task.get("metrics", []) + json.loads(body)
+            return self.__send(200, b"")
+        if method == "POST" and path == f"{task_url}/result":
+            with mock.lock:
+                mock.results.append(body)
+            return self.__send(200, b"")
+        if method == "POST" and path == f"{task_url}/result/uploads":
+            upload_id = uuid.uuid4().hex
+            with mock.lock:
+                mock.uploads[upload_id] = {}
+            return self.__send_json({"uploadId": upload_id})
+        match = re.fullmatch(
+            re.escape(task_url) + r"/result/uploads/(\w+)/(parts/(\d+)|complete)",
+            path,
+        )
+        if match and match.group(1) in mock.uploads:
+            parts = mock.uploads[match.group(1)]
+            if method == "PUT" and match.group(3) is not None:
+                with mock.lock:
+                    parts[int(match.group(3))] = body
+                return self.__send(200, b"")
+            if method == "POST" and match.group(2) == "complete":
+                with mock.lock:
+                    mock.results.append(b"".join(parts[i] for i in sorted(parts)))
+                return self.__send(200, b"")
+        return self.__send(404, b"not found")
+
+    def __read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        return decompress_body(body, self.headers.get("Content-Encoding"))
+
+    def __send(
+        self,
+        status: int,
+        body: bytes,
+        content_type: str = "text/plain",
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.__write(body)
+
+    def __send_json(self, data):
+        self.__send(200, json.dumps(data).encode("utf-8"), "application/json")
+
+    def __write(self, data: bytes):
+        bandwidth = self.mock.bandwidth
+        if not bandwidth:
+            self.wfile.write(data)
+            return
+        chunk_size = max(1, min(64 * 1024, int(bandwidth / 10)))
+        for start in range(0, len(data), chunk_size):
+            chunk = data[start : start + chunk_size]
+            time.sleep(len(chunk) / bandwidth)
+            self.wfile.write(chunk)
+
+    def __send_dataset(self, query: Dict[str, List[str]]):
+        mock = self.mock
+        etag = mock.dataset_etag()
+        start, stop = 0, mock.dataset_size
+        headers = {}
+        if mock.page_size:
+            page = int(query.get("page", ["1"])[0])
+            start = (page - 1) * mock.page_size
+            stop = min(start + mock.page_size, mock.dataset_size)
+            if stop < mock.dataset_size:
+                next_url = f"{mock.task_url}/dataset?page={page + 1}"
+                headers["Link"] = f'<{next_url}>; rel="next"'
+            etag = f'{etag[:-1]}-{page}"'
+        headers["ETag"] = etag
+
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        chunks = self.__iter_dataset(start, stop)
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            headers["Content-Encoding"] = "gzip"
+            chunks = self.__gzip(chunks)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        for chunk in chunks:
+            if chunk:
+                self.__write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+        self.wfile.write(b"0\r\n\r\n")
+
+    @staticmethod
+    def __gzip(chunks: Iterator[bytes]) -> Iterator[bytes]:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            yield compressor.compress(chunk)
+        yield compressor.flush()
+
+    def __iter_dataset(self, start: int, stop: int) -> Iterator[bytes]:
+        buffer = [b"["]
+        size = 1
+        for index in range(start, stop):
+            item = json.dumps(self.mock.annotation(index)).encode("utf-8")
+            buffer.append(item if index == start else b"," + item)
+            size += len(item) + 1
+            if size >= 64 * 1024:
+                yield b"".join(buffer)
+                buffer, size = [], 0
+        buffer.append(b"]")
+        yield b"".join(buffer)
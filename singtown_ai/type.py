@@ -1,6 +1,10 @@
-from pydantic import BaseModel, ConfigDict
+import contextlib
+import gc
+import threading
+from functools import lru_cache
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 from pydantic.alias_generators import to_camel
-from typing import List, Literal
+from typing import Iterator, List, Literal, Union
 
 
 class CamelCaseModel(BaseModel):
@@ -45,3 +49,32 @@ class TaskResponse(CamelCaseModel):
     export_height: int
     metrics: List[dict] = []
     logs: List[LogEntry] = []
+
+
+@lru_cache(maxsize=None)
+def annotation_list_adapter() -> TypeAdapter:
+    return TypeAdapter(List[Annotation])
+
+
+@contextlib.contextmanager
+def gc_paused() -> Iterator[None]:
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def parse_annotations(data: Union[str, bytes]) -> List[Annotation]:
+    # Toggling the collector is process-wide, so only the main thread does it;
+    # background prefetch and pool threads parse with it left alone.
+    if threading.current_thread() is not threading.main_thread():
+        return annotation_list_adapter().validate_json(data)
+    with gc_paused():
+        return annotation_list_adapter().validate_json(data)
+
+
+def parse_task(data: Union[str, bytes]) -> TaskResponse:
+    return TaskResponse.model_validate_json(data)
@@ -0,0 +1,151 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from os import PathLike
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+from requests.exceptions import HTTPError
+
+from .logbatch import BATCH_UNSUPPORTED_STATUS
+
+ProgressCallback = Callable[[int, int, float], None]
+UPLOAD_EXPIRED_STATUS = (404, 410)
+
+
+class ChunkedUploadUnsupported(Exception):
+    pass
+
+
+class ChunkedUpload:
+    def __init__(
+        self,
+        client,
+        file_path: Union[str, PathLike],
+        url: str,
+        chunk_size: int,
+        max_workers: int = 4,
+        retries: int = 3,
+        progress: Optional[ProgressCallback] = None,
+    ):
+        self.client = client
+        self.file_path = Path(file_path)
+        self.url = url
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.retries = retries
+        self.progress = progress
+        self.journal_path = self.file_path.with_name(self.file_path.name + ".upload")
+        self.lock = threading.Lock()
+        self.size = 0
+        self.sent = 0
+        self.started = 0.0
+        self.journal: dict = {}
+
+    def __load_journal(self, stat: os.stat_result) -> Optional[dict]:
+        try:
+            with open(self.journal_path, "r") as f:
+                journal = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if (
+            journal.get("size") != stat.st_size
+            or journal.get("mtime") != stat.st_mtime_ns
+            or journal.get("chunkSize") != self.chunk_size
+        ):
+            return None
+        return journal
+
+    def __save_journal(self):
+        tmp_path = self.journal_path.with_name(self.journal_path.name + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.journal, f)
+        os.replace(tmp_path, self.journal_path)
+
+    def __create(self, stat: os.stat_result) -> dict:
+        try:
+            response = self.client.post(
+                f"{self.url}/uploads",
+                json={
+                    "filename": self.file_path.name,
+                    "size": stat.st_size,
+                    "chunkSize": self.chunk_size,
+                },
+            )
+        except HTTPError as e:
+            if e.response.status_code in BATCH_UNSUPPORTED_STATUS:
+                raise ChunkedUploadUnsupported() from e
+            raise
+        return {
+            "uploadId": response.json()["uploadId"],
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "chunkSize": self.chunk_size,
+            "parts": [],
+        }
+
+    def __upload_part(self, index: int):
+        offset = index * self.chunk_size
+        with open(self.file_path, "rb") as f:
+            f.seek(offset)
+            data = f.read(self.chunk_size)
+        upload_id = self.journal["uploadId"]
+        self.client.request(
+            "PUT",
+            f"{self.url}/uploads/{upload_id}/parts/{index}",
+            data=data,
+            retries=self.retries,
+        )
+        with self.lock:
+            self.journal["parts"].append(index)
+            self.__save_journal()
+            self.sent += len(data)
+            self.__report()
+
+    def __report(self):
+        if self.progress is None:
+            return
+        elapsed = time.monotonic() - self.started
+        self.progress(self.sent, self.size, self.sent / elapsed if elapsed else 0.0)
+
+    def run(self):
+        stat = os.stat(self.file_path)
+        self.size = stat.st_size
+        journal = self.__load_journal(stat)
+        if journal is not None:
+            try:
+                return self.__run(journal)
+            except HTTPError as e:
+                if e.response.status_code not in UPLOAD_EXPIRED_STATUS:
+                    raise
+                # the server no longer knows the journaled upload, start over
+                self.journal_path.unlink(missing_ok=True)
+        self.__run(self.__create(stat))
+
+    def __run(self, journal: dict):
+        self.journal = journal
+        self.__save_journal()
+
+        count = max(1, -(-self.size // self.chunk_size))
+        done = set(self.journal["parts"])
+        self.sent = sum(
+            min(self.chunk_size, self.size - index * self.chunk_size) for index in done
+        )
+        self.started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                executor.submit(self.__upload_part, index)
+                for index in range(count)
+                if index not in done
+            ]
+            for future in futures:
+                future.result()
+
+        self.client.post(
+            f"{self.url}/uploads/{self.journal['uploadId']}/complete",
+            json={"parts": count, "size": self.size},
+        )
+        self.journal_path.unlink()
+        self.__report()
@@ -1,8 +1,13 @@
 import pytest
 import json
+import struct
 from pathlib import Path
 
 
+def png_bytes(width, height):
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I4sII", 13, b"IHDR", width, height)
+
+
 def create_image_files(dataset):
     for annotation in dataset:
         img_path = Path(annotation["url"])
@@ -0,0 +1,126 @@
+from singtown_ai import (
+    AsyncSingTownAIClient,
+    ExportError,
+    async_export_class_folder,
+    async_export_yolo,
+)
+import asyncio
+import os
+import zipfile
+import pytest
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_async_client_dataset(task_cf_file, dataset_cf_file):
+    async def main():
+        async with AsyncSingTownAIClient(
+            mock_task_path=task_cf_file, mock_dataset_path=dataset_cf_file
+        ) as client:
+            return client.task, client.dataset
+
+    task, dataset = run(main())
+    assert task.project.type == "CLASSIFICATION"
+    assert len(dataset) == 20
+
+
+def test_async_client_log_metrics_upload(tmp_path, task_od_file):
+    uploadfile = tmp_path / "result.zip"
+    with zipfile.ZipFile(uploadfile, "w") as zf:
+        zf.writestr("best.tflite", "content")
+
+    async def main():
+        client = await AsyncSingTownAIClient.create(mock_task_path=task_od_file)
+        await client.log("train started")
+        await client.update_metrics([{"epoch": 0, "accuracy": 0.8}])
+        await client.upload_results_zip(uploadfile)
+        await client.close()
+        return client
+
+    client = run(main())
+    assert client.task.logs[0].content == "train started\n"
+    assert len(client.task.metrics) == 1
+
+
+def test_async_export_class_folder(tmp_path, task_cf_file, dataset_cf_file):
+    async def main():
+        async with AsyncSingTownAIClient(
+            mock_task_path=task_cf_file,
+            mock_dataset_path=dataset_cf_file,
+            max_concurrency=3,
+        ) as client:
+            await async_export_class_folder(client, tmp_path / "dataset")
+
+    run(main())
+    export_path = tmp_path / "dataset"
+    assert len(os.listdir(export_path / "TRAIN/cat")) == 7
+    assert len(os.listdir(export_path / "VALID/dog")) == 2
+    assert len(os.listdir(export_path / "TEST/cat")) == 1
+
+
+def test_async_export_yolo(tmp_path, task_od_file, dataset_od_file):
+    async def main():
+        async with AsyncSingTownAIClient(
+            mock_task_path=task_od_file, mock_dataset_path=dataset_od_file
+        ) as client:
+            await async_export_yolo(client, tmp_path / "dataset")
+
+    run(main())
+    export_path = tmp_path / "dataset"
+    assert (export_path / "data.yaml").exists()
+    assert len(os.listdir(export_path / "images/TRAIN")) == 14
+    assert len(os.listdir(export_path / "labels/TRAIN")) == 14
+
+
+def test_async_export_typeerror(tmp_path, task_cf_file, task_od_file):
+    async def main(task_file, export):
+        async with AsyncSingTownAIClient(mock_task_path=task_file) as client:
+            await export(client, tmp_path / "dataset")
+
+    with pytest.raises(RuntimeError):
+        run(main(task_cf_file, async_export_yolo))
+    with pytest.raises(RuntimeError):
+        run(main(task_od_file, async_export_class_folder))
+
+
+def test_async_download_image_http(tmp_path, task_cf_file):
+    from aiohttp import web
+    from singtown_ai.exporter import _async_download_images
+
+    authorization = []
+
+    async def image(request):
+        authorization.append(request.headers.get("Authorization"))
+        if request.match_info["name"] == "missing.jpg":
+            raise web.HTTPNotFound()
+        return web.Response(body=b"http image content")
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/images/{name}", image)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        try:
+            async with AsyncSingTownAIClient(mock_task_path=task_cf_file) as client:
+                url = f"http://127.0.0.1:{port}/images/cat.jpg"
+                filepath = await client.download_image(url, tmp_path / "images")
+                missing = f"http://127.0.0.1:{port}/images/missing.jpg"
+                with pytest.raises(ExportError) as excinfo:
+                    await _async_download_images(
+                        client, [(missing, tmp_path, "missing.jpg")]
+                    )
+                assert excinfo.value.errors[0][0] == missing
+                assert authorization == [None, None]
+                await client.get(url)
+                assert authorization[-1] == f"Bearer {client.token}"
+                return filepath
+        finally:
+            await runner.cleanup()
+
+    filepath = run(main())
+    assert filepath.read_bytes() == b"http image content"
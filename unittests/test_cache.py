@@ -0,0 +1,123 @@
+from singtown_ai import SingTownAIClient, export_class_folder
+from singtown_ai.cache import ImageCache, file_lock
+import os
+import threading
+
+
+def test_cache_content_addressed(tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    (tmp_path / "a/cat.jpg").write_bytes(b"same")
+    (tmp_path / "b/cat.jpg").write_bytes(b"same")
+    cache = ImageCache(tmp_path / "cache")
+    first = cache.fetch(str(tmp_path / "a/cat.jpg"))
+    second = cache.fetch(str(tmp_path / "b/cat.jpg"))
+    assert first == second
+    assert first.read_bytes() == b"same"
+    assert len(list((tmp_path / "cache/objects").glob("*/*"))) == 1
+    assert len(list((tmp_path / "cache/urls").glob("*/*"))) == 2
+
+
+def test_cache_hit(tmp_path):
+    image = tmp_path / "cat.jpg"
+    image.write_bytes(b"v1")
+    cache = ImageCache(tmp_path / "cache")
+    cache.fetch(str(image))
+    image.write_bytes(b"v2")
+    assert cache.fetch(str(image)).read_bytes() == b"v1"
+
+
+def test_cache_hit_verify(tmp_path):
+    import hashlib
+
+    image = tmp_path / "cat.jpg"
+    image.write_bytes(b"v1")
+    cache = ImageCache(tmp_path / "cache")
+    cache.fetch(str(image))
+    image.write_bytes(b"v2.")
+    sha256 = hashlib.sha256(b"v2.").hexdigest()
+    assert cache.fetch(str(image), sha256=sha256.upper()).read_bytes() == b"v2."
+    assert cache.fetch(str(image)).read_bytes() == b"v2."
+    image.write_bytes(b"v3")
+    assert cache.fetch(str(image), size=2).read_bytes() == b"v3"
+
+
+def test_cache_materialize_hardlink(tmp_path):
+    image = tmp_path / "cat.jpg"
+    image.write_bytes(b"content")
+    cache = ImageCache(tmp_path / "cache")
+    target = cache.materialize(str(image), tmp_path / "export/cat.jpg")
+    assert target.read_bytes() == b"content"
+    assert os.stat(target).st_ino == os.stat(cache.fetch(str(image))).st_ino
+
+
+def test_cache_evict(tmp_path):
+    cache = ImageCache(tmp_path / "cache", max_bytes=10)
+    paths = []
+    for i in range(4):
+        image = tmp_path / f"{i}.jpg"
+        image.write_bytes(f"content{i}".encode())
+        paths.append(cache.fetch(str(image)))
+        os.utime(paths[-1], (i, i))
+    cache.evict()
+    assert [path.exists() for path in paths] == [False, False, False, True]
+    assert cache.fetch(str(tmp_path / "0.jpg")).read_bytes() == b"content0"
+
+
+def test_file_lock(tmp_path):
+    history = []
+
+    def worker(i):
+        with file_lock(tmp_path / "lock"):
+            history.append(("enter", i))
+            history.append(("exit", i))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for i in range(0, len(history), 2):
+        assert history[i][1] == history[i + 1][1]
+
+
+def test_client_cache_dir(tmp_path, task_cf_file, dataset_cf_file):
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file,
+        mock_dataset_path=dataset_cf_file,
+        cache_dir=tmp_path / "cache",
+    )
+    export_class_folder(client, tmp_path / "dataset1")
+    for image in (tmp_path / "images").iterdir():
+        image.unlink()
+    export_class_folder(client, tmp_path / "dataset2")
+    assert len(os.listdir(tmp_path / "dataset2/TRAIN/cat")) == 7
+    assert (tmp_path / "dataset2/TRAIN/cat/cat.0.jpg").read_bytes() == (
+        b"fake image content"
+    )
+    assert len(list((tmp_path / "cache/objects").glob("*/*"))) == 1
+
+
+def test_export_same_filename(tmp_path, task_cf_file):
+    import json
+
+    dataset = []
+    for folder in ("a", "b"):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / "cat.jpg").write_bytes(folder.encode())
+        dataset.append(
+            {
+                "url": str(tmp_path / folder / "cat.jpg"),
+                "subset": "TRAIN",
+                "classification": "cat",
+            }
+        )
+    p = tmp_path / "MOCK_DATASET_CF.json"
+    p.write_text(json.dumps(dataset))
+    client = SingTownAIClient(mock_task_path=task_cf_file, mock_dataset_path=p)
+    export_class_folder(client, tmp_path / "dataset")
+    names = sorted(os.listdir(tmp_path / "dataset/TRAIN/cat"))
+    assert names[0] == "cat.jpg"
+    assert names[1].startswith("cat_") and names[1].endswith(".jpg")
+    contents = {(tmp_path / "dataset/TRAIN/cat" / n).read_bytes() for n in names}
+    assert contents == {b"a", b"b"}
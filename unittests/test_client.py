@@ -152,3 +152,752 @@ def test_download_image_exists(tmp_path, task_cf_file, dataset_cf_file):
     filepath = client.download_image(annotation.url, folder)
     assert dst.absolute() == filepath.absolute()
     assert filepath.read_bytes() == b"fake image content not exists"
+
+
+def test_session_reused(task_cf_file):
+    client = SingTownAIClient(mock_task_path=task_cf_file)
+    session = client.session
+    client.log("a")
+    client.log("b")
+    assert client.session is session
+    assert client.mocker.call_count == 4
+
+
+def test_keep_alive_disabled(task_cf_file):
+    client = SingTownAIClient(mock_task_path=task_cf_file, keep_alive=False)
+    client.log("a")
+    assert client.mocker.last_request.headers["Connection"] == "close"
+
+
+def test_concurrent_requests(task_cf_file):
+    import threading
+
+    client = SingTownAIClient(mock_task_path=task_cf_file)
+    barrier = threading.Barrier(4, timeout=5)
+
+    def callback(request, context):
+        barrier.wait()
+        return ""
+
+    client.mocker.register_uri(
+        "POST", f"{client.host}/api/v1/task/tasks/{client.task_id}/logs", text=callback
+    )
+    threads = [threading.Thread(target=client.log, args=(str(i),)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(client.task.logs) == 4
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1024])
+def test_iter_json_array(chunk_size):
+    from singtown_ai.client import iter_json_array
+
+    content = ' [ {"a": [1, 2]}, {"b": "]中"} ,3,\n"x"] '.encode()
+    chunks = [content[i : i + chunk_size] for i in range(0, len(content), chunk_size)]
+    assert list(iter_json_array(chunks)) == [{"a": [1, 2]}, {"b": "]中"}, 3, "x"]
+    assert list(iter_json_array([b"[]"])) == []
+
+
+@pytest.mark.parametrize("content", [b"{}", b"[1,", b"[1,]", b"[1 2]"])
+def test_iter_json_array_invalid(content):
+    from singtown_ai.client import iter_json_array
+
+    with pytest.raises(ValueError):
+        list(iter_json_array([content]))
+
+
+def test_stream_dataset(task_cf_file, dataset_cf_file):
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file,
+        mock_dataset_path=dataset_cf_file,
+        stream_dataset=True,
+    )
+    assert client.mocker.call_count == 1
+    assert len(list(client.dataset)) == 20
+    assert len(list(client.dataset)) == 20
+
+
+def test_stream_dataset_pages(task_cf_file):
+    client = SingTownAIClient(mock_task_path=task_cf_file, stream_dataset=True)
+    url = f"{client.host}/api/v1/task/tasks/{client.task_id}/dataset"
+    client.mocker.register_uri(
+        "GET",
+        url,
+        json=[{"url": "a.jpg", "subset": "TRAIN", "classification": "cat"}],
+        headers={"Link": '<dataset?page=2>; rel="next"'},
+    )
+    client.mocker.register_uri(
+        "GET",
+        f"{url}?page=2",
+        json=[{"url": "b.jpg", "subset": "TEST", "classification": "dog"}],
+    )
+    assert [annotation.url for annotation in client.dataset] == ["a.jpg", "b.jpg"]
+
+
+def test_log_batch_size(task_cf_file):
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file, log_batch_size=3, log_flush_interval=60
+    )
+    for i in range(7):
+        client.log(str(i))
+    batches = [r.json() for r in client.mocker.request_history if r.method == "POST"]
+    assert [[log["content"] for log in batch] for batch in batches] == [
+        ["0\n", "1\n", "2\n"],
+        ["3\n", "4\n", "5\n"],
+    ]
+    client.flush_logs()
+    assert client.mocker.last_request.json()[0]["content"] == "6\n"
+    assert len(client.task.logs) == 7
+
+
+def test_log_batch_bytes(task_cf_file):
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file,
+        log_batch_size=100,
+        log_batch_bytes=10,
+        log_flush_interval=60,
+    )
+    client.log("12345")
+    assert client.mocker.call_count == 2
+    client.log("67890")
+    assert client.mocker.call_count == 3
+    assert len(client.mocker.last_request.json()) == 2
+
+
+def test_log_batch_interval(task_cf_file):
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file, log_batch_size=100, log_flush_interval=0.1
+    )
+    client.log("train started")
+    time.sleep(0.3)
+    assert client.mocker.last_request.url.endswith("/logs/batch")
+    assert client.mocker.last_request.json()[0]["content"] == "train started\n"
+
+
+def test_log_batch_close(task_cf_file, monkeypatch):
+    import atexit
+
+    unregistered = []
+    monkeypatch.setattr(atexit, "unregister", unregistered.append)
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file, log_batch_size=100, log_flush_interval=60
+    )
+    timer = client.log_batcher.thread
+    client.log("bye")
+    client.close()
+    assert client.mocker.last_request.json()[0]["content"] == "bye\n"
+    assert unregistered == [client.log_batcher.flush]
+    timer.join(1)
+    assert not timer.is_alive()
+    client.log_batcher.start()
+    assert client.log_batcher.thread is timer
+
+
+def test_log_batch_fallback(task_cf_file):
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file, log_batch_size=2, log_flush_interval=60
+    )
+    client.mocker.register_uri(
+        "POST",
+        f"{client.host}/api/v1/task/tasks/{client.task_id}/logs/batch",
+        status_code=404,
+    )
+    for i in range(4):
+        client.log(str(i))
+    entries = [
+        r.json() for r in client.mocker.request_history if r.url.endswith("/logs")
+    ]
+    assert [entry["content"] for entry in entries] == ["0\n", "1\n", "2\n", "3\n"]
+    assert entries[0]["timestamp"] <= entries[3]["timestamp"]
+    assert client.log_batcher.batch_supported is False
+
+
+def test_log_batch_requeue(task_cf_file):
+    from requests.exceptions import HTTPError
+
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file, log_batch_size=100, log_flush_interval=60
+    )
+    url = f"{client.host}/api/v1/task/tasks/{client.task_id}/logs/batch"
+    client.mocker.register_uri("POST", url, status_code=500)
+    client.log("a")
+    with pytest.raises(HTTPError):
+        client.flush_logs()
+    client.mocker.register_uri("POST", url)
+    client.log("b")
+    client.flush_logs()
+    assert [log["content"] for log in client.mocker.last_request.json()] == [
+        "a\n",
+        "b\n",
+    ]
+
+
+def metrics_requests(client):
+    return [
+        (request.path.rsplit("/", 1)[-1], request.json())
+        for request in client.mocker.request_history
+        if request.method == "POST"
+    ]
+
+
+def test_update_metrics_delta(task_cf_file):
+    client = SingTownAIClient(mock_task_path=task_cf_file)
+    metrics = []
+    for i in range(3):
+        metrics.append({"epoch": i})
+        client.update_metrics(metrics)
+    client.update_metrics(metrics)
+    assert metrics_requests(client) == [
+        ("metrics", [{"epoch": 0}]),
+        ("metrics", [{"epoch": 1}]),
+        ("metrics", [{"epoch": 2}]),
+    ]
+    assert client.task.metrics == metrics
+
+
+def test_update_metrics_changed(task_cf_file):
+    client = SingTownAIClient(mock_task_path=task_cf_file)
+    client.update_metrics([{"epoch": 0, "loss": 0.5}])
+    client.update_metrics([{"epoch": 0, "loss": 0.4}, {"epoch": 1, "loss": 0.3}])
+    assert metrics_requests(client)[-1] == (
+        "0",
+        {"metrics": [{"epoch": 0, "loss": 0.4}, {"epoch": 1, "loss": 0.3}]},
+    )
+
+
+def test_append_metrics(task_cf_file):
+    from requests.exceptions import HTTPError
+
+    client = SingTownAIClient(mock_task_path=task_cf_file)
+    url = f"{client.host}/api/v1/task/tasks/{client.task_id}/metrics"
+    client.mocker.register_uri("POST", url, status_code=500)
+    with pytest.raises(HTTPError):
+        client.append_metrics([{"epoch": 0}])
+    client.mocker.register_uri("POST", url)
+    client.append_metrics([{"epoch": 1}])
+    assert metrics_requests(client)[-1] == ("metrics", [{"epoch": 0}, {"epoch": 1}])
+    assert client.task.metrics == [{"epoch": 0}, {"epoch": 1}]
+
+
+def test_append_metrics_fallback(task_cf_file):
+    client = SingTownAIClient(mock_task_path=task_cf_file)
+    client.mocker.register_uri(
+        "POST",
+        f"{client.host}/api/v1/task/tasks/{client.task_id}/metrics",
+        status_code=404,
+    )
+    client.append_metrics([{"epoch": 0}])
+    client.append_metrics([{"epoch": 1}])
+    assert metrics_requests(client)[-1] == (
+        "0",
+        {"metrics": [{"epoch": 0}, {"epoch": 1}]},
+    )
+    assert client.metrics_append_supported is False
+
+
+def upload_requests(client):
+    return [
+        (request.method, request.path.split("/result", 1)[1])
+        for request in client.mocker.request_history
+        if "/result" in request.path
+    ]
+
+
+def test_upload_results_zip_chunked(tmp_path, task_cf_file):
+    uploadfile = tmp_path / "result.zip"
+    uploadfile.write_bytes(b"0123456789")
+    client = SingTownAIClient(mock_task_path=task_cf_file)
+    history = []
+    client.upload_results_zip(
+        uploadfile,
+        chunk_size=4,
+        progress=lambda sent, total, rate: history.append((sent, total)),
+    )
+    requests = upload_requests(client)
+    assert requests[0] == ("POST", "/uploads")
+    assert sorted(requests[1:4]) == [
+        ("PUT", "/uploads/mock/parts/0"),
+        ("PUT", "/uploads/mock/parts/1"),
+        ("PUT", "/uploads/mock/parts/2"),
+    ]
+    assert requests[4] == ("POST", "/uploads/mock/complete")
+    parts = {
+        r.path.rsplit("/", 1)[1]: r.body
+        for r in client.mocker.request_history
+        if r.method == "PUT"
+    }
+    assert parts == {"0": b"0123", "1": b"4567", "2": b"89"}
+    assert history[-1] == (10, 10)
+    assert not (tmp_path / "result.zip.upload").exists()
+
+
+def test_upload_results_zip_resume(tmp_path, task_cf_file):
+    import json
+    import os
+
+    uploadfile = tmp_path / "result.zip"
+    uploadfile.write_bytes(b"0123456789")
+    stat = os.stat(uploadfile)
+    journal = {
+        "uploadId": "mock",
+        "size": 10,
+        "mtime": stat.st_mtime_ns,
+        "chunkSize": 4,
+        "parts": [0, 2],
+    }
+    (tmp_path / "result.zip.upload").write_text(json.dumps(journal))
+    client = SingTownAIClient(mock_task_path=task_cf_file)
+    client.upload_results_zip(uploadfile, chunk_size=4)
+    assert upload_requests(client) == [
+        ("PUT", "/uploads/mock/parts/1"),
+        ("POST", "/uploads/mock/complete"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "parts, status, failed",
+    [
+        ([0, 2], 410, ("PUT", "/uploads/expired/parts/1")),
+        ([0, 1, 2], 404, ("POST", "/uploads/expired/complete")),
+    ],
+)
+def test_upload_results_zip_resume_expired(
+    tmp_path, task_cf_file, parts, status, failed
+):
+    import json
+    import os
+    import re
+    import requests_mock
+
+    uploadfile = tmp_path / "result.zip"
+    uploadfile.write_bytes(b"0123456789")
+    stat = os.stat(uploadfile)
+    journal = {
+        "uploadId": "expired",
+        "size": 10,
+        "mtime": stat.st_mtime_ns,
+        "chunkSize": 4,
+        "parts": parts,
+    }
+    (tmp_path / "result.zip.upload").write_text(json.dumps(journal))
+    client = SingTownAIClient(mock_task_path=task_cf_file)
+    client.mocker.register_uri(
+        requests_mock.ANY,
+        re.compile(".*/result/uploads/expired/.*"),
+        status_code=status,
+    )
+    client.upload_results_zip(uploadfile, chunk_size=4)
+    requests = upload_requests(client)
+    assert requests[0] == failed
+    assert requests[1] == ("POST", "/uploads")
+    assert sorted(requests[2:5]) == [
+        ("PUT", "/uploads/mock/parts/0"),
+        ("PUT", "/uploads/mock/parts/1"),
+        ("PUT", "/uploads/mock/parts/2"),
+    ]
+    assert requests[5:] == [("POST", "/uploads/mock/complete")]
+    assert not (tmp_path / "result.zip.upload").exists()
+
+
+def test_upload_results_zip_retry_part(tmp_path, task_cf_file):
+    uploadfile = tmp_path / "result.zip"
+    uploadfile.write_bytes(b"0123")
+    client = SingTownAIClient(mock_task_path=task_cf_file)
+    client.mocker.register_uri(
+        "PUT",
+        f"{client.host}/api/v1/task/tasks/{client.task_id}/result/uploads/mock/parts/0",
+        [{"status_code": 503}, {"status_code": 200}],
+    )
+    client.upload_results_zip(uploadfile, chunk_size=4)
+    assert upload_requests(client).count(("PUT", "/uploads/mock/parts/0")) == 2
+
+
+def test_upload_results_zip_chunked_fallback(tmp_path, task_cf_file):
+    uploadfile = tmp_path / "result.zip"
+    uploadfile.write_bytes(b"0123456789")
+    client = SingTownAIClient(mock_task_path=task_cf_file)
+    client.mocker.register_uri(
+        "POST",
+        f"{client.host}/api/v1/task/tasks/{client.task_id}/result/uploads",
+        status_code=404,
+    )
+    client.upload_results_zip(uploadfile, chunk_size=4)
+    assert upload_requests(client) == [("POST", "/uploads"), ("POST", "")]
+
+
+def test_download_image_verify(tmp_path, task_cf_file, dataset_cf_file):
+    import hashlib
+
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file,
+        mock_dataset_path=dataset_cf_file,
+        download_chunk_size=4,
+    )
+    url = client.dataset[0].url
+    folder = tmp_path / "verified"
+    with pytest.raises(ValueError):
+        client.download_image(url, folder, size=3)
+    with pytest.raises(ValueError):
+        client.download_image(url, folder, sha256="0" * 64)
+    assert list(folder.iterdir()) == []
+
+    sha256 = hashlib.sha256(b"fake image content").hexdigest()
+    filepath = client.download_image(url, folder, size=18, sha256=sha256)
+    assert filepath.read_bytes() == b"fake image content"
+    assert list(folder.iterdir()) == [filepath]
+
+
+def test_download_image_interrupted(tmp_path, monkeypatch):
+    import fsspec
+    from singtown_ai.download import download_file
+
+    class Broken:
+        def __init__(self):
+            self.chunks = [b"partial", OSError("connection reset")]
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+        def read(self, size):
+            chunk = self.chunks.pop(0)
+            if isinstance(chunk, Exception):
+                raise chunk
+            return chunk
+
+    monkeypatch.setattr(fsspec, "open", lambda url, mode: Broken())
+    with pytest.raises(OSError):
+        download_file("memory://cat.jpg", tmp_path)
+    assert list(tmp_path.iterdir()) == []
+
+
+def register_etag_server(client, task_file, dataset_file, history):
+    def handler(body):
+        def callback(request, context):
+            history.append(request.headers.get("If-None-Match"))
+            context.headers["ETag"] = '"v1"'
+            if request.headers.get("If-None-Match") == '"v1"':
+                context.status_code = 304
+                return b""
+            return body
+
+        return callback
+
+    with open(dataset_file, "rb") as f:
+        dataset = f.read()
+    with open(task_file, "rb") as f:
+        task = f.read()
+    url = f"{client.host}/api/v1/task/tasks/{client.task_id}"
+    client.mocker.register_uri("GET", url, content=handler(task))
+    client.mocker.register_uri("GET", f"{url}/dataset", content=handler(dataset))
+
+
+def test_snapshot_revalidate(tmp_path, task_od_file, dataset_od_file):
+    history = []
+    snapshot_dir = tmp_path / "snapshots"
+    first = SingTownAIClient(
+        mock_task_path=task_od_file, stream_dataset=True, snapshot_dir=snapshot_dir
+    )
+    register_etag_server(first, task_od_file, dataset_od_file, history)
+    assert len(list(first.dataset)) == 20
+    assert len(list(snapshot_dir.glob("*.json.gz"))) == 1
+    assert len(list(first.dataset)) == 20
+    assert history == [None, '"v1"']
+
+    second = SingTownAIClient(
+        mock_task_path=task_od_file, stream_dataset=True, snapshot_dir=snapshot_dir
+    )
+    register_etag_server(second, task_od_file, dataset_od_file, history)
+    assert [a.url for a in second.dataset] == [a.url for a in first.dataset]
+    assert second.mocker.last_request.headers["If-None-Match"] == '"v1"'
+
+
+def test_snapshot_partial_read_not_saved(tmp_path, task_od_file, dataset_od_file):
+    history = []
+    snapshot_dir = tmp_path / "snapshots"
+    client = SingTownAIClient(
+        mock_task_path=task_od_file, stream_dataset=True, snapshot_dir=snapshot_dir
+    )
+    register_etag_server(client, task_od_file, dataset_od_file, history)
+    iterator = iter(client.dataset)
+    next(iterator)
+    iterator.close()
+    assert list(snapshot_dir.iterdir()) == []
+
+
+def test_prefetch_lazy(task_cf_file, dataset_cf_file):
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file,
+        mock_dataset_path=dataset_cf_file,
+        prefetch="lazy",
+    )
+    assert client.mocker.call_count == 0
+    client.log("sidecar")
+    client.update_metrics([{"epoch": 0}])
+    assert client.mocker.call_count == 2
+    assert client.mocker.last_request.json() == {"metrics": [{"epoch": 0}]}
+    assert len(client.dataset) == 20
+    assert client.task.project.type == "CLASSIFICATION"
+    assert client.mocker.call_count == 4
+
+
+def test_prefetch_background(task_cf_file, dataset_cf_file):
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file,
+        mock_dataset_path=dataset_cf_file,
+        prefetch="background",
+    )
+    client.prefetch_thread.join()
+    assert client.mocker.call_count == 2
+    assert len(client.dataset) == 20
+    assert client.mocker.call_count == 2
+
+
+def test_prefetch_background_error():
+    from requests.exceptions import HTTPError
+    import requests_mock
+
+    with requests_mock.Mocker() as m:
+        m.register_uri(requests_mock.ANY, requests_mock.ANY, status_code=500)
+        client = SingTownAIClient(prefetch="background")
+        client.prefetch_thread.join()
+        with pytest.raises(HTTPError):
+            client.task
+
+
+def test_prefetch_concurrent_access(task_cf_file, dataset_cf_file):
+    import threading
+
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file,
+        mock_dataset_path=dataset_cf_file,
+        prefetch="lazy",
+    )
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(client.dataset))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert client.mocker.call_count == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_prefetch_lazy_task_during_update_metrics(task_cf_file):
+    import json
+    import threading
+    import time
+
+    client = SingTownAIClient(mock_task_path=task_cf_file, prefetch="lazy")
+    fetching = threading.Event()
+
+    def get_task(request, context):
+        fetching.set()
+        time.sleep(0.2)
+        return json.loads(open(task_cf_file).read())
+
+    client.mocker.register_uri(
+        "GET", f"{client.host}/api/v1/task/tasks/{client.task_id}", json=get_task
+    )
+    reader = threading.Thread(target=lambda: client.task, daemon=True)
+    writer = threading.Thread(
+        target=lambda: client.update_metrics([{"epoch": 0}]), daemon=True
+    )
+    reader.start()
+    fetching.wait(5)
+    writer.start()
+    reader.join(5)
+    writer.join(5)
+    assert not reader.is_alive() and not writer.is_alive()
+    assert client.task.metrics == [{"epoch": 0}]
+
+
+def test_prefetch_invalid(task_cf_file):
+    with pytest.raises(ValueError):
+        SingTownAIClient(mock_task_path=task_cf_file, prefetch="never")
+
+
+def test_request_retry(task_cf_file):
+    client = SingTownAIClient(mock_task_path=task_cf_file, backoff_factor=0)
+    url = f"{client.host}/api/v1/task/tasks/{client.task_id}"
+    client.mocker.register_uri(
+        "GET",
+        url,
+        [{"status_code": 503}, {"status_code": 502}, {"json": {"ok": True}}],
+    )
+    assert client.get(url).json() == {"ok": True}
+    assert client.stats.retries == 2
+
+
+def test_request_retry_non_idempotent(task_cf_file):
+    from requests.exceptions import HTTPError
+
+    client = SingTownAIClient(mock_task_path=task_cf_file, backoff_factor=0)
+    url = f"{client.host}/api/v1/task/tasks/{client.task_id}/logs"
+    client.mocker.register_uri("POST", url, status_code=500)
+    with pytest.raises(HTTPError):
+        client.log("a")
+    assert client.stats.retries == 0
+    client.mocker.register_uri(
+        "POST",
+        url,
+        [{"status_code": 429, "headers": {"Retry-After": "0"}}, {"status_code": 200}],
+    )
+    client.log("b")
+    assert client.stats.retries == 1
+
+
+def test_request_retry_exhausted(task_cf_file):
+    from requests.exceptions import HTTPError
+
+    client = SingTownAIClient(mock_task_path=task_cf_file, retries=2, backoff_factor=0)
+    url = f"{client.host}/api/v1/task/tasks/{client.task_id}"
+    client.mocker.register_uri("POST", url, status_code=503)
+    with pytest.raises(HTTPError):
+        client.post(url, json={}, idempotent=True)
+    assert client.stats.retries == 2
+
+
+def test_request_retry_after():
+    from email.utils import formatdate
+    from singtown_ai.retry import retry_after
+
+    assert retry_after("2") == 2.0
+    assert retry_after(None) is None
+    assert retry_after("soon") is None
+    assert 8 < retry_after(formatdate(time.time() + 10, usegmt=True)) <= 10
+
+
+def test_request_rate_limit(task_cf_file):
+    client = SingTownAIClient(mock_task_path=task_cf_file, rate_limit=50, rate_burst=1)
+    start = time.monotonic()
+    for i in range(5):
+        client.log(str(i))
+    assert time.monotonic() - start >= 0.07
+    assert client.stats.throttled >= 4
+    assert client.stats.as_dict()["requests"] == client.stats.requests
+
+
+def test_post_json_compress(task_cf_file):
+    import gzip
+    import json
+
+    client = SingTownAIClient(mock_task_path=task_cf_file, compress="gzip")
+    client.log("x" * 2000)
+    request = client.mocker.last_request
+    assert request.headers["Content-Encoding"] == "gzip"
+    assert len(request.body) < 200
+    assert json.loads(gzip.decompress(request.body))["content"] == "x" * 2000 + "\n"
+    client.log("short")
+    assert "Content-Encoding" not in client.mocker.last_request.headers
+    assert client.mocker.last_request.json()["content"] == "short\n"
+
+
+def test_post_json_compress_zstd(task_cf_file):
+    zstandard = pytest.importorskip("zstandard")
+    import json
+
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file, compress="zstd", compress_min_bytes=0
+    )
+    client.update_metrics([{"epoch": 0, "loss": 0.5}])
+    request = client.mocker.last_request
+    assert request.headers["Content-Encoding"] == "zstd"
+    body = zstandard.ZstdDecompressor().decompressobj().decompress(request.body)
+    assert json.loads(body) == [{"epoch": 0, "loss": 0.5}]
+
+
+def test_post_json_compress_unsupported(task_cf_file):
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file, compress="gzip", compress_min_bytes=0
+    )
+    client.mocker.register_uri(
+        "POST",
+        f"{client.host}/api/v1/task/tasks/{client.task_id}/logs",
+        [{"status_code": 415}, {"status_code": 200}],
+    )
+    client.log("a")
+    assert "Content-Encoding" not in client.mocker.last_request.headers
+    assert client.mocker.last_request.json()["content"] == "a\n"
+    assert client.compress is None
+
+
+def test_post_json_compress_bad_request(task_cf_file):
+    from requests.exceptions import HTTPError
+
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file, compress="gzip", compress_min_bytes=0
+    )
+    client.mocker.register_uri(
+        "POST",
+        f"{client.host}/api/v1/task/tasks/{client.task_id}/metrics",
+        status_code=400,
+    )
+    with pytest.raises(HTTPError):
+        client.update_metrics([{"epoch": 0, "loss": 0.5}])
+    assert client.mocker.last_request.headers["Content-Encoding"] == "gzip"
+    assert client.compress == "gzip"
+
+
+def test_post_json_compress_unknown(task_cf_file):
+    with pytest.raises(ValueError):
+        SingTownAIClient(mock_task_path=task_cf_file, compress="brotli")
+
+
+def test_parse_annotations(dataset_od_file):
+    import gc
+    import json
+    from pydantic import ValidationError
+    from singtown_ai.type import Annotation, parse_annotations
+
+    with open(dataset_od_file, "rb") as f:
+        data = f.read()
+    assert parse_annotations(data) == [Annotation(**item) for item in json.loads(data)]
+    assert gc.isenabled()
+    with pytest.raises(ValidationError):
+        parse_annotations(b'{"url": "a.jpg"}')
+    with pytest.raises(ValidationError):
+        parse_annotations(b'[{"url": "a.jpg", "subset": "OTHER"}]')
+    assert gc.isenabled()
+
+
+def test_parse_annotations_thread_keeps_gc(dataset_od_file, monkeypatch):
+    import gc
+    import threading
+    from singtown_ai.type import parse_annotations
+
+    def disable():
+        raise AssertionError("gc disabled off the main thread")
+
+    with open(dataset_od_file, "rb") as f:
+        data = f.read()
+    monkeypatch.setattr(gc, "disable", disable)
+    result = []
+    thread = threading.Thread(target=lambda: result.append(parse_annotations(data)))
+    thread.start()
+    thread.join()
+    assert len(result) == 1
+
+
+def test_dataset_pages_eager(task_cf_file):
+    client = SingTownAIClient(mock_task_path=task_cf_file, prefetch="lazy")
+    url = f"{client.host}/api/v1/task/tasks/{client.task_id}/dataset"
+    client.mocker.register_uri(
+        "GET",
+        url,
+        json=[{"url": "a.jpg", "subset": "TRAIN", "classification": "cat"}],
+        headers={"Link": f'<{url}?page=2>; rel="next"'},
+    )
+    client.mocker.register_uri(
+        "GET",
+        f"{url}?page=2",
+        json=[{"url": "b.jpg", "subset": "TEST", "classification": "dog"}],
+    )
+    assert [annotation.url for annotation in client.dataset] == ["a.jpg", "b.jpg"]
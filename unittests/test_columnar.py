@@ -0,0 +1,110 @@
+from singtown_ai import SingTownAIClient
+from singtown_ai.columnar import ColumnarDataset
+import numpy as np
+import pytest
+
+
+def test_columnar_object_detection(task_od_file, dataset_od_file):
+    client = SingTownAIClient(
+        mock_task_path=task_od_file, mock_dataset_path=dataset_od_file
+    )
+    columnar = client.columnar
+    assert len(columnar) == len(client.dataset)
+    for annotation, expected in zip(columnar, client.dataset):
+        assert annotation.url == expected.url
+        assert annotation.subset == expected.subset
+        for box, expected_box in zip(
+            annotation.object_detection, expected.object_detection
+        ):
+            assert box.label == expected_box.label
+            assert box.xmin == pytest.approx(expected_box.xmin, abs=1e-6)
+            assert box.ymax == pytest.approx(expected_box.ymax, abs=1e-6)
+    assert columnar[-1].url == client.dataset[-1].url
+    assert columnar.urls == [annotation.url for annotation in client.dataset]
+    assert columnar.boxes.dtype == np.float32
+    assert columnar.boxes.shape == (len(columnar.box_labels), 4)
+    assert columnar.box_counts.tolist() == [
+        len(annotation.object_detection) for annotation in client.dataset
+    ]
+    train = [a for a in client.dataset if a.subset == "TRAIN"]
+    assert columnar.subset_mask("TRAIN").sum() == len(train)
+    counts = columnar.box_label_counts("TRAIN")
+    for i, label in enumerate(columnar.labels):
+        assert counts[i] == sum(
+            box.label == label for a in train for box in a.object_detection
+        )
+    assert columnar.nbytes > 0
+    with pytest.raises(IndexError):
+        columnar[len(columnar)]
+
+
+def test_columnar_classification(task_cf_file, dataset_cf_file):
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file,
+        mock_dataset_path=dataset_cf_file,
+        prefetch="lazy",
+        stream_dataset=True,
+    )
+    columnar = client.columnar
+    assert client.columnar is columnar
+    assert list(columnar) == list(client.dataset)
+    assert columnar.class_counts().sum() == len(columnar)
+    assert len(columnar.boxes) == 0
+    client.dataset = list(client.dataset)[:3]
+    assert len(client.columnar) == 3
+
+
+def test_columnar_unknown_label():
+    from singtown_ai.type import Annotation
+
+    annotation = Annotation(url="a.jpg", subset="TRAIN", classification="fish")
+    with pytest.raises(ValueError):
+        ColumnarDataset.from_annotations([annotation], ["cat", "dog"])
+
+
+def test_columnar_export_yolo(tmp_path, task_od_file, dataset_od_file, monkeypatch):
+    from singtown_ai import export_yolo
+
+    client = SingTownAIClient(
+        mock_task_path=task_od_file, mock_dataset_path=dataset_od_file
+    )
+    columnar = client.columnar
+    export_yolo(client, tmp_path / "expected", dataset=list(columnar))
+
+    def fail(self):
+        raise AssertionError("boxes must be read from the arrays")
+
+    monkeypatch.setattr(
+        "singtown_ai.type.Annotation.object_detection", property(fail), raising=False
+    )
+    export_yolo(client, tmp_path / "columnar", dataset=columnar)
+    for subset in ("TRAIN", "VALID", "TEST"):
+        expected = tmp_path / "expected" / "labels" / subset
+        for path in expected.iterdir():
+            actual = tmp_path / "columnar" / "labels" / subset / path.name
+            assert actual.read_text() == path.read_text()
+
+
+def test_columnar_index_statistics(task_od_file, dataset_od_file):
+    from singtown_ai.index import DatasetIndex
+
+    client = SingTownAIClient(
+        mock_task_path=task_od_file, mock_dataset_path=dataset_od_file
+    )
+    labels = client.task.project.labels
+    index = DatasetIndex(client.columnar, labels)
+    assert index.columnar is client.columnar
+    expected = DatasetIndex(list(client.columnar), labels).statistics()
+    assert index.statistics() == expected
+
+
+def test_columnar_slice(task_od_file, dataset_od_file):
+    client = SingTownAIClient(
+        mock_task_path=task_od_file, mock_dataset_path=dataset_od_file
+    )
+    columnar = client.columnar
+    assert list(columnar[3:9]) == list(columnar)[3:9]
+    assert list(columnar[-2:]) == list(columnar)[-2:]
+    assert len(columnar[5:2]) == 0
+    with pytest.raises(ValueError):
+        columnar[::2]
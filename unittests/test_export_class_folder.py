@@ -38,3 +38,130 @@ def test_export_class_folder_typeerror(tmp_path, task_od_file):
     export_path = tmp_path / "dataset"
     with pytest.raises(RuntimeError):
         export_class_folder(client, export_path)
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_export_class_folder_max_workers(
+    tmp_path, task_cf_file, dataset_cf_file, max_workers
+):
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file,
+        mock_dataset_path=dataset_cf_file,
+    )
+    export_path = tmp_path / "dataset"
+    export_class_folder(client, export_path, max_workers=max_workers)
+    assert len(os.listdir(export_path / "TRAIN/cat")) == 7
+    assert len(os.listdir(export_path / "TEST/dog")) == 1
+
+
+def test_export_class_folder_errors(tmp_path, task_cf_file, dataset_cf_file):
+    from singtown_ai import ExportError
+
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file,
+        mock_dataset_path=dataset_cf_file,
+    )
+    os.remove(tmp_path / "images/cat.3.jpg")
+    os.remove(tmp_path / "images/dog.1.jpg")
+    export_path = tmp_path / "dataset"
+    with pytest.raises(ExportError) as excinfo:
+        export_class_folder(client, export_path)
+    assert [url for url, _ in excinfo.value.errors] == [
+        f"{tmp_path}/images/cat.3.jpg",
+        f"{tmp_path}/images/dog.1.jpg",
+    ]
+    assert len(os.listdir(export_path / "TRAIN/cat")) == 6
+    assert len(os.listdir(export_path / "TRAIN/dog")) == 6
+
+
+def test_export_class_folder_query(tmp_path, task_cf_file, dataset_cf_file):
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file,
+        mock_dataset_path=dataset_cf_file,
+    )
+    export_path = tmp_path / "dataset"
+    export_class_folder(
+        client, export_path, dataset=client.index.filter(labels=["dog"])
+    )
+    assert len(os.listdir(export_path / "TRAIN/dog")) == 7
+    assert not (export_path / "TRAIN/cat").exists()
+
+
+def test_start_export_class_folder(tmp_path, task_cf_file, dataset_cf_file):
+    from singtown_ai import start_export_class_folder
+
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file,
+        mock_dataset_path=dataset_cf_file,
+    )
+    subsets = []
+    download_image = client.download_image
+
+    def record(url, folder, filename=None):
+        subsets.append(folder.parent.name)
+        return download_image(url, folder, filename)
+
+    client.download_image = record
+    export_path = tmp_path / "dataset"
+    handle = start_export_class_folder(client, export_path, max_workers=1)
+    assert handle.wait(["TRAIN", "VALID"], timeout=10) == export_path
+    assert len(os.listdir(export_path / "TRAIN/cat")) == 7
+    assert len(os.listdir(export_path / "VALID/dog")) == 2
+    assert handle.result(timeout=10) == export_path
+    assert handle.done()
+    assert subsets == ["TRAIN"] * 14 + ["VALID"] * 4 + ["TEST"] * 2
+    assert handle.classes["cat"].result() == export_path
+    assert handle.progress() == {
+        "total": 20,
+        "completed": 20,
+        "failed": 0,
+        "subsets": {"TRAIN": (14, 14), "VALID": (4, 4), "TEST": (2, 2)},
+    }
+
+
+def test_start_export_class_folder_errors(tmp_path, task_cf_file, dataset_cf_file):
+    from singtown_ai import ExportError, start_export_class_folder
+
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file,
+        mock_dataset_path=dataset_cf_file,
+    )
+    os.remove(tmp_path / "images/cat.3.jpg")
+    os.remove(tmp_path / "images/dog.1.jpg")
+    handle = start_export_class_folder(client, tmp_path / "dataset")
+    assert handle.wait(["VALID", "TEST"], timeout=10)
+    with pytest.raises(ExportError) as excinfo:
+        handle.wait(["TRAIN"], timeout=10)
+    assert len(excinfo.value.errors) == 2
+    with pytest.raises(ExportError) as excinfo:
+        handle.classes["cat"].result(timeout=10)
+    assert [url for url, _ in excinfo.value.errors] == [f"{tmp_path}/images/cat.3.jpg"]
+    with pytest.raises(ExportError):
+        handle.result(timeout=10)
+    assert handle.progress()["failed"] == 2
+
+
+def test_export_class_folder_incremental(tmp_path, task_cf_file, dataset_cf_file):
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file,
+        mock_dataset_path=dataset_cf_file,
+    )
+    export_path = tmp_path / "dataset"
+    export_class_folder(client, export_path)
+
+    dataset = [
+        annotation.model_copy(update={"classification": "dog"})
+        if annotation.url.endswith("cat.0.jpg")
+        else annotation
+        for annotation in client.dataset
+        if not annotation.url.endswith("dog.0.jpg")
+    ]
+    export_class_folder(client, export_path, dataset=dataset)
+    assert not (export_path / "TRAIN/cat/cat.0.jpg").exists()
+    assert (export_path / "TRAIN/dog/cat.0.jpg").exists()
+    assert not (export_path / "TRAIN/dog/dog.0.jpg").exists()
+    assert len(os.listdir(export_path / "TRAIN/cat")) == 6
+    assert len(os.listdir(export_path / "TRAIN/dog")) == 7
+
+    export_class_folder(client, export_path, manifest=False)
+    assert (export_path / "TRAIN/dog/dog.0.jpg").exists()
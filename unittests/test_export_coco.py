@@ -0,0 +1,133 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from singtown_ai import ExportError, SingTownAIClient, export_coco
+from .conftest import png_bytes
+
+
+def create_png_files(dataset, width=200, height=100):
+    for annotation in dataset:
+        img_path = Path(annotation["url"])
+        img_path.parent.mkdir(parents=True, exist_ok=True)
+        img_path.write_bytes(png_bytes(width, height))
+
+
+def test_export_coco(tmp_path, task_od_file):
+    box = {"label": "dog", "xmin": 0.25, "ymin": 0.1, "xmax": 0.75, "ymax": 0.6}
+    dataset = [
+        {
+            "url": f"{tmp_path}/images/cat.0.png",
+            "subset": "TRAIN",
+            "objectDetection": [box],
+        },
+        {"url": f"{tmp_path}/images/cat.1.png", "subset": "TRAIN"},
+        {
+            "url": f"{tmp_path}/images/cat.2.png",
+            "subset": "VALID",
+            "objectDetection": [box, box],
+        },
+    ]
+    p = tmp_path / "MOCK_DATASET_OD.json"
+    p.write_text(json.dumps(dataset))
+    create_png_files(dataset)
+
+    client = SingTownAIClient(mock_task_path=task_od_file, mock_dataset_path=p)
+    export_path = tmp_path / "dataset"
+    export_coco(client, export_path)
+    assert sorted(os.listdir(export_path / "annotations")) == [
+        "TRAIN.json",
+        "VALID.json",
+    ]
+    assert sorted(os.listdir(export_path / "images/TRAIN")) == [
+        "cat.0.png",
+        "cat.1.png",
+    ]
+
+    with open(export_path / "annotations/TRAIN.json") as f:
+        coco = json.load(f)
+    assert coco["categories"] == [
+        {"id": 1, "name": "cat", "supercategory": "none"},
+        {"id": 2, "name": "dog", "supercategory": "none"},
+    ]
+    images = {image["file_name"]: image for image in coco["images"]}
+    assert images["cat.0.png"]["width"] == 200
+    assert images["cat.0.png"]["height"] == 100
+    assert len(coco["annotations"]) == 1
+    annotation = coco["annotations"][0]
+    assert annotation["image_id"] == images["cat.0.png"]["id"]
+    assert annotation["category_id"] == 2
+    assert annotation["bbox"] == [50.0, 10.0, 100.0, 50.0]
+    assert annotation["area"] == 5000.0
+
+    with open(export_path / "annotations/VALID.json") as f:
+        coco = json.load(f)
+    assert [annotation["id"] for annotation in coco["annotations"]] == [1, 2]
+
+
+def test_export_coco_bad_image(tmp_path, task_od_file, dataset_od_file):
+    client = SingTownAIClient(
+        mock_task_path=task_od_file,
+        mock_dataset_path=dataset_od_file,
+    )
+    export_path = tmp_path / "dataset"
+    with pytest.raises(ExportError) as excinfo:
+        export_coco(client, export_path)
+    assert len(excinfo.value.errors) == 20
+    assert os.listdir(export_path / "annotations") == []
+
+
+def test_export_coco_deterministic_ids(tmp_path, task_od_file, monkeypatch):
+    import time
+
+    box = {"label": "dog", "xmin": 0.25, "ymin": 0.1, "xmax": 0.75, "ymax": 0.6}
+    dataset = [
+        {
+            "url": f"{tmp_path}/images/cat.{i}.png",
+            "subset": "TRAIN",
+            "objectDetection": [box] * (i % 3),
+        }
+        for i in range(6)
+    ]
+    p = tmp_path / "MOCK_DATASET_OD.json"
+    p.write_text(json.dumps(dataset))
+    create_png_files(dataset)
+    client = SingTownAIClient(mock_task_path=task_od_file, mock_dataset_path=p)
+    download_image = client.download_image
+
+    def reversed_download_image(url, *args, **kwargs):
+        time.sleep(0.05 * (6 - int(url.rsplit(".", 2)[1])))
+        return download_image(url, *args, **kwargs)
+
+    monkeypatch.setattr(client, "download_image", reversed_download_image)
+    export_coco(client, tmp_path / "dataset", max_workers=6)
+    with open(tmp_path / "dataset/annotations/TRAIN.json") as f:
+        coco = json.load(f)
+    assert [(image["id"], image["file_name"]) for image in coco["images"]] == [
+        (i + 1, f"cat.{i}.png") for i in range(6)
+    ]
+    assert [a["image_id"] for a in coco["annotations"]] == [2, 3, 3, 5, 6, 6]
+    assert [a["id"] for a in coco["annotations"]] == [1, 2, 3, 4, 5, 6]
+
+
+def test_export_coco_failed_download(tmp_path, task_od_file):
+    dataset = [
+        {"url": f"{tmp_path}/images/cat.{i}.png", "subset": "TRAIN"} for i in range(3)
+    ]
+    p = tmp_path / "MOCK_DATASET_OD.json"
+    p.write_text(json.dumps(dataset))
+    create_png_files(dataset[:2])
+    client = SingTownAIClient(mock_task_path=task_od_file, mock_dataset_path=p)
+    export_path = tmp_path / "dataset"
+    with pytest.raises(ExportError) as excinfo:
+        export_coco(client, export_path)
+    assert [url for url, _ in excinfo.value.errors] == [dataset[2]["url"]]
+    assert os.listdir(export_path / "annotations") == []
+
+
+def test_export_coco_typeerror(tmp_path, task_cf_file):
+    client = SingTownAIClient(mock_task_path=task_cf_file)
+    with pytest.raises(RuntimeError):
+        export_coco(client, tmp_path / "dataset")
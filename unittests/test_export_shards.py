@@ -0,0 +1,152 @@
+import json
+import struct
+import tarfile
+
+import pytest
+
+from singtown_ai import (
+    ExportError,
+    LabelError,
+    SingTownAIClient,
+    export_tfrecord,
+    export_webdataset,
+)
+from singtown_ai.shards import masked_crc32c
+
+
+def read_tfrecords(path):
+    records = []
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(12)
+            if not header:
+                return records
+            length, length_crc = struct.unpack("<QI", header)
+            assert length_crc == masked_crc32c(header[:8])
+            data = f.read(length)
+            (data_crc,) = struct.unpack("<I", f.read(4))
+            assert data_crc == masked_crc32c(data)
+            records.append(data)
+
+
+def test_export_webdataset(tmp_path, task_cf_file, dataset_cf_file):
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file,
+        mock_dataset_path=dataset_cf_file,
+    )
+    export_path = tmp_path / "shards"
+    shards = export_webdataset(client, export_path, shard_max_count=5)
+    assert [path.name for path in shards["TRAIN"]] == [
+        "TRAIN-000000.tar",
+        "TRAIN-000001.tar",
+        "TRAIN-000002.tar",
+    ]
+    assert [path.name for path in shards["TEST"]] == ["TEST-000000.tar"]
+    assert sorted(path.name for path in export_path.iterdir()) == sorted(
+        path.name for paths in shards.values() for path in paths
+    )
+
+    samples = {}
+    for path in shards["TRAIN"]:
+        with tarfile.open(path) as tar:
+            for member in tar.getmembers():
+                key, extension = member.name.split(".", 1)
+                samples.setdefault(key, {})[extension] = tar.extractfile(member).read()
+    assert len(samples) == 14
+    for sample in samples.values():
+        assert sorted(sample) == ["cls", "jpg", "json"]
+        assert sample["jpg"] == b"fake image content"
+        annotation = json.loads(sample["json"])
+        labels = client.task.project.labels
+        assert sample["cls"] == str(labels.index(annotation["classification"])).encode()
+
+
+def test_export_webdataset_dataset_order(
+    tmp_path, task_cf_file, dataset_cf_file, monkeypatch
+):
+    import time
+
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file,
+        mock_dataset_path=dataset_cf_file,
+    )
+    urls = [annotation.url for annotation in client.dataset]
+    download_image = client.download_image
+
+    def reversed_download_image(url, *args, **kwargs):
+        time.sleep(0.01 * (len(urls) - urls.index(url)))
+        return download_image(url, *args, **kwargs)
+
+    monkeypatch.setattr(client, "download_image", reversed_download_image)
+    shards = export_webdataset(client, tmp_path / "shards", shard_max_count=5)
+    names = []
+    for path in shards["TRAIN"]:
+        with tarfile.open(path) as tar:
+            names.extend(tar.getnames())
+    keys = [name.split(".", 1)[0] for name in names[::3]]
+    assert keys == [f"{i:09d}" for i in range(14)]
+    train = [a.url for a in client.dataset if a.subset == "TRAIN"]
+    with tarfile.open(shards["TRAIN"][0]) as tar:
+        samples = [json.loads(tar.extractfile(name).read()) for name in names[1:15:3]]
+    assert [sample["url"] for sample in samples] == train[:5]
+
+
+def test_export_webdataset_max_bytes(tmp_path, task_cf_file, dataset_cf_file):
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file,
+        mock_dataset_path=dataset_cf_file,
+    )
+    shards = export_webdataset(client, tmp_path / "shards", shard_max_bytes=1)
+    assert len(shards["TRAIN"]) == 14
+
+
+def test_export_webdataset_failed_download(tmp_path, task_cf_file, dataset_cf_file):
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file,
+        mock_dataset_path=dataset_cf_file,
+    )
+    failed = client.dataset[9].url
+    download_image = client.download_image
+
+    def failing_download_image(url, *args, **kwargs):
+        if url == failed:
+            raise OSError("connection reset")
+        return download_image(url, *args, **kwargs)
+
+    client.download_image = failing_download_image
+    export_path = tmp_path / "shards"
+    with pytest.raises(ExportError):
+        export_webdataset(client, export_path, shard_max_count=5, max_workers=1)
+    # Only shards that were full before the error are kept; the open shard
+    # of each subset is discarded.
+    paths = sorted(export_path.iterdir())
+    assert [path.name for path in paths] == ["TRAIN-000000.tar", "TRAIN-000001.tar"]
+    for path in paths:
+        with tarfile.open(path) as tar:
+            assert len(tar.getmembers()) == 15
+
+
+def test_export_tfrecord(tmp_path, task_od_file, dataset_od_file):
+    client = SingTownAIClient(
+        mock_task_path=task_od_file,
+        mock_dataset_path=dataset_od_file,
+    )
+    shards = export_tfrecord(client, tmp_path / "shards")
+    assert [path.name for path in shards["VALID"]] == ["VALID-000000.tfrecord"]
+    records = read_tfrecords(shards["TRAIN"][0])
+    assert len(records) == 14
+    for record in records:
+        assert b"image/encoded" in record
+        assert b"image/object/bbox/xmin" in record
+        assert b"fake image content" in record
+
+
+def test_export_tfrecord_label_error(tmp_path, task_cf_file):
+    dataset = [
+        {"url": f"{tmp_path}/cat.0.jpg", "subset": "TRAIN", "classification": "c"}
+    ]
+    p = tmp_path / "MOCK_DATASET_CF.json"
+    p.write_text(json.dumps(dataset))
+    client = SingTownAIClient(mock_task_path=task_cf_file, mock_dataset_path=p)
+    with pytest.raises(LabelError):
+        export_tfrecord(client, tmp_path / "shards")
@@ -122,3 +122,346 @@ def test_export_yolo_width_height_negative(tmp_path, task_od_file):
     export_path = tmp_path / "dataset"
     with pytest.raises(ValueError):
         export_yolo(client, export_path)
+
+
+def test_export_yolo_duplicate_url(tmp_path, task_od_file):
+    box = {"label": "cat", "xmin": 0.2, "ymin": 0.01, "xmax": 0.3, "ymax": 0.4}
+    dataset = [
+        {"url": f"{tmp_path}/images/cat.0.jpg", "subset": "TRAIN"},
+        {
+            "url": f"{tmp_path}/images/cat.0.jpg",
+            "subset": "TRAIN",
+            "objectDetection": [box],
+        },
+    ]
+    p = tmp_path / "MOCK_DATASET_OD.json"
+    p.write_text(json.dumps(dataset))
+    create_image_files(dataset)
+
+    client = SingTownAIClient(
+        mock_task_path=task_od_file,
+        mock_dataset_path=p,
+    )
+    export_path = tmp_path / "dataset"
+    export_yolo(client, export_path, max_workers=4)
+    assert os.listdir(export_path / "images/TRAIN") == ["cat.0.jpg"]
+    with open(export_path / "labels/TRAIN" / "cat.0.txt", "r") as f:
+        assert f.read() == "0 0.250000 0.205000 0.100000 0.390000\n"
+
+
+def test_export_yolo_stream_dataset(tmp_path, task_od_file, dataset_od_file):
+    client = SingTownAIClient(
+        mock_task_path=task_od_file,
+        mock_dataset_path=dataset_od_file,
+        stream_dataset=True,
+    )
+    export_path = tmp_path / "dataset"
+    export_yolo(client, export_path)
+    assert len(os.listdir(export_path / "images/TRAIN")) == 14
+    assert len(os.listdir(export_path / "labels/TRAIN")) == 14
+
+
+def test_export_yolo_query(tmp_path, task_od_file, dataset_od_file):
+    client = SingTownAIClient(
+        mock_task_path=task_od_file,
+        mock_dataset_path=dataset_od_file,
+    )
+    export_path = tmp_path / "dataset"
+    query = client.index.filter(subsets=["TRAIN", "VALID"]).sample(fraction=0.5)
+    export_yolo(client, export_path, dataset=query)
+    assert len(os.listdir(export_path / "images/TRAIN")) == 7
+    assert len(os.listdir(export_path / "labels/VALID")) == 2
+    assert not (export_path / "images/TEST").exists()
+
+
+def test_start_export_yolo(tmp_path, task_od_file, dataset_od_file):
+    from singtown_ai import start_export_yolo
+
+    client = SingTownAIClient(
+        mock_task_path=task_od_file,
+        mock_dataset_path=dataset_od_file,
+        prefetch="lazy",
+    )
+    export_path = tmp_path / "dataset"
+    handle = start_export_yolo(client, export_path)
+    handle.wait(timeout=10)
+    assert len(os.listdir(export_path / "images/TRAIN")) == 14
+    assert len(os.listdir(export_path / "labels/VALID")) == 4
+    handle.result(timeout=10)
+    for label in client.task.project.labels:
+        assert handle.classes[label].result(timeout=10) == export_path
+    assert handle.progress()["completed"] == 20
+
+
+def test_start_export_yolo_label_error(tmp_path, task_od_file):
+    from singtown_ai import start_export_yolo
+
+    dataset = [
+        {
+            "url": f"{tmp_path}/images/cat.0.jpg",
+            "subset": "TRAIN",
+            "objectDetection": [
+                {"label": "c", "xmin": 0.2, "ymin": 0.01, "xmax": 0.3, "ymax": 0.4},
+            ],
+        },
+    ]
+    p = tmp_path / "MOCK_DATASET_OD.json"
+    p.write_text(json.dumps(dataset))
+    create_image_files(dataset)
+
+    client = SingTownAIClient(mock_task_path=task_od_file, mock_dataset_path=p)
+    handle = start_export_yolo(client, tmp_path / "dataset")
+    with pytest.raises(ValueError):
+        handle.wait(["TEST"], timeout=10)
+    with pytest.raises(ValueError):
+        handle.result(timeout=10)
+
+
+def _od_dataset(tmp_path, dataset):
+    p = tmp_path / "MOCK_DATASET_OD.json"
+    p.write_text(json.dumps(dataset))
+    create_image_files(dataset)
+    return p
+
+
+def test_export_yolo_incremental(tmp_path, task_od_file, monkeypatch):
+    box = {"label": "cat", "xmin": 0.2, "ymin": 0.01, "xmax": 0.3, "ymax": 0.4}
+    dataset = [
+        {
+            "url": f"{tmp_path}/images/cat.{i}.jpg",
+            "subset": "TRAIN",
+            "objectDetection": [box],
+        }
+        for i in range(3)
+    ]
+    p = _od_dataset(tmp_path, dataset)
+    client = SingTownAIClient(mock_task_path=task_od_file, mock_dataset_path=p)
+    export_path = tmp_path / "dataset"
+    export_yolo(client, export_path)
+    yaml_mtime = (export_path / "data.yaml").stat().st_mtime_ns
+    label_mtime = (export_path / "labels/TRAIN/cat.0.txt").stat().st_mtime_ns
+
+    dataset[1]["objectDetection"] = []
+    dataset[2]["subset"] = "VALID"
+    p = _od_dataset(tmp_path, dataset)
+    client = SingTownAIClient(mock_task_path=task_od_file, mock_dataset_path=p)
+    downloads = []
+    download_image = client.download_image
+
+    def counting_download_image(url, *args, **kwargs):
+        downloads.append(url)
+        return download_image(url, *args, **kwargs)
+
+    monkeypatch.setattr(client, "download_image", counting_download_image)
+    export_yolo(client, export_path)
+    assert sorted(downloads) == [dataset[1]["url"], dataset[2]["url"]]
+    assert (export_path / "data.yaml").stat().st_mtime_ns == yaml_mtime
+    assert (export_path / "labels/TRAIN/cat.0.txt").stat().st_mtime_ns == label_mtime
+    assert (export_path / "labels/TRAIN/cat.1.txt").read_text() == ""
+    assert sorted(os.listdir(export_path / "images/TRAIN")) == [
+        "cat.0.jpg",
+        "cat.1.jpg",
+    ]
+    assert sorted(os.listdir(export_path / "labels/TRAIN")) == [
+        "cat.0.txt",
+        "cat.1.txt",
+    ]
+    assert os.listdir(export_path / "labels/VALID") == ["cat.2.txt"]
+
+    downloads.clear()
+    export_yolo(client, export_path)
+    assert downloads == []
+
+
+def test_export_yolo_incremental_url_change(tmp_path, task_od_file):
+    dataset = [{"url": f"{tmp_path}/v1/a.jpg", "subset": "TRAIN"}]
+    p = _od_dataset(tmp_path, dataset)
+    client = SingTownAIClient(mock_task_path=task_od_file, mock_dataset_path=p)
+    export_path = tmp_path / "dataset"
+    export_yolo(client, export_path)
+
+    dataset[0]["url"] = f"{tmp_path}/v2/a.jpg"
+    p = _od_dataset(tmp_path, dataset)
+    (tmp_path / "v2/a.jpg").write_bytes(b"new image content")
+    client = SingTownAIClient(mock_task_path=task_od_file, mock_dataset_path=p)
+    export_yolo(client, export_path)
+    image = export_path / "images/TRAIN/a.jpg"
+    assert image.read_bytes() == b"new image content"
+
+
+def test_export_yolo_resume(tmp_path, task_od_file, monkeypatch):
+    from singtown_ai import ExportError
+    from singtown_ai.manifest import MANIFEST_NAME
+
+    dataset = [
+        {"url": f"{tmp_path}/images/cat.{i}.jpg", "subset": "TRAIN"} for i in range(4)
+    ]
+    p = _od_dataset(tmp_path, dataset)
+    client = SingTownAIClient(mock_task_path=task_od_file, mock_dataset_path=p)
+    download_image = client.download_image
+    downloads = []
+
+    def failing_download_image(url, *args, **kwargs):
+        downloads.append(url)
+        if url.endswith("cat.3.jpg"):
+            raise OSError("connection reset")
+        return download_image(url, *args, **kwargs)
+
+    monkeypatch.setattr(client, "download_image", failing_download_image)
+    export_path = tmp_path / "dataset"
+    with pytest.raises(ExportError):
+        export_yolo(client, export_path, max_workers=1)
+    assert (export_path / MANIFEST_NAME).exists()
+
+    downloads.clear()
+    monkeypatch.setattr(
+        client,
+        "download_image",
+        lambda url, *args, **kwargs: (
+            downloads.append(url) or download_image(url, *args, **kwargs)
+        ),
+    )
+    export_yolo(client, export_path)
+    assert downloads == [dataset[3]["url"]]
+    assert len(os.listdir(export_path / "images/TRAIN")) == 4
+
+
+def test_export_yolo_reports_all_label_errors(tmp_path, task_od_file):
+    from singtown_ai import LabelError
+
+    box = {"label": "cat", "xmin": 0.2, "ymin": 0.01, "xmax": 0.3, "ymax": 0.4}
+    dataset = [
+        {
+            "url": f"{tmp_path}/images/cat.0.jpg",
+            "subset": "TRAIN",
+            "objectDetection": [box],
+        },
+        {
+            "url": f"{tmp_path}/images/cat.1.jpg",
+            "subset": "TRAIN",
+            "objectDetection": [box, {**box, "label": "c"}],
+        },
+        {
+            "url": f"{tmp_path}/images/cat.2.jpg",
+            "subset": "VALID",
+            "objectDetection": [{**box, "xmax": 0.1}],
+        },
+    ]
+    p = _od_dataset(tmp_path, dataset)
+    client = SingTownAIClient(mock_task_path=task_od_file, mock_dataset_path=p)
+    export_path = tmp_path / "dataset"
+    with pytest.raises(LabelError) as excinfo:
+        export_yolo(client, export_path)
+    assert [url for url, _ in excinfo.value.errors] == [
+        dataset[1]["url"],
+        dataset[2]["url"],
+    ]
+    assert "'c' is not in labels" in excinfo.value.errors[0][1]
+    assert not (export_path / "labels").exists()
+    assert not (export_path / "images").exists()
+
+
+def test_yolo_labels_round_like_format():
+    from singtown_ai.exporter import _yolo_labels
+    from singtown_ai.type import Annotation, BoundingBox
+
+    annotations = [
+        Annotation(
+            url=f"{k}.jpg",
+            subset="TRAIN",
+            object_detection=[
+                BoundingBox(label="dog", xmin=0, ymin=0, xmax=2 * k / 640, ymax=k / 480)
+            ],
+        )
+        for k in range(321)
+    ]
+    expected = []
+    for annotation in annotations:
+        box = annotation.object_detection[0]
+        cx = (box.xmin + box.xmax) / 2
+        cy = (box.ymin + box.ymax) / 2
+        w = box.xmax - box.xmin
+        h = box.ymax - box.ymin
+        expected.append(f"1 {cx:.6f} {cy:.6f} {w:.6f} {h:.6f}\n")
+    assert _yolo_labels(annotations, {"cat": 0, "dog": 1}) == expected
+    assert expected[7].startswith("1 0.010937 ")
+
+
+def test_export_yolo_stream_batches(tmp_path, task_od_file, monkeypatch):
+    import singtown_ai.exporter
+    from singtown_ai import LabelError
+
+    box = {"label": "cat", "xmin": 0.2, "ymin": 0.01, "xmax": 0.3, "ymax": 0.4}
+    dataset = [
+        {
+            "url": f"{tmp_path}/images/cat.{i}.jpg",
+            "subset": "TRAIN",
+            "objectDetection": [box],
+        }
+        for i in range(7)
+    ]
+    p = _od_dataset(tmp_path, dataset)
+    client = SingTownAIClient(
+        mock_task_path=task_od_file, mock_dataset_path=p, stream_dataset=True
+    )
+    monkeypatch.setattr(singtown_ai.exporter, "YOLO_BATCH_SIZE", 3)
+    write_text_files = singtown_ai.exporter._write_text_files
+    batches = []
+
+    def record(files):
+        batches.append(len(files))
+        write_text_files(files)
+
+    monkeypatch.setattr(singtown_ai.exporter, "_write_text_files", record)
+    export_yolo(client, tmp_path / "dataset")
+    assert batches == [3, 3, 1]
+    assert len(os.listdir(tmp_path / "dataset/labels/TRAIN")) == 7
+
+    dataset[1]["objectDetection"] = [{**box, "label": "c"}]
+    dataset[5]["objectDetection"] = [{**box, "xmax": 0.1}]
+    p.write_text(json.dumps(dataset))
+    client = SingTownAIClient(
+        mock_task_path=task_od_file, mock_dataset_path=p, stream_dataset=True
+    )
+    batches.clear()
+    with pytest.raises(LabelError) as excinfo:
+        export_yolo(client, tmp_path / "invalid")
+    assert [url for url, _ in excinfo.value.errors] == [
+        dataset[1]["url"],
+        dataset[5]["url"],
+    ]
+    assert batches == []
+
+
+def test_export_yolo_list_validates_before_writing(tmp_path, task_od_file, monkeypatch):
+    import singtown_ai.exporter
+    from singtown_ai import LabelError
+
+    box = {"label": "cat", "xmin": 0.2, "ymin": 0.01, "xmax": 0.3, "ymax": 0.4}
+    dataset = [
+        {
+            "url": f"{tmp_path}/images/cat.{i}.jpg",
+            "subset": "TRAIN",
+            "objectDetection": [box],
+        }
+        for i in range(7)
+    ]
+    dataset[5]["objectDetection"] = [{**box, "xmax": 0.1}]
+    p = _od_dataset(tmp_path, dataset)
+    monkeypatch.setattr(singtown_ai.exporter, "YOLO_BATCH_SIZE", 3)
+    client = SingTownAIClient(mock_task_path=task_od_file, mock_dataset_path=p)
+    with pytest.raises(LabelError):
+        export_yolo(client, tmp_path / "list", dataset=list(client.dataset))
+    assert not (tmp_path / "list/labels").exists()
+    assert not (tmp_path / "list/images").exists()
+    with pytest.raises(LabelError):
+        export_yolo(client, tmp_path / "columnar", dataset=client.columnar)
+    assert not (tmp_path / "columnar/labels").exists()
+    assert not (tmp_path / "columnar/images").exists()
+
+    client = SingTownAIClient(
+        mock_task_path=task_od_file, mock_dataset_path=p, stream_dataset=True
+    )
+    with pytest.raises(LabelError):
+        export_yolo(client, tmp_path / "stream")
+    assert len(os.listdir(tmp_path / "stream/labels/TRAIN")) == 3
@@ -0,0 +1,47 @@
+import struct
+
+import pytest
+
+from singtown_ai.image import image_size
+from .conftest import png_bytes
+
+
+def jpeg(width, height):
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + bytes(9)
+    sof = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, height, width, 1) + bytes(3)
+    return b"\xff\xd8" + app0 + sof + b"\xff\xd9"
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        png_bytes(640, 480),
+        jpeg(640, 480),
+        b"GIF89a" + struct.pack("<HH", 640, 480) + bytes(8),
+        b"BM" + bytes(16) + struct.pack("<ii", 640, -480) + bytes(8),
+        b"RIFF"
+        + bytes(4)
+        + b"WEBPVP8X"
+        + bytes(8)
+        + (639).to_bytes(3, "little")
+        + (479).to_bytes(3, "little"),
+    ],
+)
+def test_image_size(tmp_path, data):
+    path = tmp_path / "image"
+    path.write_bytes(data)
+    assert image_size(path) == (640, 480)
+
+
+def test_image_size_unsupported(tmp_path):
+    path = tmp_path / "image.jpg"
+    path.write_bytes(b"fake image content")
+    with pytest.raises(ValueError):
+        image_size(path)
+
+
+def test_image_size_truncated(tmp_path):
+    path = tmp_path / "image.jpg"
+    path.write_bytes(b"\xff\xd8\xff\xc0\x00")
+    with pytest.raises(ValueError):
+        image_size(path)
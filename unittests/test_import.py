@@ -0,0 +1,69 @@
+import subprocess
+import sys
+
+import pytest
+
+import singtown_ai
+
+HEAVY_MODULES = ["aiohttp", "pydantic", "requests", "requests_mock", "yaml"]
+
+
+def loaded_modules(statement):
+    code = (
+        f"import sys; {statement}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip()
+
+
+@pytest.mark.parametrize(
+    "statement",
+    ["import singtown_ai", "from singtown_ai import file_watcher, stdout_watcher"],
+)
+def test_import_is_lazy(statement):
+    assert loaded_modules(statement) == ""
+
+
+def test_import_client_defers_mock_and_yaml():
+    assert loaded_modules("from singtown_ai import SingTownAIClient") == (
+        "pydantic,requests"
+    )
+
+
+def test_lazy_attributes():
+    from singtown_ai.client import SingTownAIClient
+
+    assert singtown_ai.SingTownAIClient is SingTownAIClient
+    assert set(singtown_ai.__all__) <= set(dir(singtown_ai))
+    with pytest.raises(AttributeError):
+        singtown_ai.not_exists
+
+
+def test_import_time_benchmark():
+    from pathlib import Path
+
+    sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+    try:
+        import import_time
+    finally:
+        sys.path.pop(0)
+
+    total, modules = import_time.measure("import singtown_ai", 1)
+    assert total == sum(modules.values())
+    assert "singtown_ai" in modules
+
+
+def test_dataset_parse_benchmark(capsys):
+    from pathlib import Path
+
+    sys.path.insert(0, str(Path(__file__).parent.parent / "benchmarks"))
+    try:
+        import dataset_parse
+    finally:
+        sys.path.pop(0)
+
+    assert dataset_parse.main(["--count", "100", "--repeat", "1"]) == 0
+    assert "validate_json" in capsys.readouterr().out
@@ -0,0 +1,70 @@
+from singtown_ai import SingTownAIClient
+import pytest
+
+
+def test_index_counts(task_od_file, dataset_od_file):
+    client = SingTownAIClient(
+        mock_task_path=task_od_file, mock_dataset_path=dataset_od_file
+    )
+    index = client.index
+    assert client.index is index
+    dataset = client.dataset
+    assert len(index) == len(dataset)
+    assert index.count() == 20
+    assert index.count("TRAIN") == 14
+    for label in client.task.project.labels:
+        for subset in ("TRAIN", "VALID", "TEST", None):
+            annotations = [a for a in dataset if subset in (None, a.subset)]
+            assert index.count(subset, label) == sum(
+                any(box.label == label for box in a.object_detection)
+                for a in annotations
+            )
+            assert index.box_count(subset, label) == sum(
+                box.label == label for a in annotations for box in a.object_detection
+            )
+    assert index.box_count() == sum(len(a.object_detection) for a in dataset)
+    assert index.get(dataset[3].url) == [dataset[3]]
+    assert index.get("missing.jpg") == []
+
+
+def test_index_statistics(task_od_file, dataset_od_file):
+    client = SingTownAIClient(
+        mock_task_path=task_od_file, mock_dataset_path=dataset_od_file
+    )
+    stats = client.index.statistics()
+    assert stats["images"] == {"TRAIN": 14, "VALID": 4, "TEST": 2}
+    widths = [
+        box.xmax - box.xmin
+        for a in client.dataset
+        for box in a.object_detection
+        if box.label == "cat"
+    ]
+    cat = stats["box_sizes"]["cat"]
+    assert cat["count"] == len(widths)
+    assert cat["width"]["max"] == pytest.approx(max(widths))
+    assert cat["width"]["mean"] == pytest.approx(sum(widths) / len(widths))
+    assert sum(stats["boxes"]["cat"].values()) == len(widths)
+
+
+def test_index_filter_sample(task_cf_file, dataset_cf_file):
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file, mock_dataset_path=dataset_cf_file
+    )
+    index = client.index
+    train_cats = index.filter(subsets=["TRAIN"], labels=["cat"])
+    assert len(train_cats) == 7
+    assert all(a.subset == "TRAIN" and a.classification == "cat" for a in train_cats)
+    assert len(index.filter(predicate=lambda a: a.url.endswith("0.jpg"))) == 2
+
+    sample = index.sample(fraction=0.5)
+    assert sample.count("TRAIN") == 7
+    assert sample.count("VALID") == 2
+    assert sample.count("TEST") == 1
+    assert [a.url for a in sample] == [a.url for a in index if a in list(sample)]
+    assert [a.url for a in index.sample(n=10)] == [a.url for a in sample]
+    assert len(index.sample(n=10, seed=1)) == 10
+    with pytest.raises(ValueError):
+        index.sample()
+
+    client.dataset = list(client.dataset)[:4]
+    assert len(client.index) == 4
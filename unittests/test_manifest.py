@@ -0,0 +1,40 @@
+from singtown_ai.manifest import MANIFEST_NAME, ExportManifest, annotation_hash
+from singtown_ai.type import Annotation
+
+
+def test_manifest_journal_replay(tmp_path):
+    image = tmp_path / "TRAIN/cat/cat.0.jpg"
+    image.parent.mkdir(parents=True)
+    image.write_bytes(b"fake image content")
+    annotation = Annotation(url="cat.0.jpg", subset="TRAIN", classification="cat")
+    key = "TRAIN/cat/cat.0.jpg"
+
+    manifest = ExportManifest(tmp_path)
+    assert not manifest.check(key, annotation_hash(annotation))
+    manifest.record(key, annotation.url, [image])
+    assert not (tmp_path / MANIFEST_NAME).exists()
+
+    manifest = ExportManifest(tmp_path)
+    assert manifest.check(key, annotation_hash(annotation))
+    assert manifest.entries[key]["size"] == len(b"fake image content")
+
+    image.write_bytes(b"truncated")
+    assert not ExportManifest(tmp_path).check(key, annotation_hash(annotation))
+
+
+def test_manifest_remove_stale(tmp_path):
+    image = tmp_path / "TRAIN/cat/cat.0.jpg"
+    image.parent.mkdir(parents=True)
+    image.write_bytes(b"fake image content")
+    manifest = ExportManifest(tmp_path)
+    manifest.check("TRAIN/cat/cat.0.jpg", "hash")
+    manifest.record("TRAIN/cat/cat.0.jpg", "cat.0.jpg", [image])
+    manifest.commit()
+
+    manifest = ExportManifest(tmp_path)
+    assert manifest.remove_stale() == []
+    manifest.scanned = True
+    assert manifest.remove_stale() == ["TRAIN/cat/cat.0.jpg"]
+    manifest.commit()
+    assert not image.exists()
+    assert ExportManifest(tmp_path).entries == {}
@@ -0,0 +1,154 @@
+import json
+import multiprocessing
+import os
+import pickle
+import sys
+from pathlib import Path
+
+import pytest
+
+from singtown_ai import PackedDataset, SingTownAIClient, export_packed
+
+
+_forked_dataset = None
+
+
+def init_worker(dataset):
+    global _forked_dataset
+    _forked_dataset = dataset
+
+
+def read_sample(args):
+    dataset, index = args
+    return bytes(dataset[index])
+
+
+def read_forked_sample(index):
+    return bytes(_forked_dataset[index])
+
+
+def test_export_packed(tmp_path, task_cf_file, dataset_cf_file):
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file,
+        mock_dataset_path=dataset_cf_file,
+    )
+    export_path = tmp_path / "packed"
+    export_packed(client, export_path)
+    assert sorted(os.listdir(export_path)) == ["data.bin", "index.npy", "meta.json"]
+
+    with PackedDataset(export_path) as dataset:
+        assert len(dataset) == 20
+        assert dataset.labels == ["cat", "dog"]
+        sample = dataset[0]
+        assert isinstance(sample, memoryview)
+        assert sample.obj is not None
+        assert bytes(sample) == b"fake image content"
+        del sample
+        assert sorted(dataset.class_ids.tolist()) == [0] * 10 + [1] * 10
+
+    train = PackedDataset(export_path, subset="TRAIN")
+    assert len(train) == 14
+    assert [bytes(sample) for sample in train] == [b"fake image content"] * 14
+    with pytest.raises(IndexError):
+        train[14]
+    assert bytes(train[-1]) == b"fake image content"
+    assert train.label(0) in (0, 1)
+
+
+def test_export_packed_duplicate_url(tmp_path, task_cf_file):
+    from .conftest import create_image_files
+
+    url = f"{tmp_path}/images/cat.0.jpg"
+    dataset = [
+        {"url": url, "subset": "TRAIN", "classification": "cat"},
+        {"url": url, "subset": "VALID", "classification": "dog"},
+    ]
+    p = tmp_path / "MOCK_DATASET_CF.json"
+    p.write_text(json.dumps(dataset))
+    create_image_files(dataset)
+
+    client = SingTownAIClient(mock_task_path=task_cf_file, mock_dataset_path=p)
+    export_packed(client, tmp_path / "packed")
+    dataset = PackedDataset(tmp_path / "packed")
+    assert (tmp_path / "packed/data.bin").stat().st_size == len(b"fake image content")
+    assert dataset.index["offset"].tolist() == [0, 0]
+    assert dataset.class_ids.tolist() == [0, 1]
+
+
+def test_export_packed_dataset_order(tmp_path, task_cf_file, monkeypatch):
+    import time
+
+    urls = [f"{tmp_path}/images/{name}.jpg" for name in "abac"]
+    dataset = [
+        {"url": url, "subset": "TRAIN", "classification": label}
+        for url, label in zip(urls, ["cat", "dog", "dog", "cat"])
+    ]
+    p = tmp_path / "MOCK_DATASET_CF.json"
+    p.write_text(json.dumps(dataset))
+    (tmp_path / "images").mkdir()
+    for url in urls:
+        Path(url).write_bytes(url[-5:].encode())
+
+    client = SingTownAIClient(mock_task_path=task_cf_file, mock_dataset_path=p)
+    download_image = client.download_image
+
+    def reversed_download_image(url, *args, **kwargs):
+        time.sleep(0.05 * (3 - "abc".index(url[-5])))
+        return download_image(url, *args, **kwargs)
+
+    monkeypatch.setattr(client, "download_image", reversed_download_image)
+    export_packed(client, tmp_path / "packed")
+    assert (tmp_path / "packed/data.bin").read_bytes() == b"a.jpgb.jpgc.jpg"
+    with PackedDataset(tmp_path / "packed") as packed:
+        assert [bytes(sample) for sample in packed] == [
+            b"a.jpg",
+            b"b.jpg",
+            b"a.jpg",
+            b"c.jpg",
+        ]
+        assert packed.class_ids.tolist() == [0, 1, 1, 0]
+
+
+def test_export_packed_object_detection(tmp_path, task_od_file, dataset_od_file):
+    client = SingTownAIClient(
+        mock_task_path=task_od_file,
+        mock_dataset_path=dataset_od_file,
+    )
+    export_packed(client, tmp_path / "packed")
+    dataset = PackedDataset(tmp_path / "packed", subset="VALID")
+    assert len(dataset) == 4
+    boxes, labels = dataset.image_boxes(0)
+    assert boxes.shape == (len(labels), 4)
+    assert dataset.class_ids.tolist() == [-1] * 4
+
+
+def test_packed_dataset_pickle(tmp_path, task_cf_file, dataset_cf_file):
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file,
+        mock_dataset_path=dataset_cf_file,
+    )
+    export_packed(client, tmp_path / "packed")
+    dataset = PackedDataset(tmp_path / "packed", subset="TEST")
+    dataset[0]
+    copy = pickle.loads(pickle.dumps(dataset))
+    assert len(copy) == 2
+    assert bytes(copy[1]) == b"fake image content"
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fork is not available")
+def test_packed_dataset_fork(tmp_path, task_cf_file, dataset_cf_file):
+    client = SingTownAIClient(
+        mock_task_path=task_cf_file,
+        mock_dataset_path=dataset_cf_file,
+    )
+    export_packed(client, tmp_path / "packed")
+    dataset = PackedDataset(tmp_path / "packed")
+    dataset[0]
+    context = multiprocessing.get_context("fork")
+    with context.Pool(2, initializer=init_worker, initargs=(dataset,)) as pool:
+        samples = pool.map(read_forked_sample, range(len(dataset)))
+    assert samples == [b"fake image content"] * 20
+
+    with context.Pool(2) as pool:
+        samples = pool.map(read_sample, [(dataset, i) for i in range(2)])
+    assert samples == [b"fake image content"] * 2
@@ -0,0 +1,99 @@
+from singtown_ai import SingTownAIClientPool, export_class_folder, export_yolo
+from singtown_ai.pool import FairExecutor
+import os
+import threading
+import pytest
+
+
+def test_fair_executor_round_robin():
+    executor = FairExecutor(max_workers=1)
+    started = threading.Event()
+    release = threading.Event()
+    order = []
+
+    def block():
+        started.set()
+        release.wait()
+
+    executor.submit_to("a", block)
+    started.wait()
+    futures = [executor.submit_to("a", order.append, f"a{i}") for i in range(4)]
+    futures += [executor.submit_to("b", order.append, f"b{i}") for i in range(2)]
+    release.set()
+    for future in futures:
+        future.result()
+    assert order == ["a0", "b0", "a1", "b1", "a2", "a3"]
+    executor.shutdown()
+    with pytest.raises(RuntimeError):
+        executor.submit(print)
+
+
+def test_fair_executor_errors_and_cancel():
+    executor = FairExecutor(max_workers=1)
+    release = threading.Event()
+    executor.submit(release.wait)
+    failed = executor.submit(lambda: 1 / 0)
+    queued = executor.submit(print)
+    executor.shutdown(wait=False, cancel_futures=True)
+    release.set()
+    assert failed.cancelled() and queued.cancelled()
+
+    executor = FairExecutor(max_workers=2)
+    with pytest.raises(ZeroDivisionError):
+        executor.submit(lambda: 1 / 0).result()
+    assert executor.for_task("x").submit(sum, [1, 2]).result() == 3
+    executor.shutdown()
+
+
+def test_client_pool(
+    tmp_path, task_cf_file, dataset_cf_file, task_od_file, dataset_od_file
+):
+    with SingTownAIClientPool(
+        max_workers=4, cache_dir=tmp_path / "cache", log_batch_size=10
+    ) as pool:
+        cf = pool.client(
+            "1", mock_task_path=task_cf_file, mock_dataset_path=dataset_cf_file
+        )
+        od = pool.client(
+            "2", mock_task_path=task_od_file, mock_dataset_path=dataset_od_file
+        )
+        assert pool["1"] is cf
+        assert cf.session is od.session
+        assert cf.image_cache is od.image_cache
+        assert cf.task.project.type == "CLASSIFICATION"
+        assert od.task.project.type == "OBJECT_DETECTION"
+        assert cf.log_batcher.thread is None
+
+        threads = [
+            threading.Thread(target=export_class_folder, args=(cf, tmp_path / "cf")),
+            threading.Thread(target=export_yolo, args=(od, tmp_path / "od")),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        cf.log("done")
+    assert cf.log_batcher.closed and od.log_batcher.closed
+    assert len(os.listdir(tmp_path / "cf/TRAIN/cat")) == 7
+    assert len(os.listdir(tmp_path / "od/images/TRAIN")) == 14
+    assert cf.mocker.last_request.json() == [
+        {"timestamp": cf.task.logs[-1].timestamp, "content": "done\n"}
+    ]
+    with pytest.raises(RuntimeError):
+        pool.client("3")
+
+
+def test_client_pool_builds_outside_lock(task_cf_file, monkeypatch):
+    import singtown_ai.pool
+
+    client_class = singtown_ai.pool.SingTownAIClient
+    with SingTownAIClientPool(log_batch_size=10) as pool:
+
+        def build(**options):
+            assert not pool.lock.locked()
+            return client_class(**options)
+
+        monkeypatch.setattr(singtown_ai.pool, "SingTownAIClient", build)
+        client = pool.client("1", mock_task_path=task_cf_file, log_flush_interval=5)
+        assert pool.client("1") is client
+        assert client.log_batcher.thread is None
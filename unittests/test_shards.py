@@ -0,0 +1,57 @@
+import struct
+
+from singtown_ai.shards import (
+    bytes_feature,
+    crc32c,
+    float_feature,
+    int64_feature,
+    masked_crc32c,
+    tf_example,
+    tfrecord,
+)
+
+
+def test_crc32c():
+    assert crc32c(b"") == 0
+    assert crc32c(b"123456789") == 0xE3069283
+    assert crc32c(bytes(32)) == 0x8A9136AA
+    assert crc32c(b"\xff" * 32) == 0x62A8AB43
+    assert crc32c(bytes(range(32))) == 0x46DD794E
+
+
+def test_crc32c_lengths():
+    import random
+
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0x82F63B78 if crc & 1 else crc >> 1
+        table.append(crc)
+
+    def reference(data):
+        crc = 0xFFFFFFFF
+        for byte in data:
+            crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+        return crc ^ 0xFFFFFFFF
+
+    for size in [1, 3, 4, 5, 63, 64, 65, 128, 129, 1000, 4097]:
+        data = random.Random(size).randbytes(size)
+        assert crc32c(data) == reference(data)
+
+
+def test_tf_example():
+    assert tf_example({"a": int64_feature([1])}) == bytes.fromhex(
+        "0a0c0a0a0a016112051a030a0101"
+    )
+    assert bytes_feature(["ab"]) == bytes.fromhex("0a040a026162")
+    assert float_feature([1.0]) == b"\x12\x06\x0a\x04" + struct.pack("<f", 1.0)
+
+
+def test_tfrecord():
+    record = tfrecord(b"abc")
+    length = struct.pack("<Q", 3)
+    assert record[:8] == length
+    assert struct.unpack("<I", record[8:12])[0] == masked_crc32c(length)
+    assert record[12:15] == b"abc"
+    assert struct.unpack("<I", record[15:])[0] == masked_crc32c(b"abc")
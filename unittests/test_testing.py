@@ -0,0 +1,85 @@
+from singtown_ai import SingTownAIClient, export_class_folder, export_yolo
+from singtown_ai.testing import MockServer
+import os
+import time
+import pytest
+
+
+@pytest.fixture
+def mock_env(monkeypatch):
+    monkeypatch.setenv("SINGTOWN_AI_MOCK_SERVER", "1")
+    monkeypatch.setenv("SINGTOWN_AI_MOCK_DATASET_SIZE", "50")
+    monkeypatch.setenv("SINGTOWN_AI_MOCK_IMAGE_SIZE", "100")
+
+
+def test_mock_server_env(tmp_path, mock_env):
+    client = SingTownAIClient()
+    assert client.host == client.mock_server.url
+    assert len(client.dataset) == 50
+    export_class_folder(client, tmp_path / "dataset")
+    assert len(os.listdir(tmp_path / "dataset/TRAIN/cat")) == 20
+    image = tmp_path / "dataset/TRAIN/cat/0.jpg"
+    assert image.read_bytes() == client.mock_server.image(0)
+    client.mock_server.stop()
+
+
+def test_mock_server_task_file(tmp_path, mock_env, task_od_file):
+    client = SingTownAIClient(mock_task_path=task_od_file)
+    export_yolo(client, tmp_path / "dataset")
+    assert len(os.listdir(tmp_path / "dataset/labels/TRAIN")) == 35
+    client.mock_server.stop()
+
+
+def test_mock_server_records_uploads(tmp_path):
+    with MockServer(dataset_size=0) as server:
+        client = SingTownAIClient(host=server.url, log_batch_size=2)
+        client.log("a")
+        client.log("b")
+        client.log("c")
+        client.flush_logs()
+        client.append_metrics([{"epoch": 0}])
+        client.append_metrics([{"epoch": 1}])
+        uploadfile = tmp_path / "result.zip"
+        uploadfile.write_bytes(b"0123456789")
+        client.upload_results_zip(uploadfile, chunk_size=3)
+    assert [log["content"] for log in server.logs] == ["a\n", "b\n", "c\n"]
+    assert server.task["metrics"] == [{"epoch": 0}, {"epoch": 1}]
+    assert server.results == [b"0123456789"]
+    assert [len(parts) for parts in server.uploads.values()] == [4]
+
+
+def test_mock_server_pages_and_etag(tmp_path):
+    with MockServer(dataset_size=25, page_size=10) as server:
+        kwargs = dict(host=server.url, snapshot_dir=tmp_path, stream_dataset=True)
+        client = SingTownAIClient(**kwargs)
+        assert len(list(client.dataset)) == 25
+        assert len(list(SingTownAIClient(**kwargs).dataset)) == 25
+    assert server.requests[f"GET {server.task_url}/dataset"] == 6
+
+
+def test_mock_server_error_rate():
+    from requests.exceptions import HTTPError
+
+    with MockServer(error_rate=1.0) as server:
+        with pytest.raises(HTTPError):
+            SingTownAIClient(host=server.url)
+
+
+def test_mock_server_latency_bandwidth(tmp_path):
+    with MockServer(latency=0.05, bandwidth=20000, image_size=2000) as server:
+        client = SingTownAIClient(host=server.url, prefetch="lazy")
+        start = time.monotonic()
+        client.download_image(f"{server.url}/images/1.jpg", tmp_path)
+        assert time.monotonic() - start >= 0.15
+    assert (tmp_path / "1.jpg").read_bytes() == server.image(1)
+
+
+def test_mock_server_compression():
+    with MockServer(dataset_size=2000) as server:
+        client = SingTownAIClient(host=server.url, compress="gzip", log_batch_size=1000)
+        assert client.dataset[1999].url == f"{server.url}/images/1999.jpg"
+        for i in range(100):
+            client.log(f"epoch {i}")
+        client.flush_logs()
+    assert [log["content"] for log in server.logs][-1] == "epoch 99\n"
+    assert len(server.logs) == 100